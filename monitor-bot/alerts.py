@@ -0,0 +1,229 @@
+import json
+import operator
+import os
+import time
+from config import ALERT_RULES_FILE, DEFAULT_ALERT_RULES
+
+OPERATORS = {
+    '>': operator.gt,
+    '>=': operator.ge,
+    '<': operator.lt,
+    '<=': operator.le,
+    '==': operator.eq,
+    '!=': operator.ne
+}
+
+SEVERITY_ICONS = {'critical': '🔴', 'warning': '🟠', 'info': '🔵'}
+
+# Alert states
+INACTIVE = 'inactive'
+PENDING = 'pending'
+FIRING = 'firing'
+
+class AlertRule:
+    """
+    Threshold on one NodeSnapshot field
+    """
+
+    def __init__(self, name, field, op, value, clear=None, duration=0, severity='warning',
+                 message='{node} {rule}: {value}', repeat=0):
+        if op not in OPERATORS:
+            raise ValueError(f"unknown operator {op!r}")
+        self.name = name
+        self.path = field.split('.')
+        self.compare = OPERATORS[op]
+        self.threshold = value
+        # Hysteresis: once firing, the condition is re-checked against `clear`
+        self.clear = value if clear is None else clear
+        self.duration = duration
+        self.severity = severity
+        self.message = message
+        self.repeat = repeat
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(
+            data['name'],
+            data['field'],
+            data.get('op', '>'),
+            data['value'],
+            data.get('clear'),
+            data.get('for', 0),
+            data.get('severity', 'warning'),
+            data.get('message', '{node} {rule}: {value}'),
+            data.get('repeat', 0)
+        )
+
+    def read(self, snapshot):
+        """Field value, or None if the snapshot doesn't have it (e.g. stats of an offline node)"""
+        value = snapshot
+        for attribute in self.path:
+            value = getattr(value, attribute, None)
+            if value is None:
+                return None
+        return value
+
+    def matches(self, value, firing):
+        return self.compare(value, self.clear if firing else self.threshold)
+
+class AlertState:
+    """Lifecycle of one (rule, node) pair"""
+
+    __slots__ = ('state', 'since', 'notified_at', 'value')
+
+    def __init__(self):
+        self.state = INACTIVE
+        self.since = None
+        self.notified_at = None
+        self.value = None
+
+class AlertEvent:
+    """A transition worth notifying about"""
+
+    __slots__ = ('key', 'rule', 'node', 'state', 'value', 'text')
+
+    def __init__(self, key, rule, node, state, value, text):
+        self.key = key
+        self.rule = rule
+        self.node = node
+        self.state = state
+        self.value = value
+        self.text = text
+
+def load_rules(path=ALERT_RULES_FILE):
+    """
+    Load alert rules from a JSON file, falling back to the defaults in config
+
+    Returns:
+        list: AlertRule objects
+    """
+    rules = DEFAULT_ALERT_RULES
+    if os.path.exists(path):
+        try:
+            with open(path, 'r') as f:
+                rules = json.load(f)
+            print(f"✅ Loaded {len(rules)} alert rules from {path}")
+        except Exception as e:
+            print(f"❌ Error loading {path}, using default alert rules: {e}")
+            rules = DEFAULT_ALERT_RULES
+
+    parsed = []
+    for rule in rules:
+        try:
+            parsed.append(AlertRule.from_dict(rule))
+        except (KeyError, ValueError) as e:
+            print(f"⚠️ Skipping alert rule {rule.get('name', '?')}: {e}")
+    return parsed
+
+class AlertEngine:
+    """
+    Evaluates rules against the latest snapshots and reports only transitions
+
+    A rule fires once its condition has held for `for` seconds and resolves
+    once the value crosses back over its `clear` threshold. Each (rule, node)
+    pair is keyed, so a node that stays down produces one firing and one
+    resolved notification, not one per cycle.
+    """
+
+    def __init__(self, rules=None):
+        self.rules = rules if rules is not None else load_rules()
+        self.states = {}
+
+    def evaluate(self, lavalink_data, now=None):
+        """
+        Run every rule against one cycle's snapshots
+
+        Args:
+            lavalink_data: List of NodeSnapshot
+            now: Evaluation time (monotonic)
+
+        Returns:
+            list: AlertEvent for every alert that fired, resolved or is due a reminder
+        """
+        now = now or time.monotonic()
+        events = []
+        seen = set()
+
+        for snapshot in lavalink_data:
+            for rule in self.rules:
+                key = f"{rule.name}:{snapshot.name}"
+                seen.add(key)
+                value = rule.read(snapshot)
+                state = self.states.get(key)
+                if value is None:
+                    # Unknown this cycle, keep whatever state the pair was in
+                    continue
+                if state is None:
+                    state = self.states[key] = AlertState()
+
+                if rule.matches(value, state.state == FIRING):
+                    state.value = value
+                    if state.state == INACTIVE:
+                        state.state = PENDING
+                        state.since = now
+                    if state.state == PENDING and now - state.since >= rule.duration:
+                        state.state = FIRING
+                        state.notified_at = now
+                        events.append(self._event(key, rule, snapshot, FIRING, value))
+                    elif state.state == FIRING and rule.repeat and now - state.notified_at >= rule.repeat:
+                        state.notified_at = now
+                        events.append(self._event(key, rule, snapshot, FIRING, value))
+                else:
+                    if state.state == FIRING:
+                        events.append(self._event(key, rule, snapshot, 'resolved', value))
+                    state.state = INACTIVE
+                    state.since = None
+
+        # Nodes that left the config take their alerts with them
+        for key in list(self.states):
+            if key not in seen:
+                del self.states[key]
+
+        return events
+
+    @staticmethod
+    def _event(key, rule, snapshot, state, value):
+        if state != FIRING:
+            text = f"{snapshot.name} {rule.name.replace('_', ' ')}"
+            return AlertEvent(key, rule, snapshot.name, state, value, text)
+        try:
+            text = rule.message.format(node=snapshot.name, rule=rule.name, value=value,
+                                       error=snapshot.error or 'Unknown', region=snapshot.region)
+        except (KeyError, ValueError, IndexError):
+            text = f"{snapshot.name} {rule.name}: {value}"
+        return AlertEvent(key, rule, snapshot.name, state, value, text)
+
+    def firing(self):
+        """Keys of every alert currently firing"""
+        return [key for key, state in self.states.items() if state.state == FIRING]
+
+def format_alert_embed(events, extra=None):
+    """
+    Group one cycle's transitions into a single webhook embed
+
+    Args:
+        events: AlertEvent list from AlertEngine.evaluate
+        extra: Additional lines to include
+
+    Returns:
+        dict: Embed payload, or None if there is nothing to send
+    """
+    firing = [e for e in events if e.state == FIRING]
+    resolved = [e for e in events if e.state != FIRING]
+    extra = extra or []
+    if not firing and not resolved and not extra:
+        return None
+
+    lines = [f"{SEVERITY_ICONS.get(e.rule.severity, '🟠')} **{e.text}**" for e in firing]
+    lines += [f"✅ Resolved: {e.text}" for e in resolved]
+    lines += extra
+
+    if any(e.rule.severity == 'critical' for e in firing):
+        color = 0xff0000
+    elif firing or extra:
+        color = 0xff8800
+    else:
+        color = 0x00ff00
+
+    title = "🚨 Alert" if firing or extra else "✅ Resolved"
+    return {"title": title, "description": "\n".join(lines)[:4096], "color": color}
@@ -0,0 +1,394 @@
+#!/usr/bin/env python3
+"""
+Lavalink Monitor Benchmark
+Runs the monitoring pipeline against local fake Lavalink nodes and reports
+how cycle latency, CPU time, memory and event-loop lag grow with the fleet.
+
+    python benchmark.py --sizes 10,100,1000 --latency 20 --jitter 10 --failure-rate 0.02
+    python benchmark.py --json bench.json --baseline previous.json
+
+Everything runs on loopback: each fake node listens on its own 127.x.y.z
+address, in a separate process so the fake fleet's own CPU use doesn't
+count against the monitor.
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import multiprocessing
+import random
+import sys
+import time
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+import psutil
+from aiohttp import web
+
+FAKE_PORT = 12333
+STATS_INTERVAL = 1.0  # seconds between pushed stats frames
+STARTED_AT = time.time()
+
+def node_address(i):
+    """Loopback address of fake node i (127.1.0.1 upwards, skipping .0 and .255)"""
+    return f"127.{1 + i // 64516}.{(i // 254) % 254}.{i % 254 + 1}"
+
+def fake_nodes(count, port=FAKE_PORT):
+    """Node configurations for the fake fleet, in the parser's format"""
+    nodes = []
+    for i in range(count):
+        host = node_address(i)
+        nodes.append({
+            'name': f'Bench-{i}',
+            'host': host,
+            'port': port,
+            'password': f'bench-{i}',
+            'secure': False,
+            'region': ('Germany', 'India', 'USA', 'Singapore')[i % 4],
+            'identifier': f'node-bench-{i}',
+            'url': f'http://{host}:{port}'
+        })
+    return nodes
+
+# ============================================================================
+# FAKE LAVALINK NODES
+# ============================================================================
+def fake_stats(i):
+    """A `/v4/stats` payload that drifts a little on every call"""
+    rng = random.Random(i)
+    players = rng.randint(0, 40)
+    playing = rng.randint(0, players)
+    expected = playing * 3000
+    deficit = int(expected * random.uniform(0, 0.03))
+    nulled = int(expected * random.uniform(0, 0.01))
+    return {
+        'players': players,
+        'playingPlayers': playing,
+        'uptime': int((time.time() - STARTED_AT + 3600 + i) * 1000),
+        'memory': {'free': 2 ** 28, 'used': rng.randint(2 ** 27, 2 ** 30), 'allocated': 2 ** 30, 'reservable': 2 ** 32},
+        'cpu': {'cores': 4, 'systemLoad': min(rng.random() * 0.6 + random.uniform(0, 0.2), 1.0),
+                'lavalinkLoad': rng.random() * 0.3},
+        'frameStats': {'sent': expected - deficit - nulled, 'nulled': nulled, 'deficit': deficit} if playing else None
+    }
+
+def create_fake_app(count, latency, jitter, failure_rate):
+    """aiohttp app answering for every fake node, told apart by the Host header"""
+    index = {node_address(i): i for i in range(count)}
+
+    def lookup(request):
+        i = index.get(request.host.rsplit(':', 1)[0])
+        if i is None or request.headers.get('Authorization') != f'bench-{i}':
+            raise web.HTTPUnauthorized()
+        return i
+
+    async def delay():
+        await asyncio.sleep(max(latency + random.uniform(-jitter, jitter), 0) / 1000)
+
+    async def stats(request):
+        i = lookup(request)
+        await delay()
+        if random.random() < failure_rate:
+            return web.Response(status=503, text='Service Unavailable')
+        return web.json_response(fake_stats(i))
+
+    async def version(request):
+        lookup(request)
+        await delay()
+        return web.Response(text='4.0.8')
+
+    async def websocket(request):
+        i = lookup(request)
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        await ws.send_json({'op': 'ready', 'resumed': False, 'sessionId': f'session-{i}'})
+        try:
+            while not ws.closed:
+                await ws.send_json(dict(op='stats', **fake_stats(i)))
+                await asyncio.sleep(STATS_INTERVAL * random.uniform(0.9, 1.1))
+        except ConnectionError:
+            pass
+        return ws
+
+    async def session(request):
+        lookup(request)
+        return web.json_response({'resuming': True, 'timeout': 60})
+
+    app = web.Application()
+    app.router.add_get('/v4/stats', stats)
+    app.router.add_get('/version', version)
+    app.router.add_get('/v4/websocket', websocket)
+    app.router.add_patch('/v4/sessions/{session_id}', session)
+    return app
+
+def run_fake_fleet(count, port, latency, jitter, failure_rate, ready):
+    """Process entry point: serve `count` fake nodes until terminated"""
+    raise_file_limit()
+
+    async def serve():
+        runner = web.AppRunner(create_fake_app(count, latency, jitter, failure_rate), access_log=None)
+        await runner.setup()
+        for i in range(count):
+            await web.TCPSite(runner, node_address(i), port, backlog=1024).start()
+        ready.set()
+        await asyncio.Event().wait()
+
+    asyncio.run(serve())
+
+def raise_file_limit():
+    """Every node is a socket on both sides, lift the soft fd limit as far as allowed"""
+    if resource is None:
+        return
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if hard == resource.RLIM_INFINITY or soft < hard:
+        try:
+            resource.setrlimit(resource.RLIMIT_NOFILE, (hard if hard != resource.RLIM_INFINITY else 65536, hard))
+        except (ValueError, OSError):
+            pass
+
+# ============================================================================
+# MEASUREMENT
+# ============================================================================
+def percentile(values, q):
+    """Nearest-rank percentile of a list (None when empty)"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(q * len(ordered)) - 1))]
+
+def peak_rss_mb():
+    """Peak resident memory of this process so far"""
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux reports KiB, macOS bytes
+        return peak / 1024 ** 2 if sys.platform == 'darwin' else peak / 1024
+    return psutil.Process().memory_info().rss / 1024 ** 2
+
+class LoopLagProbe:
+    """Measures how late a periodic timer fires, i.e. how long the loop was blocked"""
+
+    def __init__(self, interval=0.01):
+        self.interval = interval
+        self.samples = []
+        self.task = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(self.interval)
+            self.samples.append((loop.time() - start - self.interval) * 1000)
+
+    def start(self):
+        self.samples = []
+        self.task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        self.task.cancel()
+        try:
+            await self.task
+        except asyncio.CancelledError:
+            pass
+        return self.samples
+
+async def run_size(count, args):
+    """
+    Benchmark one fleet size
+
+    Returns:
+        dict: Measurements for this size
+    """
+    from monitor import get_lavalink_stats, get_system_stats
+    from alerts import AlertEngine, format_alert_embed
+    from frame_quality import FrameTracker
+    from stats_stream import StatsStreamManager
+    from utils import get_overall_health
+    from bot import create_embed
+
+    nodes = fake_nodes(count, args.port)
+    alert_engine = AlertEngine()
+    frame_tracker = FrameTracker()
+    streams = None
+    poll = get_lavalink_stats
+
+    if args.websocket:
+        streams = StatsStreamManager()
+        streams.start(nodes, user_id=1)
+        # Wait for the sockets to deliver their first frames
+        deadline = time.monotonic() + 30
+        while time.monotonic() < deadline and sum(s.is_live() for s in streams.streams.values()) < count:
+            await asyncio.sleep(0.2)
+        poll = lambda nodes: streams.collect(nodes, poll=get_lavalink_stats)
+
+    stages = {'fetch': [], 'health': [], 'embed': [], 'alerts': []}
+    cycles = []
+    offline = []
+
+    async def cycle():
+        t0 = time.perf_counter()
+        data = await poll(nodes)
+        t1 = time.perf_counter()
+        frame_tracker.observe(data)
+        system_data = get_system_stats()
+        health = get_overall_health(data, system_data)
+        t2 = time.perf_counter()
+        create_embed(data, system_data, health)
+        t3 = time.perf_counter()
+        format_alert_embed(alert_engine.evaluate(data), [])
+        t4 = time.perf_counter()
+        return data, (t1 - t0, t2 - t1, t3 - t2, t4 - t3, t4 - t0)
+
+    for _ in range(args.warmup):
+        await cycle()
+
+    probe = LoopLagProbe()
+    probe.start()
+    cpu_start = time.process_time()
+
+    for _ in range(args.cycles):
+        data, timings = await cycle()
+        for stage, seconds in zip(stages, timings):
+            stages[stage].append(seconds * 1000)
+        cycles.append(timings[-1] * 1000)
+        offline.append(sum(1 for n in data if not n.online))
+        if args.interval:
+            await asyncio.sleep(args.interval)
+
+    cpu_ms = (time.process_time() - cpu_start) * 1000 / args.cycles
+    lag = await probe.stop()
+
+    if streams is not None:
+        await streams.stop()
+
+    return {
+        'nodes': count,
+        'cycle_ms': {'p50': percentile(cycles, 0.5), 'p95': percentile(cycles, 0.95),
+                     'p99': percentile(cycles, 0.99), 'max': max(cycles)},
+        'stage_ms': {stage: percentile(values, 0.5) for stage, values in stages.items()},
+        'cpu_ms_per_cycle': cpu_ms,
+        'peak_rss_mb': peak_rss_mb(),
+        'loop_lag_ms': {'p99': percentile(lag, 0.99), 'max': max(lag) if lag else None},
+        'offline_per_cycle': sum(offline) / len(offline)
+    }
+
+# ============================================================================
+# REPORTING
+# ============================================================================
+def print_report(results):
+    print()
+    print(f"{'nodes':>6} | {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8} | {'cpu/cycle':>9} | {'peak rss':>8} | "
+          f"{'lag p99':>8} {'lag max':>8} | {'offline':>7}")
+    print('-' * 104)
+    for r in results:
+        c = r['cycle_ms']
+        print(f"{r['nodes']:>6} | {c['p50']:>6.1f}ms {c['p95']:>6.1f}ms {c['p99']:>6.1f}ms {c['max']:>6.1f}ms | "
+              f"{r['cpu_ms_per_cycle']:>7.1f}ms | {r['peak_rss_mb']:>6.1f}MB | "
+              f"{r['loop_lag_ms']['p99'] or 0:>6.1f}ms {r['loop_lag_ms']['max'] or 0:>6.1f}ms | {r['offline_per_cycle']:>7.1f}")
+
+    print()
+    print(f"{'nodes':>6} | " + ' '.join(f"{stage + ' p50':>12}" for stage in results[0]['stage_ms']))
+    for r in results:
+        print(f"{r['nodes']:>6} | " + ' '.join(f"{value:>10.2f}ms" for value in r['stage_ms'].values()))
+
+def compare(results, baseline, tolerance):
+    """
+    Check results against a previous run
+
+    Returns:
+        list: Regression descriptions (empty if none)
+    """
+    previous = {r['nodes']: r for r in baseline}
+    regressions = []
+    for r in results:
+        before = previous.get(r['nodes'])
+        if before is None:
+            continue
+        for label, now, then in (
+            ('cycle p95', r['cycle_ms']['p95'], before['cycle_ms']['p95']),
+            ('cpu/cycle', r['cpu_ms_per_cycle'], before['cpu_ms_per_cycle']),
+            ('peak rss', r['peak_rss_mb'], before['peak_rss_mb']),
+        ):
+            if then and now > then * (1 + tolerance):
+                regressions.append(f"{r['nodes']} nodes: {label} {then:.1f} -> {now:.1f} (+{(now / then - 1) * 100:.0f}%)")
+    return regressions
+
+# ============================================================================
+# MAIN
+# ============================================================================
+async def run(args):
+    from monitor import host_sampler
+    from http_client import close_session
+
+    host_sampler.start()
+    results = []
+    try:
+        for count in args.sizes:
+            print(f"⏱️ Benchmarking {count} nodes ({args.cycles} cycles)...")
+            results.append(await run_size(count, args))
+    finally:
+        await close_session()
+    return results
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Benchmark the Lavalink monitor against local fake nodes')
+    parser.add_argument('--sizes', default='10,50,100,250,500,1000',
+                        type=lambda s: [int(n) for n in s.split(',')], help='Fleet sizes to run (comma separated)')
+    parser.add_argument('--cycles', type=int, default=20, help='Measured cycles per size')
+    parser.add_argument('--warmup', type=int, default=2, help='Unmeasured cycles per size')
+    parser.add_argument('--interval', type=float, default=0, help='Seconds to sleep between cycles')
+    parser.add_argument('--latency', type=float, default=20, help='Fake node response latency (ms)')
+    parser.add_argument('--jitter', type=float, default=10, help='Latency jitter, +/- ms')
+    parser.add_argument('--failure-rate', type=float, default=0.0, help='Fraction of stats requests answered with 503')
+    parser.add_argument('--websocket', action='store_true', help='Collect pushed websocket stats, HTTP as fallback')
+    parser.add_argument('--port', type=int, default=FAKE_PORT, help='Port every fake node listens on')
+    parser.add_argument('--json', help='Write results to this file')
+    parser.add_argument('--baseline', help='Previous --json output to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='Allowed slowdown before failing (0.25 = 25%%)')
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    raise_file_limit()
+
+    ready = multiprocessing.Event()
+    fleet = multiprocessing.Process(
+        target=run_fake_fleet,
+        args=(max(args.sizes), args.port, args.latency, args.jitter, args.failure_rate, ready),
+        daemon=True
+    )
+    fleet.start()
+    if not ready.wait(60):
+        print("❌ Fake nodes did not start")
+        fleet.terminate()
+        return 1
+    print(f"✅ {max(args.sizes)} fake nodes listening on port {args.port}")
+
+    try:
+        results = asyncio.run(run(args))
+    finally:
+        fleet.terminate()
+        fleet.join()
+
+    print_report(results)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\n💾 Results written to {args.json}")
+
+    if args.baseline:
+        with open(args.baseline, 'r') as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        if regressions:
+            print("\n❌ Regressions against baseline:")
+            for line in regressions:
+                print(f"  - {line}")
+            return 1
+        print("\n✅ No regressions against baseline")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
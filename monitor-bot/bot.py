@@ -2,63 +2,91 @@ import asyncio
 import discord
 from discord.ext import commands, tasks
 import json
-import os
 from datetime import datetime
-from config import BOT_TOKEN, CHANNEL_ID
+from config import BOT_TOKEN, CHANNEL_ID, WS_STATS_ENABLED, METRICS_ENABLED, PING_DISPLAY_STEP, PERCENT_DISPLAY_STEP, POLL_TICK, CONFIG_WATCH_ENABLED
 from lavalink_parser import parse_lavalink_config
-from monitor import get_lavalink_stats, get_system_stats
-from utils import get_health_emoji, format_uptime
+from monitor import get_lavalink_stats, get_system_stats, host_sampler
+from http_client import close_session
+from stats_stream import StatsStreamManager
+from history import HistoryStore
+from metrics_server import MetricsServer
+from node_selector import node_selector
+from frame_quality import frame_tracker
+from latency import latency_tracker
+from config_watcher import ConfigWatcher
+from state_store import StateStore, save_snapshots, restore_snapshots
+from instrumentation import instrumentation, format_debug_report
+from dashboard import EmbedEditScheduler, DashboardMessage
+from scheduler import AdaptivePollScheduler
+from endpoint_groups import EndpointGrouper
+from utils import get_health_emoji, get_overall_health, get_status_color, format_uptime, format_ping, format_frames, quantize
+
+class MonitorBot(commands.Bot):
+    async def close(self):
+        """Close stats sockets and the pooled HTTP client before shutting down"""
+        await config_watcher.stop()
+        await stats_stream.stop()
+        await metrics.stop()
+        await instrumentation.stop()
+        await close_session()
+        await asyncio.get_running_loop().run_in_executor(None, state.close)
+        await super().close()
 
 # Bot setup
 intents = discord.Intents.default()
 intents.message_content = True
-bot = commands.Bot(command_prefix='!', intents=intents)
+bot = MonitorBot(command_prefix='!', intents=intents)
 
 # Global variables
-message_id_file = "message_id.txt"
+state = StateStore()
+dashboard_message = DashboardMessage(None, on_save=lambda message_id: state.set('message_id', message_id))
 lavalink_nodes = []
+stats_stream = StatsStreamManager()
+poll_scheduler = AdaptivePollScheduler()
+poll_nodes = poll_scheduler.wrap(get_lavalink_stats)
+endpoint_grouper = EndpointGrouper(on_regroup=stats_stream.exclude)
+collect_nodes = endpoint_grouper.wrap(lambda nodes: stats_stream.collect(nodes, poll=poll_nodes), verify=get_lavalink_stats)
+config_watcher = ConfigWatcher(lambda path: parse_lavalink_config(path, verbose=False))
+history = HistoryStore()
+metrics = MetricsServer()
+node_selector.attach(metrics.app)
 start_time = datetime.now()
 
-def load_message_id():
-    """Load the last message ID from file"""
-    try:
-        with open(message_id_file, 'r') as f:
-            return int(f.read().strip())
-    except (FileNotFoundError, ValueError):
-        return None
-
-def save_message_id(message_id):
-    """Save message ID to file"""
-    with open(message_id_file, 'w') as f:
-        f.write(str(message_id))
-
-def create_embed(lavalink_data, system_data):
-    """Create the monitoring embed"""
+def create_embed(lavalink_data, system_data, health=None):
+    """Create the monitoring embed (health is computed here unless the caller already did)"""
+    if health is None:
+        health = get_overall_health(lavalink_data, system_data)
+    
     embed = discord.Embed(
         title="🎧 Lavalink Monitor Dashboard",
-        color=0x00ff00,
+        color=get_status_color(health),
         timestamp=datetime.now()
     )
     
     # Add Lavalink nodes
     for i, node_data in enumerate(lavalink_data):
-        node_name = node_data.get('name', f'Node {i+1}')
-        region = node_data.get('region', '🌍 Unknown')
+        node_name = node_data.name or f'Node {i+1}'
+        region = node_data.region or '🌍 Unknown'
         
-        if node_data.get('online', False):
-            stats = node_data['stats']
-            cpu_emoji = get_health_emoji(stats['cpu'] * 100, 'cpu')
-            ram_emoji = get_health_emoji(stats['memory']['used'] / stats['memory']['allocated'] * 100, 'ram')
-            ping_emoji = get_health_emoji(node_data.get('ping', 999), 'ping')
-            players_emoji = get_health_emoji(stats['players'], 'players')
+        if node_data.online:
+            stats = node_data.stats
+            cpu_emoji = get_health_emoji(stats.cpu_percent, 'cpu')
+            ram_emoji = get_health_emoji(stats.ram_percent, 'ram')
+            # Judge ping by its windowed p95 so one slow answer doesn't turn it red
+            ping = node_data.steady_ping
+            ping_emoji = get_health_emoji(ping if ping is not None else 999, 'ping')
+            players_emoji = get_health_emoji(stats.players, 'players')
+            frames = node_data.frames
+            frames_emoji = get_health_emoji(frames.avg_loss_percent if frames else 0, 'frames')
             
             node_value = f"""
-{cpu_emoji} **CPU:** {stats['cpu'] * 100:.1f}%
-{ram_emoji} **RAM:** {stats['memory']['used'] / stats['memory']['allocated'] * 100:.1f}%
-{ping_emoji} **Ping:** {node_data.get('ping', 'N/A')}ms
-{players_emoji} **Players:** {stats['players']} / {stats['playingPlayers']}
+{cpu_emoji} **CPU:** {quantize(stats.cpu_percent, PERCENT_DISPLAY_STEP):.0f}%
+{ram_emoji} **RAM:** {quantize(stats.ram_percent, PERCENT_DISPLAY_STEP):.0f}%
+{ping_emoji} **Ping:** {format_ping(node_data, PING_DISPLAY_STEP)}
+{players_emoji} **Players:** {stats.players} / {stats.playing_players}
+{frames_emoji} **Frames:** {format_frames(frames)}
 🌍 **Region:** {region}
-⏰ **Uptime:** {format_uptime(stats.get('uptime', 0))}
+⏰ **Uptime:** {format_uptime(stats.uptime_seconds, coarse=True)}
 """
         else:
             node_value = f"""
@@ -81,11 +109,11 @@ def create_embed(lavalink_data, system_data):
         
         system_value = f"""
 **CPU:** {system_data['cpu_info']}
-{cpu_emoji} **CPU Usage:** {system_data['cpu_percent']:.1f}%
-{ram_emoji} **RAM:** {system_data['memory_percent']:.1f}%
+{cpu_emoji} **CPU Usage:** {quantize(system_data['cpu_percent'], PERCENT_DISPLAY_STEP):.0f}%
+{ram_emoji} **RAM:** {quantize(system_data['memory_percent'], PERCENT_DISPLAY_STEP):.0f}%
 {disk_emoji} **Disk:** {system_data['disk_used_gb']:.1f}GB / {system_data['disk_total_gb']:.1f}GB
 **OS:** {system_data['os_info']}
-⌚ **Bot Uptime:** {format_uptime((datetime.now() - start_time).total_seconds())}
+⌚ **Bot Uptime:** {format_uptime((datetime.now() - start_time).total_seconds(), coarse=True)}
 """
         
         embed.add_field(
@@ -100,47 +128,99 @@ def create_embed(lavalink_data, system_data):
 @bot.event
 async def on_ready():
     print(f'🎧 Lavalink Monitor Bot logged in as {bot.user}')
+    instrumentation.start()
     print(f'📊 Monitoring {len(lavalink_nodes)} Lavalink nodes')
     
+    # Subscribe to pushed stats (HTTP polling covers nodes whose socket is down)
+    if WS_STATS_ENABLED:
+        stats_stream.start(lavalink_nodes, user_id=bot.user.id)
+    
+    if METRICS_ENABLED:
+        await metrics.start()
+    
+    # Pick up lavalink.ini edits without a restart
+    if CONFIG_WATCH_ENABLED:
+        config_watcher.start(lavalink_nodes, reload_nodes)
+    
     # Start the monitoring loop
-    monitor_loop.start()
+    if not monitor_loop.is_running():
+        # Show the last known results right away instead of waiting for the first poll
+        restored = restore_snapshots(state, lavalink_nodes)
+        if restored:
+            node_selector.update(restored)
+            await dashboard.submit(create_embed(restored, get_system_stats()))
+        monitor_loop.start()
+
+async def publish_embed(embed):
+    """
+    Edit the dashboard message, or send a new one if it doesn't exist
+    
+    Returns:
+        bool: True if the embed was posted
+    """
+    channel = bot.get_channel(CHANNEL_ID)
+    if not channel:
+        print(f"❌ Channel {CHANNEL_ID} not found!")
+        return False
+    
+    try:
+        if await dashboard_message.publish(channel, embed):
+            print("🆕 Sent new embed")
+        else:
+            print(f"✅ Updated embed at {datetime.now().strftime('%H:%M:%S')}")
+    except discord.HTTPException as e:
+        print(f"❌ Failed to edit message: {e}")
+        return False
+    
+    return True
 
-@tasks.loop(seconds=10)
+dashboard = EmbedEditScheduler(publish_embed)
+
+async def reload_nodes(nodes, diff):
+    """Apply a lavalink.ini change: only added, removed or edited nodes lose their state"""
+    global lavalink_nodes
+    
+    for node in diff.removed:
+        poll_scheduler.forget(node)
+        latency_tracker.forget(node['name'])
+        metrics.forget(node['name'])
+        await stats_stream.discard(node['name'])
+    if diff.changed:
+        # Same names, new hosts: aliases must be re-checked
+        endpoint_grouper.invalidate()
+    
+    lavalink_nodes = nodes
+    if WS_STATS_ENABLED:
+        stats_stream.start(lavalink_nodes, user_id=bot.user.id)
+
+def persist():
+    """Write pending history and state in one trip off the event loop"""
+    history.flush()
+    state.flush()
+
+@tasks.loop(seconds=POLL_TICK)
 async def monitor_loop():
-    """Main monitoring loop that updates the embed every 10 seconds"""
+    """Main monitoring loop: polls due nodes and refreshes the embed"""
     try:
-        channel = bot.get_channel(CHANNEL_ID)
-        if not channel:
-            print(f"❌ Channel {CHANNEL_ID} not found!")
-            return
-        
-        # Fetch data
-        lavalink_data = await get_lavalink_stats(lavalink_nodes)
+        # Fetch data (one fetch per backend: pushed stats, else HTTP for nodes that are due)
+        with instrumentation.stage('fetch'):
+            lavalink_data = await collect_nodes(lavalink_nodes)
+        frame_tracker.observe(lavalink_data)
         system_data = get_system_stats()
         
-        # Create embed
-        embed = create_embed(lavalink_data, system_data)
-        
-        # Try to edit existing message or send new one
-        message_id = load_message_id()
+        # Keep history and state (disk writes happen off the event loop)
+        history.record(lavalink_data)
+        metrics.update(lavalink_data, system_data)
+        node_selector.update(lavalink_data)
+        save_snapshots(state, lavalink_data)
+        await asyncio.get_running_loop().run_in_executor(None, persist)
         
-        if message_id:
-            try:
-                message = await channel.fetch_message(message_id)
-                await message.edit(embed=embed)
-                print(f"✅ Updated embed at {datetime.now().strftime('%H:%M:%S')}")
-            except discord.NotFound:
-                # Message was deleted, send new one
-                new_message = await channel.send(embed=embed)
-                save_message_id(new_message.id)
-                print(f"🆕 Sent new embed (old message not found)")
-            except discord.HTTPException as e:
-                print(f"❌ Failed to edit message: {e}")
-        else:
-            # No existing message, send new one
-            new_message = await channel.send(embed=embed)
-            save_message_id(new_message.id)
-            print(f"🆕 Sent initial embed")
+        # Create embed (only edited when something visible changed)
+        with instrumentation.stage('health'):
+            health = get_overall_health(lavalink_data, system_data)
+        with instrumentation.stage('render'):
+            embed = create_embed(lavalink_data, system_data, health)
+        await dashboard.submit(embed)
             
     except Exception as e:
         print(f"❌ Error in monitor loop: {e}")
@@ -154,14 +234,32 @@ async def before_monitor_loop():
 async def restart_monitor(ctx):
     """Restart the monitoring embed (creates new message)"""
     if ctx.author.guild_permissions.administrator:
-        # Delete the old message ID file
-        if os.path.exists(message_id_file):
-            os.remove(message_id_file)
-        
+        # Forget the old message
+        dashboard_message.forget()
+        dashboard.reset()
         await ctx.send("🔄 Monitor restarted! New embed will be created.")
     else:
         await ctx.send("❌ You need administrator permissions to restart the monitor.")
 
+@bot.command(name='debug')
+async def debug_monitor(ctx, profiler: str = None):
+    """Show loop lag, stage timings and Discord API counters (`!debug on|off` toggles the profiler)"""
+    if not ctx.author.guild_permissions.administrator:
+        await ctx.send("❌ You need administrator permissions to use debug.")
+        return
+    
+    if profiler == 'on':
+        instrumentation.profiler.start()
+    elif profiler == 'off':
+        instrumentation.profiler.stop()
+    
+    profile = instrumentation.profiler.report() if instrumentation.profiler.started_at is not None else None
+    embed = discord.Embed(title="🩺 Monitor Debug", color=0x00aaff, timestamp=datetime.now())
+    for name, value in format_debug_report(instrumentation.snapshot(), profile).items():
+        embed.add_field(name=name, value=value[:1024], inline=False)
+    embed.set_footer(text=f"Profiler {'running' if instrumentation.profiler.running else 'off'}")
+    await ctx.send(embed=embed)
+
 if __name__ == "__main__":
     # Load Lavalink nodes from config
     lavalink_nodes = parse_lavalink_config()
@@ -170,6 +268,12 @@ if __name__ == "__main__":
         print("❌ No Lavalink nodes found in lavalink.ini!")
         exit(1)
     
+    # Warm up host metrics off the event loop before the first embed
+    host_sampler.start()
+    history.load()
+    # Older versions kept the message ID in message_id.txt
+    dashboard_message.message_id = state.get('message_id') or DashboardMessage("message_id.txt").load_id()
+    
     print(f"🚀 Starting Lavalink Monitor Bot...")
     print(f"📊 Loaded {len(lavalink_nodes)} Lavalink nodes")
     
@@ -10,6 +10,8 @@ CHANNEL_ID = int(os.getenv('CHANNEL_ID', '1234567890123456789'))  # Replace with
 
 # Lavalink Configuration
 LAVALINK_CONFIG_FILE = 'lavalink.ini'
+CONFIG_WATCH_ENABLED = os.getenv('CONFIG_WATCH_ENABLED', 'true').lower() == 'true'  # hot-reload node changes
+CONFIG_WATCH_INTERVAL = 5  # seconds between checks of the config file's mtime
 
 # Health Thresholds
 HEALTH_THRESHOLDS = {
@@ -32,13 +34,140 @@ HEALTH_THRESHOLDS = {
     'players': {
         'good': 5,       # < 5 = good
         'moderate': 15   # 5-15 = moderate, >15 = critical
+    },
+    'frames': {
+        'good': 1,       # < 1% of audio frames lost = good
+        'moderate': 5    # 1-5% = moderate (audible stutter), >5% = critical
     }
 }
 
+HEALTH_NUMPY_MIN_NODES = 16  # fleets this large are scored with numpy (when installed), smaller ones without importing it
+
 # Monitoring Settings
 UPDATE_INTERVAL = 10  # seconds
 TIMEOUT = 5  # seconds for HTTP requests
 
+# Adaptive Polling (per-node intervals for HTTP polls)
+POLL_TICK = 5                     # seconds between scheduler ticks
+POLL_MIN_INTERVAL = 5             # changing, failing or recovering nodes
+POLL_BASE_INTERVAL = UPDATE_INTERVAL
+POLL_MAX_INTERVAL = 60            # stable nodes back off up to this
+POLL_OFFLINE_MAX_INTERVAL = 300   # nodes that stay offline back off up to this
+POLL_JITTER = 0.2                 # +/- fraction applied to each interval
+POLL_SPREAD = 1.0                 # seconds over which due polls are spread
+HOST_SAMPLE_INTERVAL = 5  # seconds between background host metric samples
+
+# HTTP Connection Pool Settings
+HTTP_POOL_LIMIT = int(os.getenv('HTTP_POOL_LIMIT', '100'))                  # max open connections overall
+HTTP_POOL_LIMIT_PER_HOST = int(os.getenv('HTTP_POOL_LIMIT_PER_HOST', '4'))  # max open connections per host
+HTTP_KEEPALIVE_TIMEOUT = 60  # seconds to keep idle connections alive
+DNS_CACHE_TTL = 300          # seconds to cache DNS lookups
+
+# Public IP Detection
+IP_PROVIDERS = ['https://api.ipify.org', 'https://ifconfig.me/ip', 'https://icanhazip.com']
+IP_CACHE_TTL = int(os.getenv('IP_CACHE_TTL', '300'))  # seconds to reuse a detected IP
+IP_LOOKUP_TIMEOUT = 5  # seconds to wait for the first provider answer
+
+# Fetch Engine Settings
+FETCH_CONCURRENCY = int(os.getenv('FETCH_CONCURRENCY', '50'))  # max node fetches in flight
+FETCH_CONCURRENCY_PER_HOST = HTTP_POOL_LIMIT_PER_HOST          # max fetches in flight per host
+FETCH_CONNECT_TIMEOUT = 3    # seconds to establish a connection (incl. TLS)
+FETCH_READ_TIMEOUT = TIMEOUT # seconds between reads once connected
+FETCH_CYCLE_DEADLINE = 8     # seconds before stragglers are cancelled
+
+# Latency Tracking (per-node percentiles over a sliding window)
+LATENCY_WINDOW = 300            # seconds covered by the percentiles
+LATENCY_SLICES = 5              # window granularity (oldest slice expires as a whole)
+LATENCY_RELATIVE_ERROR = 0.02   # sketch accuracy
+LATENCY_MIN_MS = 0.1            # sketch range
+LATENCY_MAX_MS = 60000
+LATENCY_MIN_SAMPLES = 20        # samples before p95 is trusted over the median
+
+# Frame Quality Tracking (frameStats loss over a rolling window)
+FRAME_WINDOW = 900            # seconds of frame stats kept per node
+FRAME_TREND_MIN_SAMPLES = 5   # stats reports before a trend is computed
+
+# Instrumentation (/debug and the metrics endpoint)
+LOOP_LAG_INTERVAL = 0.5       # seconds between event loop lag samples
+PROFILER_INTERVAL = 0.005     # seconds between profiler stack samples
+PROFILER_MAX_SECONDS = 300    # the profiler switches itself off after this
+
+# Endpoint Grouping Settings
+GROUP_VERIFY_INTERVAL = 600  # seconds between passes that re-check shared backends
+GROUP_CONFIRM_DELAY = 60     # seconds until the second pass that must repeat a new match before grouping
+GROUP_START_TOLERANCE = 5    # seconds two backends' start times may differ and still match
+GROUP_MEMORY_TOLERANCE = 8 * 1024 * 1024  # bytes used/free memory may differ between two reads of one backend
+
+# Websocket Stats Settings (Lavalink v4 pushes a stats frame every 60 seconds)
+WS_STATS_ENABLED = os.getenv('WS_STATS_ENABLED', 'true').lower() == 'true'
+WS_CLIENT_NAME = 'LavalinkMonitor/1.0'
+WS_USER_ID = os.getenv('WS_USER_ID', '0')  # replaced by the bot's user ID once logged in (sent as is in headless mode)
+WS_RECONNECT_MIN = 1         # seconds before the first reconnect attempt
+WS_RECONNECT_MAX = 60        # max seconds between reconnect attempts
+WS_RESUME_TIMEOUT = 60       # seconds the node keeps our session for resuming
+WS_STATS_STALE_AFTER = 90    # seconds without a stats frame before falling back to HTTP
+WS_PING_INTERVAL = 15        # seconds between HTTP round-trips that keep a socket node's ping current
+
+# Dashboard Rendering
+DASHBOARD_MIN_EDIT_INTERVAL = int(os.getenv('DASHBOARD_MIN_EDIT_INTERVAL', '10'))  # seconds between embed edits
+PING_DISPLAY_STEP = 5  # ms, ping is rounded to this on the dashboard
+PERCENT_DISPLAY_STEP = 1  # CPU/RAM/disk percentages are rounded to this on the dashboard
+MEMORY_DISPLAY_STEP = 16 * 1024 * 1024  # bytes, node memory is rounded to this on the dashboard
+
+# Prometheus Metrics Endpoint
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'true').lower() == 'true'
+METRICS_HOST = os.getenv('METRICS_HOST', '0.0.0.0')
+METRICS_PORT = int(os.getenv('METRICS_PORT', '9464'))
+PING_BUCKETS_MS = (25, 50, 100, 200, 400, 800, 1600, 5000)
+
+# Node Selection API (served on the metrics port: /nodes/best?region=X)
+SELECTOR_PING_WEIGHT = 0.1  # penalty per ms of ping (100ms weighs like 10 playing players)
+
+# History Settings
+HISTORY_FILE = 'history.log'
+HISTORY_RAW_POINTS = 720  # raw samples kept per node (2h at the 10s base interval, longer for backed-off nodes)
+HISTORY_TIERS = [
+    # (name, bucket seconds, buckets kept)
+    ('1m', 60, 1440),     # 1 day of minutes
+    ('1h', 3600, 720),    # 30 days of hours
+    ('1d', 86400, 365)    # 1 year of days
+]
+HISTORY_MAX_LOG_BYTES = 32 * 1024 * 1024  # compact the log past this size
+
+# State Store (warm restarts: peaks, IP tracking, last node results, dashboards)
+STATE_DB_FILE = 'monitor_state.db'
+IP_HISTORY_KEEP = 100  # IP changes kept across restarts
+RESTORE_MAX_AGE = 2 * POLL_MAX_INTERVAL  # seconds saved node results stay good enough to show after a restart
+
+# Alert Rules (override by putting a JSON list in ALERT_RULES_FILE)
+ALERT_RULES_FILE = 'alert_rules.json'
+DEFAULT_ALERT_RULES = [
+    # field: NodeSnapshot attribute (dotted for stats), for: seconds the condition must hold,
+    # clear: threshold the value must cross back over before the alert resolves
+    {'name': 'node_offline', 'field': 'online', 'op': '==', 'value': False, 'for': 0,
+     'severity': 'critical', 'message': '{node} offline: {error}'},
+    {'name': 'high_ping', 'field': 'steady_ping', 'op': '>', 'value': 200, 'clear': 150, 'for': 30,
+     'severity': 'warning', 'message': '{node} high ping: p95 {value:.0f}ms'},
+    {'name': 'high_cpu', 'field': 'stats.cpu_percent', 'op': '>', 'value': 90, 'clear': 75, 'for': 60,
+     'severity': 'warning', 'message': '{node} CPU at {value:.1f}%'},
+    {'name': 'high_ram', 'field': 'stats.ram_percent', 'op': '>', 'value': 90, 'clear': 80, 'for': 60,
+     'severity': 'warning', 'message': '{node} RAM at {value:.1f}%'},
+    {'name': 'frame_deficit', 'field': 'frames.avg_deficit_percent', 'op': '>', 'value': 2, 'clear': 1, 'for': 60,
+     'severity': 'warning', 'message': '{node} dropping audio frames: {value:.1f}% deficit'},
+    {'name': 'frame_deficit_rising', 'field': 'frames.deficit_trend', 'op': '>', 'value': 0.5, 'clear': 0.1,
+     'for': 120, 'severity': 'warning', 'message': '{node} frame deficit rising {value:.2f} pts/min'},
+]
+
+# Webhook Delivery
+WEBHOOK_QUEUE_LIMIT = 100                   # queued alert embeds per webhook before spilling to disk
+WEBHOOK_SPILL_FILE = 'webhook_spill.jsonl'
+WEBHOOK_MAX_RETRIES = 5                     # retries for 5xx and network errors
+WEBHOOK_BACKOFF_MIN = 1                     # seconds before the first retry
+WEBHOOK_BACKOFF_MAX = 60                    # max seconds between retries
+
+# Headless Mode (headless.py: polling, alerts and metrics without a Discord login)
+HEADLESS_WEBHOOK_URLS = [url.strip() for url in os.getenv('HEADLESS_WEBHOOK_URLS', '').split(',') if url.strip()]
+
 # Emoji Configuration
 EMOJIS = {
     'good': '🟢',
@@ -0,0 +1,133 @@
+import asyncio
+import os
+from config import LAVALINK_CONFIG_FILE, CONFIG_WATCH_INTERVAL
+
+class NodeDiff:
+    """
+    Node changes between two parses of the config
+
+    A node whose settings changed shows up in both `removed` (old entry)
+    and `added` (new entry), so its pollers and socket are rebuilt.
+    """
+
+    __slots__ = ('added', 'removed', 'changed', 'unchanged')
+
+    def __init__(self, added, removed, changed, unchanged):
+        self.added = added
+        self.removed = removed
+        self.changed = changed      # names of nodes in both lists with new settings
+        self.unchanged = unchanged  # names kept as they were
+
+    def __bool__(self):
+        return bool(self.added or self.removed)
+
+    def summary(self):
+        new = len(self.added) - len(self.changed)
+        gone = len(self.removed) - len(self.changed)
+        return f"{new} added, {gone} removed, {len(self.changed)} changed, {len(self.unchanged)} unchanged"
+
+def diff_nodes(old_nodes, new_nodes):
+    """
+    Compare two node lists by name
+
+    Args:
+        old_nodes: Node configurations in use
+        new_nodes: Node configurations just parsed
+
+    Returns:
+        NodeDiff: What to start and stop
+    """
+    old = {node['name']: node for node in old_nodes}
+    new = {node['name']: node for node in new_nodes}
+
+    changed = [name for name in new if name in old and new[name] != old[name]]
+    unchanged = [name for name in new if name in old and new[name] == old[name]]
+    added = [node for name, node in new.items() if name not in old or name in changed]
+    removed = [node for name, node in old.items() if name not in new or name in changed]
+    return NodeDiff(added, removed, changed, unchanged)
+
+class ConfigWatcher:
+    """
+    Re-parses the node config when the file changes on disk
+
+    The file is polled with os.stat (mtime, size and inode, so editors that
+    save through a rename are caught too) and only parsed when that
+    signature moves. Each parse is diffed against the nodes in use and the
+    callback only hears about the nodes that were added or removed.
+    """
+
+    def __init__(self, parse, path=LAVALINK_CONFIG_FILE, interval=CONFIG_WATCH_INTERVAL):
+        self.parse = parse
+        self.path = path
+        self.interval = interval
+        self.nodes = []
+        self.signature = None
+        self.task = None
+
+    def _stat(self):
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+    def start(self, nodes, on_change):
+        """
+        Start watching (call from the event loop)
+
+        Args:
+            nodes: Node configurations currently in use
+            on_change: Coroutine called with (nodes, NodeDiff) after each change
+        """
+        if self.task is None or self.task.done():
+            self.nodes = list(nodes)
+            self.signature = self._stat()
+            self.task = asyncio.create_task(self.run(on_change))
+
+    async def stop(self):
+        if self.task and not self.task.done():
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+        self.task = None
+
+    async def check(self):
+        """
+        Parse the file if it changed since the last check
+
+        Returns:
+            tuple: (nodes, NodeDiff), or None if nothing changed
+        """
+        signature = self._stat()
+        if signature is None or signature == self.signature:
+            return None
+        self.signature = signature
+
+        nodes = await asyncio.get_running_loop().run_in_executor(None, self.parse, self.path)
+        if not nodes:
+            # Half-written or broken file: keep monitoring what we have
+            print(f"⚠️ {self.path} changed but has no valid nodes, keeping {len(self.nodes)} nodes")
+            return None
+
+        diff = diff_nodes(self.nodes, nodes)
+        reordered = [node['name'] for node in nodes] != [node['name'] for node in self.nodes]
+        self.nodes = nodes
+        if not diff and not reordered:
+            return None
+        return nodes, diff
+
+    async def run(self, on_change):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                change = await self.check()
+                if change:
+                    nodes, diff = change
+                    print(f"🔄 Reloaded {self.path}: {diff.summary()}")
+                    await on_change(nodes, diff)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"❌ Error reloading {self.path}: {e}")
@@ -0,0 +1,188 @@
+import asyncio
+import hashlib
+import json
+import os
+import time
+import discord
+from config import DASHBOARD_MIN_EDIT_INTERVAL
+from utils import write_text_atomic
+from instrumentation import instrumentation
+
+def embed_fingerprint(embed):
+    """
+    Hash the visible content of an embed
+
+    The timestamp is left out so it doesn't make every render look new.
+
+    Args:
+        embed: discord.Embed to fingerprint
+
+    Returns:
+        str: Content hash
+    """
+    data = embed.to_dict()
+    data.pop('timestamp', None)
+    return hashlib.sha1(json.dumps(data, sort_keys=True).encode('utf-8')).hexdigest()
+
+class EmbedEditScheduler:
+    """
+    Skips no-op dashboard edits and coalesces bursts into a minimum edit interval
+
+    Decisions and publishes are serialized, so a deferred edit and a new
+    submit never post at the same time (which would send two messages when
+    the dashboard doesn't exist yet).
+    """
+
+    def __init__(self, publish, min_interval=DASHBOARD_MIN_EDIT_INTERVAL):
+        """
+        Args:
+            publish: Coroutine function that posts an embed and returns True on success
+            min_interval: Minimum seconds between two edits
+        """
+        self.publish = publish
+        self.min_interval = min_interval
+        self.fingerprint = None
+        self.last_edit = 0
+        self.pending = None
+        self._flush_task = None
+        self._publish_lock = None
+
+    def _lock(self):
+        # Created on first use so it binds to the running loop
+        if self._publish_lock is None:
+            self._publish_lock = asyncio.Lock()
+        return self._publish_lock
+
+    def reset(self):
+        """Forget the last published content so the next submit always edits"""
+        self.fingerprint = None
+        self.pending = None
+
+    async def submit(self, embed):
+        """
+        Offer a freshly rendered embed
+
+        Args:
+            embed: discord.Embed to show
+
+        Returns:
+            bool: True if the dashboard was edited now
+        """
+        fingerprint = embed_fingerprint(embed)
+
+        async with self._lock():
+            if fingerprint == self.fingerprint:
+                # Nothing visible changed (and any deferred edit is now moot)
+                self.pending = None
+                return False
+
+            wait = self.last_edit + self.min_interval - time.monotonic()
+            if wait > 0:
+                # Too soon: keep only the latest content and edit once the interval is up
+                self.pending = (embed, fingerprint)
+                if self._flush_task is None or self._flush_task.done():
+                    self._flush_task = asyncio.create_task(self._flush_later(wait))
+                return False
+
+            self.pending = None
+            return await self._publish(embed, fingerprint)
+
+    async def _publish(self, embed, fingerprint):
+        if await self.publish(embed):
+            self.fingerprint = fingerprint
+            self.last_edit = time.monotonic()
+            return True
+        return False
+
+    async def _flush_later(self, wait):
+        await asyncio.sleep(wait)
+        async with self._lock():
+            if self.pending is None:
+                return
+
+            embed, fingerprint = self.pending
+            self.pending = None
+            if fingerprint != self.fingerprint:
+                try:
+                    await self._publish(embed, fingerprint)
+                except Exception as e:
+                    print(f"❌ Deferred dashboard edit failed: {e}")
+
+class DashboardMessage:
+    """
+    In-memory handle to the dashboard message
+
+    The message ID file is read once; edits go through a partial message
+    built from the ID, so no fetch is needed. The handle is only re-resolved
+    when Discord reports the message as gone.
+    """
+
+    def __init__(self, message_id_file="message_id.txt", message_id=None, on_save=None):
+        """
+        Args:
+            message_id_file: File the message ID is kept in (None to keep it elsewhere)
+            message_id: Known message ID when there is no file
+            on_save: Callback receiving the new message ID whenever it changes (None when forgotten)
+        """
+        self.message_id_file = message_id_file
+        self.message_id = message_id
+        self.on_save = on_save
+        self.message = None
+        self._loaded = message_id_file is None
+
+    def load_id(self):
+        """Read the saved message ID (only touches the disk the first time)"""
+        if not self._loaded:
+            self._loaded = True
+            try:
+                with open(self.message_id_file, 'r') as f:
+                    self.message_id = int(f.read().strip())
+            except (FileNotFoundError, ValueError):
+                self.message_id = None
+        return self.message_id
+
+    def save_id(self, message_id):
+        self.message_id = message_id
+        self._loaded = True
+        if self.message_id_file:
+            write_text_atomic(self.message_id_file, str(message_id))
+        if self.on_save:
+            self.on_save(message_id)
+
+    def forget(self):
+        """Drop the handle so the next publish sends a new message"""
+        self.message = None
+        self.message_id = None
+        self._loaded = True
+        if self.message_id_file and os.path.exists(self.message_id_file):
+            os.remove(self.message_id_file)
+        if self.on_save:
+            self.on_save(None)
+
+    async def publish(self, channel, embed):
+        """
+        Edit the dashboard message in place, or send a new one
+
+        Args:
+            channel: Channel holding the dashboard
+            embed: discord.Embed to show
+
+        Returns:
+            bool: True if a new message had to be sent
+        """
+        with instrumentation.stage('edit'):
+            if self.message is None or self.message.channel.id != channel.id:
+                message_id = self.load_id()
+                self.message = channel.get_partial_message(message_id) if message_id else None
+
+            if self.message is not None:
+                try:
+                    await self.message.edit(embed=embed)
+                    return False
+                except discord.NotFound:
+                    # Message was deleted, fall through and send a new one
+                    self.message = None
+
+            self.message = await channel.send(embed=embed)
+            self.save_id(self.message.id)
+            return True
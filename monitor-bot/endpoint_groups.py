@@ -0,0 +1,215 @@
+import asyncio
+import socket
+import time
+from urllib.parse import urlsplit
+from config import GROUP_VERIFY_INTERVAL, GROUP_CONFIRM_DELAY, GROUP_START_TOLERANCE, GROUP_MEMORY_TOLERANCE
+
+def backend_fingerprint(result):
+    """
+    Values that identify one running Lavalink process
+
+    The JVM start time (fetch time minus uptime), core count and reservable
+    memory stay the same whichever port or hostname the stats came through,
+    but co-hosted nodes started together with the same -Xmx share them too.
+    The live player counts and memory use tell those apart, as long as both
+    results come from the same polling pass. Idle nodes (no players) only
+    have memory use left, which can match by chance, so EndpointGrouper
+    needs a second match after the backend's state has moved (see `moved`).
+
+    Args:
+        result: Online node stats
+
+    Returns:
+        tuple: ((start time in seconds, cores, reservable bytes),
+                (players, playing players, used bytes, free bytes)), or None
+    """
+    stats = result.stats
+    if stats is None or not stats.uptime_ms or result.fetched_at is None:
+        return None
+
+    return ((result.fetched_at - stats.uptime_seconds, stats.cores, stats.memory_reservable),
+            (stats.players, stats.playing_players, stats.memory_used, stats.memory_free))
+
+def same_backend(a, b, tolerance=GROUP_START_TOLERANCE, memory_tolerance=GROUP_MEMORY_TOLERANCE):
+    """Whether two fingerprints from the same pass belong to the same process"""
+    (start_a, *process_a), (players_a, playing_a, *memory_a) = a
+    (start_b, *process_b), (players_b, playing_b, *memory_b) = b
+    return (process_a == process_b and abs(start_a - start_b) <= tolerance
+            and (players_a, playing_a) == (players_b, playing_b)
+            and all(abs(x - y) <= memory_tolerance for x, y in zip(memory_a, memory_b)))
+
+def moved(before, after, memory_tolerance=GROUP_MEMORY_TOLERANCE):
+    """Whether one entry's live stats changed between two fingerprints by more than read noise"""
+    (players_a, playing_a, *memory_a) = before[1]
+    (players_b, playing_b, *memory_b) = after[1]
+    return ((players_a, playing_a) != (players_b, playing_b)
+            or any(abs(x - y) > memory_tolerance for x, y in zip(memory_a, memory_b)))
+
+class EndpointGrouper:
+    """
+    Polls each backend once, however many config entries point at it
+
+    Entries that share a host, or whose hosts resolve to the same address,
+    are candidates. A candidate pair only becomes a group once two passes
+    that freshly poll every entry show matching backend fingerprints, with
+    the live stats having moved in between: two idle processes can look
+    alike once, but don't change in step. Until then the pair is re-checked
+    every confirm_delay. Groups are re-verified periodically, and a group
+    whose representative fails is dissolved and its aliases polled directly
+    in the same cycle.
+    """
+
+    def __init__(self, verify_interval=GROUP_VERIFY_INTERVAL, on_regroup=None, confirm_delay=GROUP_CONFIRM_DELAY):
+        """
+        Args:
+            verify_interval: Seconds between verification passes
+            on_regroup: Callback receiving the alias names whenever the groups change
+                        (e.g. to keep stats sockets closed for aliases)
+            confirm_delay: Seconds between passes re-checking a match not yet confirmed
+        """
+        self.verify_interval = verify_interval
+        self.confirm_delay = confirm_delay
+        self.on_regroup = on_regroup
+        self.alias_of = {}
+        self.unconfirmed = {}  # alias -> (representative, alias fingerprint when first matched)
+        self.addresses = {}
+        self.verified_at = None
+        self.node_names = None
+
+    @staticmethod
+    def _host(node):
+        return node.get('host') or urlsplit(node['url']).hostname
+
+    async def _resolve(self, hosts):
+        loop = asyncio.get_running_loop()
+        infos = await asyncio.gather(
+            *[loop.getaddrinfo(host, None, type=socket.SOCK_STREAM) for host in hosts],
+            return_exceptions=True
+        )
+        for host, info in zip(hosts, infos):
+            if isinstance(info, Exception):
+                self.addresses.pop(host, None)
+            else:
+                self.addresses[host] = {entry[4][0] for entry in info}
+
+    def _candidates(self, nodes):
+        """Partition nodes into sets that share a host or an address (and a password)"""
+        parent = list(range(len(nodes)))
+
+        def find(i):
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        owners = {}
+        for i, node in enumerate(nodes):
+            host = self._host(node)
+            keys = [('host', host)] + [('ip', ip) for ip in self.addresses.get(host, ())]
+            for key in keys:
+                key = (node.get('password'),) + key
+                if key in owners:
+                    parent[find(i)] = find(owners[key])
+                else:
+                    owners[key] = i
+
+        sets = {}
+        for i in range(len(nodes)):
+            sets.setdefault(find(i), []).append(i)
+        return [members for members in sets.values() if len(members) > 1]
+
+    def _confirm(self, nodes, results):
+        """Rebuild the groups from a pass where every node was polled"""
+        matched = {}
+        for members in self._candidates(nodes):
+            backends = []
+            for i in members:
+                if not results[i].online:
+                    continue
+                fingerprint = backend_fingerprint(results[i])
+                if fingerprint is None:
+                    continue
+                for representative, known in backends:
+                    if same_backend(known, fingerprint):
+                        matched[nodes[i]['name']] = (representative, fingerprint)
+                        break
+                else:
+                    backends.append((nodes[i]['name'], fingerprint))
+
+        # Existing groups stay while they match; a new match has to repeat after the stats moved
+        alias_of, unconfirmed = {}, {}
+        for name, (representative, fingerprint) in matched.items():
+            first = self.unconfirmed.get(name)
+            if self.alias_of.get(name) == representative:
+                alias_of[name] = representative
+            elif first is None or first[0] != representative:
+                unconfirmed[name] = (representative, fingerprint)
+            elif moved(first[1], fingerprint):
+                alias_of[name] = representative
+            else:
+                unconfirmed[name] = first
+        self.alias_of, self.unconfirmed = alias_of, unconfirmed
+
+        if self.alias_of:
+            print(f"🔗 {len(self.alias_of)} node entries share a backend with another entry")
+        self._regrouped()
+
+    def _regrouped(self):
+        if self.on_regroup:
+            self.on_regroup(set(self.alias_of))
+
+    def invalidate(self):
+        """Regroup from scratch on the next poll (node settings changed under the same names)"""
+        self.alias_of = {}
+        self.unconfirmed = {}
+        self.verified_at = None
+
+    def wrap(self, poll, verify=None):
+        """
+        Make a list-level poll coroutine fetch each backend once
+
+        Args:
+            poll: Coroutine that fetches a list of nodes
+            verify: Coroutine used for verification passes; it must fetch every
+                    node fresh and at once (no cached or pushed results), since
+                    fingerprints are only comparable within one pass. Defaults to `poll`.
+
+        Returns:
+            Coroutine function with the same signature returning a result for every node
+        """
+        verify = verify or poll
+
+        async def grouped_poll(nodes):
+            now = time.monotonic()
+            names = frozenset(node['name'] for node in nodes)
+
+            interval = self.confirm_delay if self.unconfirmed else self.verify_interval
+            if (self.verified_at is None or names != self.node_names
+                    or now - self.verified_at >= interval):
+                # Verification pass: poll everything, then regroup
+                results = await verify(nodes)
+                await self._resolve(sorted({self._host(node) for node in nodes}))
+                self._confirm(nodes, results)
+                self.verified_at = now
+                self.node_names = names
+                return results
+
+            representatives = [node for node in nodes if node['name'] not in self.alias_of]
+            by_name = {node['name']: result for node, result in zip(representatives, await poll(representatives))}
+
+            # Representative down: the group can't be trusted, poll its aliases directly
+            orphans = [node for node in nodes if node['name'] in self.alias_of
+                       and not by_name[self.alias_of[node['name']]].online]
+            if orphans:
+                for node in orphans:
+                    del self.alias_of[node['name']]
+                self._regrouped()
+                by_name.update((node['name'], result) for node, result in zip(orphans, await poll(orphans)))
+
+            return [
+                by_name[node['name']] if node['name'] in by_name
+                else by_name[self.alias_of[node['name']]].as_alias(node)
+                for node in nodes
+            ]
+
+        return grouped_poll
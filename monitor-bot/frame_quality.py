@@ -0,0 +1,131 @@
+import time
+from collections import deque
+from config import FRAME_WINDOW, FRAME_TREND_MIN_SAMPLES
+
+class FrameQuality:
+    """
+    Audio frame health of one node (percentages of the frames expected)
+
+    Lavalink expects 50 frames per second for every playing player and
+    reports, per minute, how many were sent, nulled (the source had no
+    audio ready) and missing altogether (deficit). Nulled and deficit
+    frames are what listeners hear as stutter.
+    """
+
+    __slots__ = ('expected', 'loss_percent', 'nulled_percent', 'deficit_percent',
+                 'avg_loss_percent', 'avg_deficit_percent', 'deficit_trend', 'samples')
+
+    def __init__(self, expected, loss_percent, nulled_percent, deficit_percent,
+                 avg_loss_percent, avg_deficit_percent, deficit_trend, samples):
+        self.expected = expected
+        self.loss_percent = loss_percent                # latest minute, nulled + deficit
+        self.nulled_percent = nulled_percent
+        self.deficit_percent = deficit_percent
+        self.avg_loss_percent = avg_loss_percent        # over FRAME_WINDOW, weighted by frames
+        self.avg_deficit_percent = avg_deficit_percent
+        self.deficit_trend = deficit_trend              # deficit percentage points per minute, None until enough samples
+        self.samples = samples
+
+def _slope(points):
+    """Least-squares slope of (x, y) points"""
+    n = len(points)
+    mean_x = sum(x for x, _ in points) / n
+    mean_y = sum(y for _, y in points) / n
+    spread = sum((x - mean_x) ** 2 for x, _ in points)
+    if not spread:
+        return 0.0
+    return sum((x - mean_x) * (y - mean_y) for x, y in points) / spread
+
+class FrameTracker:
+    """
+    Rolling frame loss per node, from the frameStats of each new snapshot
+
+    Snapshots re-used between polls (same fetched_at) are only counted
+    once, so the window holds one sample per stats report.
+    """
+
+    def __init__(self, window=FRAME_WINDOW):
+        self.window = window
+        self.nodes = {}
+        self.last_seen = {}
+
+    def observe(self, lavalink_data):
+        """
+        Record new frame stats and attach a FrameQuality to every online snapshot
+
+        Nodes with no playing players report no frames; they get None.
+
+        Args:
+            lavalink_data: List of NodeSnapshot
+        """
+        seen = set()
+        for snapshot in lavalink_data:
+            seen.add(snapshot.name)
+            if not snapshot.online:
+                continue
+
+            samples = self.nodes.get(snapshot.name)
+            if samples is None:
+                samples = self.nodes[snapshot.name] = deque()
+
+            now = snapshot.fetched_at or time.time()
+            if self.last_seen.get(snapshot.name) != snapshot.fetched_at:
+                self.last_seen[snapshot.name] = snapshot.fetched_at
+                sample = self._sample(snapshot.stats)
+                if sample is not None:
+                    samples.append((now,) + sample)
+
+            while samples and now - samples[0][0] > self.window:
+                samples.popleft()
+
+            snapshot.frames = self._summary(snapshot.stats, samples)
+
+        for name in list(self.nodes):
+            if name not in seen:
+                self.forget(name)
+
+    def forget(self, name):
+        self.nodes.pop(name, None)
+        self.last_seen.pop(name, None)
+
+    @staticmethod
+    def _sample(stats):
+        if stats.frames_sent is None:
+            return None
+        sent = max(stats.frames_sent, 0)
+        nulled = max(stats.frames_nulled or 0, 0)
+        deficit = max(stats.frames_deficit or 0, 0)
+        expected = sent + nulled + deficit
+        if not expected:
+            return None
+        return expected, nulled, deficit
+
+    def _summary(self, stats, samples):
+        latest = self._sample(stats)
+        if latest is None:
+            return None
+
+        expected, nulled, deficit = latest
+        total = sum(s[1] for s in samples) or expected
+        avg_nulled = sum(s[2] for s in samples)
+        avg_deficit = sum(s[3] for s in samples)
+        if not samples:
+            avg_nulled, avg_deficit = nulled, deficit
+
+        trend = None
+        if len(samples) >= FRAME_TREND_MIN_SAMPLES:
+            start = samples[0][0]
+            trend = _slope([((t - start) / 60, d / e * 100) for t, e, _, d in samples])
+
+        return FrameQuality(
+            expected,
+            (nulled + deficit) / expected * 100,
+            nulled / expected * 100,
+            deficit / expected * 100,
+            (avg_nulled + avg_deficit) / total * 100,
+            avg_deficit / total * 100,
+            trend,
+            len(samples)
+        )
+
+frame_tracker = FrameTracker()
@@ -0,0 +1,145 @@
+import asyncio
+import json
+import os
+from datetime import datetime
+import discord
+from dashboard import DashboardMessage, EmbedEditScheduler
+from utils import write_json_atomic
+
+class GuildDashboard:
+    """
+    One guild's dashboard: its channels, message handle and edit scheduler
+    """
+
+    def __init__(self, registry, guild_id, monitor_channel_id, alerts_channel_id=None,
+                 webhook_url=None, message_id=None, setup_at=None):
+        self.registry = registry
+        self.guild_id = guild_id
+        self.monitor_channel_id = monitor_channel_id
+        self.alerts_channel_id = alerts_channel_id
+        self.webhook_url = webhook_url
+        self.setup_at = setup_at or datetime.now().isoformat()
+        self.message = DashboardMessage(None, message_id, on_save=lambda _: registry.save())
+        # Own scheduler per guild: edits are rate limited per channel by Discord
+        self.scheduler = EmbedEditScheduler(self.publish)
+
+    async def publish(self, embed):
+        """Post the embed to this guild's dashboard channel"""
+        channel = self.registry.bot.get_channel(self.monitor_channel_id)
+        if not channel:
+            return False
+
+        try:
+            await self.message.publish(channel, embed)
+            return True
+        except discord.HTTPException as e:
+            print(f"❌ Dashboard edit failed for guild {self.guild_id}: {e}")
+            return False
+
+    def to_dict(self):
+        return {
+            'guild_id': self.guild_id,
+            'monitor_channel_id': self.monitor_channel_id,
+            'alerts_channel_id': self.alerts_channel_id,
+            'webhook_url': self.webhook_url,
+            'message_id': self.message.message_id,
+            'setup_at': self.setup_at
+        }
+
+class DashboardRegistry:
+    """
+    All guild dashboards fed from one shared poll, persisted atomically
+
+    With a state store the dashboards are kept there; the JSON file is
+    then only read once, to migrate an existing setup.
+    """
+
+    def __init__(self, bot, path='monitor_config.json', store=None):
+        self.bot = bot
+        self.path = path
+        self.store = store
+        self.guilds = {}
+
+    def load(self):
+        """Load dashboards, migrating the JSON file and the old single-guild format"""
+        data = self.store.get('registry') if self.store is not None else None
+        migrate = data is None and self.store is not None
+
+        if data is None:
+            if not os.path.exists(self.path):
+                return
+            try:
+                with open(self.path, 'r') as f:
+                    data = json.load(f)
+            except Exception as e:
+                print(f"⚠️ Config error: {e}")
+                return
+
+        if 'guilds' in data:
+            entries = list(data['guilds'].values())
+        else:
+            # Legacy config: one guild, message ID kept in message_id.txt
+            legacy = dict(data)
+            legacy['message_id'] = DashboardMessage('message_id.txt').load_id()
+            entries = [legacy] if legacy.get('monitor_channel_id') else []
+
+        for entry in entries:
+            guild = GuildDashboard(
+                self,
+                entry.get('guild_id'),
+                entry.get('monitor_channel_id'),
+                entry.get('alerts_channel_id'),
+                entry.get('webhook_url'),
+                entry.get('message_id'),
+                entry.get('setup_at')
+            )
+            self.guilds[guild.guild_id] = guild
+
+        if ('guilds' not in data or migrate) and self.guilds:
+            self.save()
+
+    def save(self):
+        """Write every dashboard in one atomic replace (or one store update, flushed with the next batch)"""
+        data = {'guilds': {str(gid): guild.to_dict() for gid, guild in self.guilds.items()}}
+        if self.store is not None:
+            self.store.set('registry', data)
+            return
+        try:
+            write_json_atomic(self.path, data)
+        except Exception as e:
+            print(f"❌ Failed to save {self.path}: {e}")
+
+    def register(self, guild_id, monitor_channel_id, alerts_channel_id=None, webhook_url=None):
+        """
+        Add or replace a guild's dashboard
+
+        Returns:
+            GuildDashboard: The new dashboard
+        """
+        guild = GuildDashboard(self, guild_id, monitor_channel_id, alerts_channel_id, webhook_url)
+        self.guilds[guild_id] = guild
+        self.save()
+        return guild
+
+    def remove(self, guild_id):
+        if self.guilds.pop(guild_id, None) is not None:
+            self.save()
+
+    def webhook_urls(self):
+        return [guild.webhook_url for guild in self.guilds.values() if guild.webhook_url]
+
+    async def fan_out(self, embed):
+        """
+        Offer the same embed to every guild's scheduler concurrently
+
+        Returns:
+            int: Number of dashboards edited now
+        """
+        if not self.guilds:
+            return 0
+
+        results = await asyncio.gather(
+            *[guild.scheduler.submit(embed) for guild in self.guilds.values()],
+            return_exceptions=True
+        )
+        return sum(1 for result in results if result is True)
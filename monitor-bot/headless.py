@@ -0,0 +1,306 @@
+#!/usr/bin/env python3
+"""
+Lavalink Monitor, headless
+Polls, scores and alerts like the bots but never logs in to Discord, for
+hosts that only need the data (e.g. a sidecar next to each Lavalink
+container).
+
+    python headless.py                              # one JSON record per update on stdout
+    python headless.py --format text --host         # readable lines, with host CPU/RAM/disk
+    python headless.py --format none --metrics      # only serve /metrics and /nodes
+    python headless.py --webhook https://discord.com/api/webhooks/...
+    python headless.py --once                       # poll once, exit 0/1/2 for good/moderate/critical
+
+discord.py is never imported, and the webhook queue, the metrics server
+(aiohttp.web) and host sampling are only imported or started when their
+output is switched on. Records go to stdout; status messages go to stderr.
+"""
+
+import argparse
+import asyncio
+import json
+import signal
+import sys
+import time
+from datetime import datetime
+from config import LAVALINK_CONFIG_FILE, POLL_TICK, WS_STATS_ENABLED, CONFIG_WATCH_ENABLED, HEADLESS_WEBHOOK_URLS
+from lavalink_parser import parse_lavalink_config
+from monitor import get_lavalink_stats, get_system_stats, host_sampler
+from http_client import close_session
+from stats_stream import StatsStreamManager
+from scheduler import AdaptivePollScheduler
+from endpoint_groups import EndpointGrouper
+from frame_quality import frame_tracker
+from latency import latency_tracker
+from config_watcher import ConfigWatcher
+from alerts import AlertEngine, FIRING, SEVERITY_ICONS, format_alert_embed
+from instrumentation import instrumentation
+from utils import get_overall_health, format_ping, format_frames
+
+EXIT_CODES = {'good': 0, 'moderate': 1, 'critical': 2}
+
+def node_record(snapshot):
+    """JSON-ready view of one node: the persisted fields plus the derived health inputs"""
+    record = snapshot.to_dict()
+    record['steady_ping'] = snapshot.steady_ping
+    frames = snapshot.frames
+    record['frame_loss_percent'] = frames.avg_loss_percent if frames is not None else None
+    return record
+
+def alert_record(event):
+    return {'type': 'alert', 'time': time.time(), 'node': event.node, 'rule': event.rule.name,
+            'severity': event.rule.severity, 'state': event.state, 'value': event.value, 'text': event.text}
+
+def node_line(snapshot):
+    if not snapshot.online:
+        return f"🔴 {snapshot.name} offline: {snapshot.error or 'Unknown'}"
+    stats = snapshot.stats
+    return (f"🟢 {snapshot.name} CPU {stats.cpu_percent:.1f}% · RAM {stats.ram_percent:.1f}% · "
+            f"Ping {format_ping(snapshot)} · Players {stats.players}/{stats.playing_players} · "
+            f"Frames {format_frames(snapshot.frames)}")
+
+class HeadlessMonitor:
+    """
+    The bots' poll cycle with stdout, webhook and metrics outputs
+
+    Args:
+        nodes: Node configurations
+        out: Stream that receives the records
+        fmt: 'json', 'text' or 'none'
+        webhook_urls: Discord webhooks that receive alert embeds
+        metrics: Serve /metrics and the node selection routes
+        host: Include host CPU, RAM and disk (starts the sampler thread)
+        config_file: Node config to watch for changes
+    """
+
+    def __init__(self, nodes, out=sys.stdout, fmt='json', webhook_urls=(), metrics=False, host=False,
+                 config_file=LAVALINK_CONFIG_FILE):
+        self.nodes = nodes
+        self.out = out
+        self.fmt = fmt
+        self.webhook_urls = list(webhook_urls)
+        self.host = host
+        self.last_fetched = None
+
+        self.stats_stream = StatsStreamManager()
+        self.poll_scheduler = AdaptivePollScheduler()
+        poll_nodes = self.poll_scheduler.wrap(get_lavalink_stats)
+        self.endpoint_grouper = EndpointGrouper(on_regroup=self.stats_stream.exclude)
+        self.collect_nodes = self.endpoint_grouper.wrap(lambda nodes: self.stats_stream.collect(nodes, poll=poll_nodes),
+                                                        verify=get_lavalink_stats)
+        self.config_watcher = ConfigWatcher(lambda path: parse_lavalink_config(path, verbose=False), config_file)
+        self.alert_engine = AlertEngine()
+
+        self.webhooks = None
+        if self.webhook_urls:
+            from webhook_dispatcher import WebhookDispatcher
+            self.webhooks = WebhookDispatcher()
+
+        self.metrics = None
+        self.node_selector = None
+        if metrics:
+            from metrics_server import MetricsServer
+            from node_selector import node_selector
+            self.metrics = MetricsServer()
+            node_selector.attach(self.metrics.app)
+            self.node_selector = node_selector
+
+    async def start(self):
+        """Start the background parts that are switched on (call from the event loop)"""
+        if self.host:
+            host_sampler.start()
+        if WS_STATS_ENABLED:
+            self.stats_stream.start(self.nodes)
+        if self.metrics:
+            instrumentation.start()
+            await self.metrics.start()
+        if self.webhooks:
+            self.webhooks.restore()
+        if CONFIG_WATCH_ENABLED:
+            self.config_watcher.start(self.nodes, self.reload_nodes)
+
+    async def stop(self):
+        """Stop everything started, spilling undelivered alerts to disk"""
+        await self.config_watcher.stop()
+        await self.stats_stream.stop()
+        if self.metrics:
+            await self.metrics.stop()
+        if self.webhooks:
+            await self.webhooks.stop()
+        await instrumentation.stop()
+        host_sampler.stop()
+        await close_session()
+
+    async def reload_nodes(self, nodes, diff):
+        """Apply a node config change: only added, removed or edited nodes lose their state"""
+        for node in diff.removed:
+            self.poll_scheduler.forget(node)
+            latency_tracker.forget(node['name'])
+            if self.metrics:
+                self.metrics.forget(node['name'])
+            await self.stats_stream.discard(node['name'])
+        if diff.changed:
+            self.endpoint_grouper.invalidate()
+
+        self.nodes = nodes
+        if WS_STATS_ENABLED:
+            self.stats_stream.start(self.nodes)
+
+    async def cycle(self, collect):
+        """
+        Fetch, score, alert and emit once
+
+        Args:
+            collect: Coroutine taking the node list and returning NodeSnapshots
+
+        Returns:
+            str: Overall health ('good', 'moderate' or 'critical')
+        """
+        with instrumentation.stage('fetch'):
+            lavalink_data = await collect(self.nodes)
+        frame_tracker.observe(lavalink_data)
+        system_data = get_system_stats() if self.host else None
+
+        if self.metrics:
+            self.metrics.update(lavalink_data, system_data)
+            self.node_selector.update(lavalink_data)
+
+        with instrumentation.stage('health'):
+            health = get_overall_health(lavalink_data, system_data)
+
+        with instrumentation.stage('alerts'):
+            events = self.alert_engine.evaluate(lavalink_data)
+            if events and self.webhooks:
+                # Delivered in the background, batched and rate-limit aware
+                self.webhooks.enqueue(self.webhook_urls, format_alert_embed(events))
+
+        self.emit(lavalink_data, system_data, health, events)
+        return health
+
+    def emit(self, lavalink_data, system_data, health, events):
+        """Write alert transitions, then the fleet status if any node has a new result"""
+        if self.fmt == 'none':
+            return
+
+        fetched = [snapshot.fetched_at for snapshot in lavalink_data]
+        changed = fetched != self.last_fetched
+        self.last_fetched = fetched
+
+        if self.fmt == 'json':
+            records = [alert_record(event) for event in events]
+            if changed:
+                records.append({'type': 'status', 'time': time.time(), 'health': health,
+                                'nodes': [node_record(snapshot) for snapshot in lavalink_data],
+                                'host': system_data})
+            lines = [json.dumps(record, default=str) for record in records]
+        else:
+            stamp = datetime.now().strftime('%H:%M:%S')
+            lines = []
+            for event in events:
+                icon = SEVERITY_ICONS.get(event.rule.severity, '🟠') if event.state == FIRING else '✅'
+                lines.append(f"{stamp} {icon} {event.text}" + ('' if event.state == FIRING else ' (resolved)'))
+            if changed:
+                online = sum(1 for snapshot in lavalink_data if snapshot.online)
+                lines.append(f"{stamp} 📊 {health} · {online}/{len(lavalink_data)} nodes online")
+                lines += [f"{stamp}   {node_line(snapshot)}" for snapshot in lavalink_data]
+                if system_data:
+                    lines.append(f"{stamp}   🖥️ Host CPU {system_data['cpu_percent']:.1f}% · "
+                                 f"RAM {system_data['memory_percent']:.1f}% · Disk {system_data['disk_percent']:.1f}%")
+
+        if lines:
+            self.out.write('\n'.join(lines) + '\n')
+            self.out.flush()
+
+    async def run(self):
+        """Poll due nodes every POLL_TICK seconds until cancelled"""
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            try:
+                await self.cycle(self.collect_nodes)
+            except Exception as e:
+                print(f"❌ Error in monitor loop: {e}")
+            await asyncio.sleep(max(POLL_TICK - (loop.time() - started), 0))
+
+    async def run_once(self):
+        """
+        Poll every node once over HTTP
+
+        Returns:
+            str: Overall health
+        """
+        try:
+            return await self.cycle(get_lavalink_stats)
+        finally:
+            await close_session()
+
+async def serve(monitor):
+    """Run until SIGINT/SIGTERM, then shut down cleanly"""
+    loop = asyncio.get_running_loop()
+    stopping = asyncio.Event()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stopping.set)
+        except (NotImplementedError, AttributeError):  # Windows: Ctrl+C raises KeyboardInterrupt instead
+            pass
+
+    await monitor.start()
+    task = asyncio.create_task(monitor.run())
+    try:
+        await stopping.wait()
+    finally:
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        await monitor.stop()
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Monitor Lavalink nodes without Discord: stdout, webhook and metrics outputs')
+    parser.add_argument('--config', default=LAVALINK_CONFIG_FILE, help='Node config file')
+    parser.add_argument('--format', choices=('json', 'text', 'none'), default='json',
+                        help='Record format on stdout (json: one object per line)')
+    parser.add_argument('--webhook', action='append', default=[], metavar='URL',
+                        help='Discord webhook for alerts (repeatable, added to HEADLESS_WEBHOOK_URLS)')
+    parser.add_argument('--metrics', action='store_true', help='Serve /metrics and /nodes on METRICS_HOST:METRICS_PORT')
+    parser.add_argument('--host', action='store_true', help='Include host CPU, RAM and disk usage')
+    parser.add_argument('--once', action='store_true', help='Poll once and exit with 0/1/2 for good/moderate/critical')
+    args = parser.parse_args()
+    if args.once:
+        # Only flags given here are an error; the env webhooks of a sidecar setup are just not used
+        if args.webhook or args.metrics:
+            parser.error('--once only writes to stdout (no --webhook or --metrics)')
+    else:
+        args.webhook = list(HEADLESS_WEBHOOK_URLS) + args.webhook
+    return args
+
+def main():
+    args = parse_args()
+
+    # Keep stdout for records: everything the modules print goes to stderr
+    out = sys.stdout
+    sys.stdout = sys.stderr
+
+    nodes = parse_lavalink_config(args.config, verbose=False)
+    if not nodes:
+        print(f"❌ No Lavalink nodes found in {args.config}!")
+        return 3
+
+    monitor = HeadlessMonitor(nodes, out, args.format, args.webhook, args.metrics, args.host, args.config)
+    if args.once:
+        health = asyncio.run(monitor.run_once())
+        return EXIT_CODES.get(health, 2)
+
+    outputs = [f"stdout ({args.format})"] if args.format != 'none' else []
+    if args.webhook:
+        outputs.append(f"{len(args.webhook)} webhook(s)")
+    if args.metrics:
+        outputs.append("metrics")
+    print(f"🚀 Headless monitor: {len(nodes)} Lavalink nodes → {', '.join(outputs) or 'no outputs'}")
+
+    try:
+        asyncio.run(serve(monitor))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
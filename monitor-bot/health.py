@@ -0,0 +1,226 @@
+from array import array
+from config import HEALTH_THRESHOLDS, HEALTH_NUMPY_MIN_NODES
+
+_numpy = None
+
+def _load_numpy():
+    """numpy if installed, imported on first use so small fleets never pay for it"""
+    global _numpy
+    if _numpy is None:
+        try:
+            import numpy
+            _numpy = numpy
+        except ImportError:  # optional speedup, the array fallback gives the same results
+            _numpy = False
+    return _numpy or None
+
+# Severity codes
+GOOD = 0
+MODERATE = 1
+CRITICAL = 2
+OFFLINE = 3
+
+SEVERITY_NAMES = ('good', 'moderate', 'critical', 'offline')
+
+# Node metrics scored, and how to read each one from a NodeSnapshot
+NODE_METRICS = ('cpu', 'ram', 'ping', 'frames')
+
+NAN = float('nan')
+
+def _node_values(snapshot):
+    stats = snapshot.stats
+    return (
+        stats.cpu_percent,
+        stats.ram_percent,
+        snapshot.steady_ping if snapshot.steady_ping is not None else NAN,
+        # No frame stats means nothing is playing, so nothing can stutter
+        snapshot.frames.avg_loss_percent if snapshot.frames is not None else 0.0
+    )
+
+def severity(value, metric, thresholds=HEALTH_THRESHOLDS):
+    """
+    Severity code of a single value
+
+    Args:
+        value: Metric value (None or NaN counts as critical)
+        metric: Threshold key (cpu, ram, disk, ping, players)
+
+    Returns:
+        int: GOOD, MODERATE or CRITICAL
+    """
+    if value is None or value != value:
+        return CRITICAL
+    limits = thresholds.get(metric, {})
+    if value < limits.get('good', 50):
+        return GOOD
+    if value < limits.get('moderate', 80):
+        return MODERATE
+    return CRITICAL
+
+class HealthReport:
+    """
+    Result of one fleet evaluation
+    """
+
+    __slots__ = ('names', 'metrics', 'severities', 'node_severities', 'counts', 'score', 'status')
+
+    def __init__(self, names, metrics, severities, node_severities, counts, score, status):
+        self.names = names
+        self.metrics = metrics
+        self.severities = severities            # per metric: one code per node
+        self.node_severities = node_severities  # worst code per node
+        self.counts = counts                    # metrics per severity code
+        self.score = score                      # 0-100, higher is healthier
+        self.status = status                    # good, moderate or critical
+
+    def node(self, name):
+        """Severity codes of one node, keyed by metric"""
+        i = self.names.index(name)
+        return {metric: int(self.severities[m][i]) for m, metric in enumerate(self.metrics)}
+
+class FleetHealth:
+    """
+    Threshold evaluation for every node and metric in one batch
+
+    Node metrics live in columnar arrays (one column per metric) that are
+    reused between evaluations. From HEALTH_NUMPY_MIN_NODES nodes on (and
+    with numpy installed) each threshold is one vector comparison, otherwise
+    the columns are walked as typed arrays, which is faster for small fleets.
+    """
+
+    def __init__(self, thresholds=HEALTH_THRESHOLDS):
+        self.thresholds = thresholds
+        self.good = [thresholds.get(metric, {}).get('good', 50) for metric in NODE_METRICS]
+        self.moderate = [thresholds.get(metric, {}).get('moderate', 80) for metric in NODE_METRICS]
+        self.names = []
+        self.size = 0
+        self._allocate(0)
+
+    def _allocate(self, capacity):
+        self.capacity = capacity
+        self.np = np = _load_numpy() if capacity >= HEALTH_NUMPY_MIN_NODES else None
+        if np is not None:
+            self.values = np.full((len(NODE_METRICS), capacity), NAN)
+            self.online = np.zeros(capacity, dtype=bool)
+        else:
+            self.values = [array('d', [NAN]) * capacity for _ in NODE_METRICS]
+            self.online = array('b', [0]) * capacity
+
+    def load(self, lavalink_data):
+        """
+        Copy the latest snapshots into the metric columns
+
+        Args:
+            lavalink_data: List of NodeSnapshot
+        """
+        n = len(lavalink_data)
+        if n > self.capacity:
+            self._allocate(max(n, 2 * self.capacity))
+
+        self.names = [snapshot.name for snapshot in lavalink_data]
+        self.size = n
+        values = self.values
+        online = self.online
+
+        for i, snapshot in enumerate(lavalink_data):
+            if snapshot.online:
+                online[i] = 1
+                for m, value in enumerate(_node_values(snapshot)):
+                    values[m][i] = value
+            else:
+                online[i] = 0
+                for m in range(len(NODE_METRICS)):
+                    values[m][i] = NAN
+
+    def _severities(self):
+        n = self.size
+        np = self.np
+        if np is not None:
+            values = self.values[:, :n]
+            good = np.array(self.good, dtype=float)[:, None]
+            moderate = np.array(self.moderate, dtype=float)[:, None]
+            # NaN compares false everywhere, so mark missing values explicitly
+            codes = (values >= good).astype(np.int8) + (values >= moderate)
+            codes[np.isnan(values)] = CRITICAL
+            codes[:, ~self.online[:n]] = OFFLINE
+            return codes, codes.max(axis=0) if n else codes[0]
+
+        codes = []
+        for m in range(len(NODE_METRICS)):
+            column = self.values[m]
+            good, moderate = self.good[m], self.moderate[m]
+            row = array('b', bytes(n))
+            for i in range(n):
+                if not self.online[i]:
+                    row[i] = OFFLINE
+                else:
+                    value = column[i]
+                    if value != value or value >= moderate:
+                        row[i] = CRITICAL
+                    elif value >= good:
+                        row[i] = MODERATE
+            codes.append(row)
+        worst = array('b', (max(column[i] for column in codes) for i in range(n))) if codes else array('b')
+        return codes, worst
+
+    def evaluate(self, system_data=None):
+        """
+        Score the loaded snapshots (and optionally the host)
+
+        The status keeps the old rules: offline nodes are left out of it,
+        and it turns critical past 30% critical metrics, moderate past 10%
+        critical or 50% moderate. The score does count offline nodes, as
+        fully critical.
+
+        Args:
+            system_data: Host system statistics
+
+        Returns:
+            HealthReport: Per-node and per-metric severities plus aggregates
+        """
+        codes, worst = self._severities()
+
+        if self.np is not None:
+            counts = self.np.bincount(codes.ravel(), minlength=4).tolist() if self.size else [0, 0, 0, 0]
+        else:
+            counts = [0, 0, 0, 0]
+            for row in codes:
+                for code in row:
+                    counts[code] += 1
+
+        if system_data:
+            for key, metric in (('cpu_percent', 'cpu'), ('memory_percent', 'ram'), ('disk_percent', 'disk')):
+                counts[severity(system_data[key], metric, self.thresholds)] += 1
+
+        good, moderate, critical, offline = counts
+        scored = good + moderate + critical
+        total = scored + offline
+
+        score = 100.0 * (1 - (0.5 * moderate + critical + offline) / total) if total else 0.0
+
+        if scored == 0:
+            status = 'critical'
+        elif critical / scored > 0.3:
+            status = 'critical'
+        elif critical / scored > 0.1 or moderate / scored > 0.5:
+            status = 'moderate'
+        else:
+            status = 'good'
+
+        return HealthReport(list(self.names), NODE_METRICS, codes, worst, counts, round(score, 1), status)
+
+def evaluate_fleet(lavalink_data, system_data=None, engine=None):
+    """
+    Load and score snapshots in one call
+
+    Args:
+        lavalink_data: List of NodeSnapshot
+        system_data: Host system statistics
+        engine: FleetHealth to reuse (keeps its column buffers between calls)
+
+    Returns:
+        HealthReport: Evaluation result
+    """
+    engine = engine or FleetHealth()
+    engine.load(lavalink_data)
+    return engine.evaluate(system_data)
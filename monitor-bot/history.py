@@ -0,0 +1,392 @@
+import json
+import math
+import os
+import threading
+import time
+from array import array
+from config import (
+    HISTORY_FILE,
+    HISTORY_RAW_POINTS,
+    HISTORY_TIERS,
+    HISTORY_MAX_LOG_BYTES
+)
+
+# Recorded metrics, in storage order
+METRICS = (
+    'online',
+    'players',
+    'playing_players',
+    'cpu_system',
+    'cpu_lavalink',
+    'memory_used',
+    'memory_allocated',
+    'frames_sent',
+    'frames_nulled',
+    'frames_deficit',
+    'ping'
+)
+
+NAN = float('nan')
+
+def extract_metrics(node_data):
+    """
+    Flatten one node result into a tuple of metric values
+
+    Args:
+        node_data: NodeSnapshot as returned by the monitor
+
+    Returns:
+        tuple: Values in METRICS order (NaN where unknown)
+    """
+    if not node_data.online:
+        return (0.0,) + (NAN,) * (len(METRICS) - 1)
+
+    stats = node_data.stats
+
+    def value(v):
+        return NAN if v is None else float(v)
+
+    return (
+        1.0,
+        float(stats.players),
+        float(stats.playing_players),
+        value(stats.system_load),
+        float(stats.lavalink_load),
+        float(stats.memory_used),
+        float(stats.memory_allocated),
+        value(stats.frames_sent),
+        value(stats.frames_nulled),
+        value(stats.frames_deficit),
+        value(node_data.ping)
+    )
+
+class RingSeries:
+    """
+    Fixed-capacity ring buffer of timestamped points in typed arrays
+
+    Each point holds an average and a max per metric; raw points simply
+    store the same value in both.
+    """
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.size = 0
+        self.head = 0
+        self.times = array('d', bytes(8 * capacity))
+        self.avg = [array('f', bytes(4 * capacity)) for _ in METRICS]
+        self.max = [array('f', bytes(4 * capacity)) for _ in METRICS]
+
+    def append(self, ts, avg_values, max_values):
+        i = self.head
+        self.times[i] = ts
+        for m in range(len(METRICS)):
+            self.avg[m][i] = avg_values[m]
+            self.max[m][i] = max_values[m]
+        self.head = (i + 1) % self.capacity
+        if self.size < self.capacity:
+            self.size += 1
+
+    def indexes(self):
+        """Ring positions from oldest to newest"""
+        start = (self.head - self.size) % self.capacity
+        return [(start + k) % self.capacity for k in range(self.size)]
+
+    def copy(self):
+        """Point-in-time copy (array slices are plain memory copies)"""
+        clone = RingSeries.__new__(RingSeries)
+        clone.capacity = self.capacity
+        clone.size = self.size
+        clone.head = self.head
+        clone.times = self.times[:]
+        clone.avg = [a[:] for a in self.avg]
+        clone.max = [a[:] for a in self.max]
+        return clone
+
+    def oldest(self):
+        if not self.size:
+            return None
+        return self.times[(self.head - self.size) % self.capacity]
+
+    def points(self, since=0, until=math.inf):
+        """
+        Yield (timestamp, averages, maxes) between two times, oldest first
+        """
+        for i in self.indexes():
+            ts = self.times[i]
+            if since <= ts <= until:
+                yield ts, [a[i] for a in self.avg], [a[i] for a in self.max]
+
+class RollupTier:
+    """
+    Downsampled tier: closes one averaged bucket per `step` seconds
+    """
+
+    def __init__(self, name, step, capacity):
+        self.name = name
+        self.step = step
+        self.series = RingSeries(capacity)
+        self.bucket_start = None
+        self.sum = [0.0] * len(METRICS)
+        self.count = [0] * len(METRICS)
+        self.peak = [NAN] * len(METRICS)
+
+    def add(self, ts, avg_values, max_values):
+        """
+        Fold a point into the open bucket
+
+        Returns:
+            tuple: (bucket_start, averages, maxes) if a bucket was closed, else None
+        """
+        bucket = ts - ts % self.step
+        closed = None
+
+        if self.bucket_start is not None and bucket != self.bucket_start:
+            closed = self.close()
+
+        if self.bucket_start is None:
+            self.bucket_start = bucket
+
+        for m in range(len(METRICS)):
+            value = avg_values[m]
+            if value == value:  # skip NaN
+                self.sum[m] += value
+                self.count[m] += 1
+            peak = max_values[m]
+            if peak == peak and not (self.peak[m] >= peak):
+                self.peak[m] = peak
+
+        return closed
+
+    def close(self):
+        avg_values = [self.sum[m] / self.count[m] if self.count[m] else NAN for m in range(len(METRICS))]
+        max_values = list(self.peak)
+        ts = self.bucket_start
+        self.series.append(ts, avg_values, max_values)
+
+        self.bucket_start = None
+        self.sum = [0.0] * len(METRICS)
+        self.count = [0] * len(METRICS)
+        self.peak = [NAN] * len(METRICS)
+        return ts, avg_values, max_values
+
+class NodeHistory:
+    """
+    Raw ring buffer plus cascading downsampled tiers for one node
+    """
+
+    def __init__(self):
+        self.raw = RingSeries(HISTORY_RAW_POINTS)
+        self.tiers = [RollupTier(name, step, capacity) for name, step, capacity in HISTORY_TIERS]
+
+    def add(self, ts, values, level=-1, max_values=None):
+        """
+        Insert a point at a level (-1 = raw, otherwise a tier index) and
+        cascade closed buckets into the coarser tiers
+        """
+        max_values = max_values or values
+
+        if level < 0:
+            self.raw.append(ts, values, max_values)
+        else:
+            self.tiers[level].series.append(ts, values, max_values)
+
+        point = (ts, values, max_values)
+        for tier in self.tiers[level + 1:]:
+            point = tier.add(*point)
+            if point is None:
+                break
+
+class HistoryStore:
+    """
+    In-memory time-series store for node stats, persisted to an append-only log
+    """
+
+    def __init__(self, path=HISTORY_FILE):
+        self.path = path
+        self.nodes = {}
+        self._pending = []
+        self._last_fetched = {}
+        self._compacted_size = 0
+        self._lock = threading.Lock()
+
+    def _node(self, name):
+        node = self.nodes.get(name)
+        if node is None:
+            node = NodeHistory()
+            self.nodes[name] = node
+        return node
+
+    def record(self, lavalink_data, ts=None):
+        """
+        Record the new poll results
+
+        Snapshots re-used between polls (same fetched_at as the last one
+        recorded for that node) are skipped, so a node polled every minute
+        gets one point per minute, not one per scheduler tick.
+
+        Args:
+            lavalink_data: List of node stats
+            ts: Sample time (defaults to now)
+        """
+        ts = ts or time.time()
+
+        with self._lock:
+            for node_data in lavalink_data:
+                name = node_data.name
+                if not name:
+                    continue
+                if node_data.fetched_at is not None:
+                    if self._last_fetched.get(name) == node_data.fetched_at:
+                        continue
+                    self._last_fetched[name] = node_data.fetched_at
+                values = extract_metrics(node_data)
+                self._node(name).add(ts, values)
+                self._pending.append(self._encode(ts, name, -1, values))
+
+    @staticmethod
+    def _encode(ts, name, level, values, max_values=None):
+        record = {'t': round(ts, 3), 'n': name, 'l': level,
+                  'v': [None if v != v else round(v, 4) for v in values]}
+        if max_values is not None and level >= 0:
+            record['m'] = [None if v != v else round(v, 4) for v in max_values]
+        return json.dumps(record, separators=(',', ':'))
+
+    @staticmethod
+    def _decode(values):
+        return [NAN if v is None else float(v) for v in values]
+
+    def query(self, name, metric, since, until=None):
+        """
+        Get a metric's history for one node, from the finest tier that covers `since`
+
+        Args:
+            name: Node name
+            metric: Metric name from METRICS
+            since: Start timestamp
+            until: End timestamp (defaults to now)
+
+        Returns:
+            list: (timestamp, average, max) tuples, oldest first
+        """
+        node = self.nodes.get(name)
+        if node is None or metric not in METRICS:
+            return []
+
+        m = METRICS.index(metric)
+        until = until or time.time()
+
+        for series in [node.raw] + [tier.series for tier in node.tiers]:
+            oldest = series.oldest()
+            if oldest is not None and oldest <= since:
+                break
+
+        return [(ts, avg[m], peak[m]) for ts, avg, peak in series.points(since, until)]
+
+    def at(self, name, ts):
+        """
+        Get the recorded point closest to a moment in time
+
+        Args:
+            name: Node name
+            ts: Timestamp to look up
+
+        Returns:
+            dict: Timestamp, resolution and metric averages/maxes, or None
+        """
+        node = self.nodes.get(name)
+        if node is None:
+            return None
+
+        levels = [('raw', 0, node.raw)] + [(tier.name, tier.step, tier.series) for tier in node.tiers]
+        for resolution, step, series in levels:
+            oldest = series.oldest()
+            if oldest is None or oldest > ts:
+                continue
+
+            best = None
+            for point in series.points(ts - max(step, 60), ts + max(step, 60)):
+                if best is None or abs(point[0] - ts) < abs(best[0] - ts):
+                    best = point
+            if best is not None:
+                point_ts, avg, peak = best
+                return {
+                    'timestamp': point_ts,
+                    'resolution': resolution,
+                    'avg': dict(zip(METRICS, avg)),
+                    'max': dict(zip(METRICS, peak))
+                }
+
+        return None
+
+    def load(self):
+        """Rebuild the in-memory store by replaying the log"""
+        if not os.path.exists(self.path):
+            return
+
+        count = 0
+        try:
+            with self._lock, open(self.path, 'r') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                        max_values = self._decode(record['m']) if 'm' in record else None
+                        self._node(record['n']).add(record['t'], self._decode(record['v']),
+                                                    record.get('l', -1), max_values)
+                        count += 1
+                    except (ValueError, KeyError, IndexError):
+                        continue  # torn or corrupt line
+            print(f"✅ Loaded {count} history points for {len(self.nodes)} nodes")
+        except Exception as e:
+            print(f"❌ Error loading history: {e}")
+
+    def flush(self):
+        """
+        Append pending points to the log, compacting it when it grows too large
+
+        Does blocking file I/O, run it with loop.run_in_executor from the event loop.
+        """
+        with self._lock:
+            pending, self._pending = self._pending, []
+
+        try:
+            if pending:
+                with open(self.path, 'a') as f:
+                    f.write('\n'.join(pending) + '\n')
+
+            # Compact past the size cap, but never again right after a compaction
+            if os.path.getsize(self.path) > max(HISTORY_MAX_LOG_BYTES, 2 * self._compacted_size):
+                self.compact()
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"❌ Error writing history: {e}")
+
+    def compact(self):
+        """
+        Rewrite the log so each time range is stored once, at the finest level still in memory
+        """
+        with self._lock:
+            snapshot = {}
+            for name, node in self.nodes.items():
+                levels = [(-1, 0, node.raw.copy())]
+                levels += [(level, tier.step, tier.series.copy()) for level, tier in enumerate(node.tiers)]
+                snapshot[name] = levels
+
+        lines = []
+        for name, levels in snapshot.items():
+            covered_from = math.inf
+            # Finest level first; coarser levels only keep whole buckets older than that
+            for level, step, series in levels:
+                for ts, avg, peak in series.points(until=covered_from - step):
+                    lines.append((ts, self._encode(ts, name, level, avg, peak)))
+                oldest = series.oldest()
+                if oldest is not None:
+                    covered_from = min(covered_from, oldest)
+
+        lines.sort(key=lambda item: item[0])
+
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w') as f:
+            f.write(''.join(line + '\n' for _, line in lines))
+        os.replace(tmp_path, self.path)
+        self._compacted_size = os.path.getsize(self.path)
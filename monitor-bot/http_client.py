@@ -0,0 +1,104 @@
+import ssl
+import aiohttp
+from config import (
+    TIMEOUT,
+    HTTP_POOL_LIMIT,
+    HTTP_POOL_LIMIT_PER_HOST,
+    HTTP_KEEPALIVE_TIMEOUT,
+    DNS_CACHE_TTL
+)
+from latency import create_trace_config
+
+# Shared client state (one pool for the whole process)
+_session = None
+_stream_session = None
+_ssl_context = None
+
+def get_ssl_context():
+    """
+    Get the shared TLS context
+
+    A single context is reused for every HTTPS connection so certificate
+    stores are loaded once and kept-alive TLS connections stay reusable.
+
+    Returns:
+        ssl.SSLContext: Shared client TLS context
+    """
+    global _ssl_context
+
+    if _ssl_context is None:
+        _ssl_context = ssl.create_default_context()
+
+    return _ssl_context
+
+def get_session():
+    """
+    Get the long-lived HTTP session, creating it on first use
+
+    The session keeps per-host keep-alive pools, caches DNS lookups and
+    bounds the total number of open connections. Requests carrying a
+    `latency.RequestTiming` are timed phase by phase. It must be created
+    from inside a running event loop.
+
+    Returns:
+        aiohttp.ClientSession: Shared client session
+    """
+    global _session
+
+    if _session is None or _session.closed:
+        connector = aiohttp.TCPConnector(
+            limit=HTTP_POOL_LIMIT,
+            limit_per_host=HTTP_POOL_LIMIT_PER_HOST,
+            ttl_dns_cache=DNS_CACHE_TTL,
+            use_dns_cache=True,
+            keepalive_timeout=HTTP_KEEPALIVE_TIMEOUT,
+            ssl=get_ssl_context()
+        )
+        _session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=TIMEOUT),
+            trace_configs=[create_trace_config()]
+        )
+
+    return _session
+
+def get_stream_session():
+    """
+    Get the session for long-lived websockets, creating it on first use
+
+    Each stats socket holds its connection for as long as the monitor runs,
+    so sockets get their own unbounded connector instead of taking slots
+    from the request pool (past HTTP_POOL_LIMIT nodes they would starve
+    every HTTP poll).
+
+    Returns:
+        aiohttp.ClientSession: Websocket client session
+    """
+    global _stream_session
+
+    if _stream_session is None or _stream_session.closed:
+        connector = aiohttp.TCPConnector(
+            limit=0,
+            ttl_dns_cache=DNS_CACHE_TTL,
+            use_dns_cache=True,
+            ssl=get_ssl_context()
+        )
+        _stream_session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=TIMEOUT)  # handshake only, frames have no deadline
+        )
+
+    return _stream_session
+
+async def close_session():
+    """
+    Close the shared HTTP sessions and release pooled connections
+    """
+    global _session, _stream_session
+
+    if _session is not None and not _session.closed:
+        await _session.close()
+    if _stream_session is not None and not _stream_session.closed:
+        await _stream_session.close()
+    _session = None
+    _stream_session = None
@@ -0,0 +1,353 @@
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from config import LOOP_LAG_INTERVAL, PROFILER_INTERVAL, PROFILER_MAX_SECONDS
+from latency import WindowedSketch
+
+# Stages of one monitor cycle, in pipeline order
+STAGES = ('fetch', 'parse', 'health', 'render', 'edit', 'alerts')
+
+def _sketch():
+    # Stage timings and lag go well below the request latency sketch's 0.1ms floor
+    return WindowedSketch(min_value=0.01)
+
+class LoopLagMonitor:
+    """
+    Measures how late a periodic timer fires
+
+    Anything that blocks the event loop (a synchronous call, a long parse)
+    delays the timer by the same amount, so the overshoot is the lag every
+    other task saw at that moment.
+    """
+
+    def __init__(self, interval=LOOP_LAG_INTERVAL):
+        self.interval = interval
+        self.sketch = _sketch()
+        self.last = None
+        self.max = 0.0
+        self.task = None
+
+    def start(self):
+        """Start sampling (call from the event loop)"""
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        if self.task and not self.task.done():
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+        self.task = None
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(self.interval)
+            lag = max((loop.time() - start - self.interval) * 1000, 0.0)
+            self.last = lag
+            self.max = max(self.max, lag)
+            self.sketch.add(lag)
+
+class DiscordCallCounter(logging.Filter):
+    """
+    Counts Discord REST calls and rate limits from discord.py's own log records
+
+    discord.py logs every response at DEBUG level on `discord.http`. The
+    logger is lowered to DEBUG so those records exist, and this filter
+    counts them and then drops the ones the `discord` logger wouldn't have
+    shown anyway, so the log output stays as configured.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.calls = 0
+        self.rate_limited = 0
+        self.global_rate_limited = 0
+        self.statuses = Counter()
+
+    def filter(self, record):
+        if record.msg == '%s %s with %s has returned %s' and len(record.args) == 4:
+            status = record.args[3]
+            self.calls += 1
+            self.statuses[status] += 1
+            if status == 429:
+                self.rate_limited += 1
+        elif isinstance(record.msg, str) and record.msg.startswith('Global rate limit has been hit'):
+            self.global_rate_limited += 1
+        return record.levelno >= logging.getLogger('discord').getEffectiveLevel()
+
+    def install(self):
+        logger = logging.getLogger('discord.http')
+        if self not in logger.filters:
+            logger.setLevel(logging.DEBUG)
+            logger.addFilter(self)
+
+class SamplingProfiler:
+    """
+    Statistical profiler of the event loop thread
+
+    A background thread looks at the loop thread's stack every
+    PROFILER_INTERVAL and counts the functions on it. Sampling costs the
+    loop nothing while off and little while on; it stops by itself after
+    PROFILER_MAX_SECONDS.
+    """
+
+    def __init__(self, interval=PROFILER_INTERVAL, max_seconds=PROFILER_MAX_SECONDS):
+        self.interval = interval
+        self.max_seconds = max_seconds
+        self.own = Counter()       # innermost frame per sample
+        self.inclusive = Counter() # every frame on the stack per sample
+        self.samples = 0
+        self.idle = 0              # samples with the loop waiting in select()
+        self.started_at = None
+        self.stopped_at = None
+        self._thread = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()  # the sampler thread writes the counters while report() reads them
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, thread_id=None):
+        """
+        Start sampling a thread (defaults to the calling thread, i.e. the event loop)
+
+        Returns:
+            bool: False if it was already running
+        """
+        if self.running:
+            return False
+        self.own.clear()
+        self.inclusive.clear()
+        self.samples = 0
+        self.idle = 0
+        self.started_at = time.monotonic()
+        self.stopped_at = None
+        self._stop.clear()
+        target = thread_id or threading.get_ident()
+        self._thread = threading.Thread(target=self._sample, args=(target,), name='sampling-profiler', daemon=True)
+        self._thread.start()
+        return True
+
+    def stop(self):
+        """Stop sampling, keeping the collected profile"""
+        if self.running:
+            self._stop.set()
+            self._thread.join()
+        self._thread = None
+
+    def _sample(self, thread_id):
+        deadline = time.monotonic() + self.max_seconds
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(thread_id)
+            if frame is None or time.monotonic() > deadline:
+                break
+            if os.path.basename(frame.f_code.co_filename) == 'selectors.py':
+                with self._lock:
+                    self.samples += 1
+                    self.idle += 1
+                continue
+            own = self._label(frame)
+            stack = []
+            while frame is not None:
+                label = self._label(frame)
+                if label not in stack:
+                    stack.append(label)
+                frame = frame.f_back
+            with self._lock:
+                self.samples += 1
+                self.own[own] += 1
+                for label in stack:
+                    self.inclusive[label] += 1
+        self.stopped_at = time.monotonic()
+
+    @staticmethod
+    def _label(frame):
+        code = frame.f_code
+        return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+    def report(self, top=10):
+        """
+        Hottest functions of the last (or current) run
+
+        Returns:
+            dict: samples, seconds, idle percent, and (function, percent of all samples) lists
+            for own and inclusive time
+        """
+        end = self.stopped_at if self.stopped_at is not None else time.monotonic()
+        seconds = end - self.started_at if self.started_at is not None else 0
+
+        # Copy under the lock, rank outside it so the sampler isn't held up
+        with self._lock:
+            samples, idle = self.samples, self.idle
+            own, inclusive = self.own.copy(), self.inclusive.copy()
+
+        def ranked(counter):
+            return [(label, count / samples * 100) for label, count in counter.most_common(top)] if samples else []
+
+        return {'samples': samples, 'seconds': seconds,
+                'idle': idle / samples * 100 if samples else 0.0,
+                'own': ranked(own), 'inclusive': ranked(inclusive)}
+
+class Instrumentation:
+    """
+    Loop lag, per-stage timings, Discord call counters and the profiler in one place
+    """
+
+    def __init__(self):
+        self.loop_lag = LoopLagMonitor()
+        self.stages = {}
+        self.stage_counts = Counter()
+        self.stage_seconds = Counter()
+        self.discord = DiscordCallCounter()
+        self.profiler = SamplingProfiler()
+
+    def start(self):
+        """Start the lag monitor and hook the Discord counters (call from the event loop)"""
+        self.loop_lag.start()
+        self.discord.install()
+
+    async def stop(self):
+        await self.loop_lag.stop()
+        self.profiler.stop()
+
+    def record(self, stage, seconds):
+        """
+        Record one run of a stage
+
+        Args:
+            stage: Stage name (see STAGES)
+            seconds: Duration from time.perf_counter()
+        """
+        sketch = self.stages.get(stage)
+        if sketch is None:
+            sketch = self.stages[stage] = _sketch()
+        sketch.add(seconds * 1000)
+        self.stage_counts[stage] += 1
+        self.stage_seconds[stage] += seconds
+
+    @contextmanager
+    def stage(self, name):
+        """Time the enclosed block as one run of a stage"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def snapshot(self):
+        """
+        Current readings for the /debug command
+
+        Returns:
+            dict: loop_lag, stages and discord sections
+        """
+        (lag_p50, lag_p99), _ = self.loop_lag.sketch.quantiles((0.5, 0.99))
+        stages = {}
+        ordered = [s for s in STAGES if s in self.stages] + sorted(s for s in self.stages if s not in STAGES)
+        for name in ordered:
+            (p50, p95, p99), count = self.stages[name].quantiles((0.5, 0.95, 0.99))
+            stages[name] = {'p50': p50, 'p95': p95, 'p99': p99, 'recent': count,
+                            'total': self.stage_counts[name]}
+        return {
+            'loop_lag': {'last': self.loop_lag.last, 'p50': lag_p50, 'p99': lag_p99, 'max': self.loop_lag.max},
+            'stages': stages,
+            'discord': {'calls': self.discord.calls, 'rate_limited': self.discord.rate_limited,
+                        'global_rate_limited': self.discord.global_rate_limited,
+                        'statuses': dict(self.discord.statuses)}
+        }
+
+    def metrics_lines(self, labels):
+        """
+        Prometheus exposition lines
+
+        Args:
+            labels: Label formatter from metrics_server
+
+        Returns:
+            list: Lines to append to the metrics body
+        """
+        lines = []
+        data = self.snapshot()
+
+        lines.append('# HELP lavalink_monitor_loop_lag_milliseconds Event loop lag over the sliding window')
+        lines.append('# TYPE lavalink_monitor_loop_lag_milliseconds gauge')
+        for quantile, value in (('0.5', data['loop_lag']['p50']), ('0.99', data['loop_lag']['p99'])):
+            if value is not None:
+                lines.append(f"lavalink_monitor_loop_lag_milliseconds{labels(quantile=quantile)} {value:.3f}")
+        lines.append('# HELP lavalink_monitor_loop_lag_max_milliseconds Worst event loop lag since start')
+        lines.append('# TYPE lavalink_monitor_loop_lag_max_milliseconds gauge')
+        lines.append(f"lavalink_monitor_loop_lag_max_milliseconds {self.loop_lag.max:.3f}")
+
+        lines.append('# HELP lavalink_monitor_stage_milliseconds Monitor cycle stage durations over the sliding window')
+        lines.append('# TYPE lavalink_monitor_stage_milliseconds gauge')
+        for name, stage in data['stages'].items():
+            for quantile, key in (('0.5', 'p50'), ('0.95', 'p95'), ('0.99', 'p99')):
+                if stage[key] is not None:
+                    lines.append(f"lavalink_monitor_stage_milliseconds{labels(stage=name, quantile=quantile)} {stage[key]:.3f}")
+        lines.append('# HELP lavalink_monitor_stage_seconds_total Time spent per stage since start')
+        lines.append('# TYPE lavalink_monitor_stage_seconds_total counter')
+        for name in data['stages']:
+            lines.append(f"lavalink_monitor_stage_seconds_total{labels(stage=name)} {self.stage_seconds[name]:.6f}")
+        lines.append('# HELP lavalink_monitor_stage_runs_total Runs per stage since start')
+        lines.append('# TYPE lavalink_monitor_stage_runs_total counter')
+        for name in data['stages']:
+            lines.append(f"lavalink_monitor_stage_runs_total{labels(stage=name)} {self.stage_counts[name]}")
+
+        lines.append('# HELP lavalink_monitor_discord_requests_total Discord REST responses by status')
+        lines.append('# TYPE lavalink_monitor_discord_requests_total counter')
+        for status, count in sorted(self.discord.statuses.items()):
+            lines.append(f"lavalink_monitor_discord_requests_total{labels(status=status)} {count}")
+        lines.append('# HELP lavalink_monitor_discord_rate_limits_total Discord 429 responses')
+        lines.append('# TYPE lavalink_monitor_discord_rate_limits_total counter')
+        lines.append(f"lavalink_monitor_discord_rate_limits_total {self.discord.rate_limited}")
+        lines.append(f"lavalink_monitor_discord_rate_limits_total{labels(scope='global')} {self.discord.global_rate_limited}")
+        return lines
+
+def format_debug_report(data, profile=None):
+    """
+    Plain-text summary of an instrumentation snapshot (fits an embed field)
+
+    Args:
+        data: Instrumentation.snapshot()
+        profile: Optional SamplingProfiler.report()
+
+    Returns:
+        dict: Section title -> text
+    """
+    def ms(value):
+        return "N/A" if value is None else f"{value:.1f}ms"
+
+    lag = data['loop_lag']
+    sections = {
+        '⏱️ Event Loop Lag': f"Last `{ms(lag['last'])}` · p50 `{ms(lag['p50'])}` · p99 `{ms(lag['p99'])}` · max `{ms(lag['max'])}`"
+    }
+
+    stage_lines = [f"**{name}** p50 `{ms(s['p50'])}` p95 `{ms(s['p95'])}` p99 `{ms(s['p99'])}` ({s['total']} runs)"
+                   for name, s in data['stages'].items()]
+    sections['🧩 Stages'] = '\n'.join(stage_lines) or "No cycles yet"
+
+    discord_data = data['discord']
+    statuses = ', '.join(f"{status}: {count}" for status, count in sorted(discord_data['statuses'].items()))
+    sections['📨 Discord API'] = (f"Calls `{discord_data['calls']}` · 429s `{discord_data['rate_limited']}` "
+                                  f"(global `{discord_data['global_rate_limited']}`)\n{statuses or 'No calls yet'}")
+
+    if profile is not None:
+        if profile['samples']:
+            hot = '\n'.join(f"`{percent:5.1f}%` {label}" for label, percent in profile['own'][:8])
+            sections['🔥 Profile'] = (f"{profile['samples']} samples over {profile['seconds']:.0f}s, "
+                                     f"loop idle {profile['idle']:.0f}% (own time)\n{hot}")
+        else:
+            sections['🔥 Profile'] = "No samples yet"
+    return sections
+
+instrumentation = Instrumentation()
@@ -0,0 +1,111 @@
+import asyncio
+import ipaddress
+import socket
+import time
+import aiohttp
+from config import IP_PROVIDERS, IP_CACHE_TTL, IP_LOOKUP_TIMEOUT
+from http_client import get_session
+
+def get_local_ip():
+    """
+    Get the address of the interface used for outbound traffic
+
+    Connecting a UDP socket only selects a route, no packet is sent.
+
+    Returns:
+        str: Local IP address, or None if it can't be determined
+    """
+    try:
+        s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        try:
+            s.connect(("8.8.8.8", 80))
+            return s.getsockname()[0]
+        finally:
+            s.close()
+    except OSError:
+        return None
+
+class IPResolver:
+    """
+    Async public IP lookup with a TTL cache and in-flight request coalescing
+    """
+
+    def __init__(self, providers=IP_PROVIDERS, ttl=IP_CACHE_TTL, timeout=IP_LOOKUP_TIMEOUT):
+        self.providers = providers
+        self.ttl = ttl
+        self.timeout = timeout
+        self.ip = None
+        self.resolved_at = 0
+        self._inflight = None
+
+    def is_fresh(self):
+        """Whether the cached IP is still within its TTL"""
+        return self.ip is not None and time.monotonic() - self.resolved_at < self.ttl
+
+    async def resolve(self, force=False):
+        """
+        Get the public IP, querying providers only when the cache is stale
+
+        Concurrent callers share a single in-flight lookup.
+
+        Args:
+            force: Ignore the cached value
+
+        Returns:
+            str: Public IP address, or "Unknown"
+        """
+        if not force and self.is_fresh():
+            return self.ip
+
+        if self._inflight is None or self._inflight.done():
+            self._inflight = asyncio.create_task(self._lookup())
+
+        # Shield so one caller being cancelled doesn't cancel the shared lookup
+        ip = await asyncio.shield(self._inflight)
+        return ip or self.ip or "Unknown"
+
+    async def _lookup(self):
+        """Query all providers concurrently and keep the first valid answer"""
+        tasks = [asyncio.create_task(self._query(url)) for url in self.providers]
+        ip = None
+
+        try:
+            for next_done in asyncio.as_completed(tasks, timeout=self.timeout):
+                try:
+                    ip = await next_done
+                except asyncio.TimeoutError:
+                    break
+                if ip:
+                    break
+        finally:
+            for task in tasks:
+                task.cancel()
+
+        if not ip:
+            ip = get_local_ip()
+
+        if ip:
+            self.ip = ip
+            self.resolved_at = time.monotonic()
+
+        return ip
+
+    async def _query(self, url):
+        """
+        Ask one provider for our address
+
+        Returns:
+            str: IP address, or None if the provider failed
+        """
+        try:
+            timeout = aiohttp.ClientTimeout(total=self.timeout)
+            async with get_session().get(url, timeout=timeout) as r:
+                if r.status != 200:
+                    return None
+                ip = (await r.text()).strip()
+                ipaddress.ip_address(ip)
+                return ip
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            return None
@@ -0,0 +1,258 @@
+import math
+import time
+from array import array
+import aiohttp
+from config import (
+    LATENCY_WINDOW,
+    LATENCY_SLICES,
+    LATENCY_RELATIVE_ERROR,
+    LATENCY_MIN_MS,
+    LATENCY_MAX_MS,
+    LATENCY_MIN_SAMPLES
+)
+
+# Request phases tracked per node
+PHASES = ('dns', 'connect', 'ttfb', 'total')
+
+class RequestTiming:
+    """
+    Phase timings of one HTTP request, filled in by the trace hooks (ms)
+
+    `connect` includes the TLS handshake: aiohttp reports connection
+    creation as one step and has no separate TLS hook. `dns` and `connect`
+    stay None when a cached address or a kept-alive connection was used.
+    """
+
+    __slots__ = ('start', 'sent', 'dns', 'connect', 'ttfb', 'total')
+
+    def __init__(self):
+        self.start = None
+        self.sent = None
+        self.dns = None
+        self.connect = None
+        self.ttfb = None
+        self.total = None
+
+class _Context:
+    """Per-request trace state"""
+
+    __slots__ = ('timing', 'dns_mark', 'connect_mark')
+
+    def __init__(self, trace_request_ctx=None):
+        self.timing = trace_request_ctx if isinstance(trace_request_ctx, RequestTiming) else None
+        self.dns_mark = None
+        self.connect_mark = None
+
+def create_trace_config():
+    """
+    aiohttp hooks that time DNS, connect and time-to-first-byte with perf_counter
+
+    Only requests started with `trace_request_ctx=RequestTiming()` are timed.
+
+    Returns:
+        aiohttp.TraceConfig: Config to pass to the client session
+    """
+    trace_config = aiohttp.TraceConfig(trace_config_ctx_factory=_Context)
+
+    async def on_request_start(session, context, params):
+        if context.timing:
+            context.timing.start = time.perf_counter()
+
+    async def on_dns_start(session, context, params):
+        context.dns_mark = time.perf_counter()
+
+    async def on_dns_end(session, context, params):
+        if context.timing and context.dns_mark is not None:
+            context.timing.dns = (time.perf_counter() - context.dns_mark) * 1000
+
+    async def on_connect_start(session, context, params):
+        context.connect_mark = time.perf_counter()
+
+    async def on_connect_end(session, context, params):
+        timing = context.timing
+        if timing and context.connect_mark is not None:
+            elapsed = (time.perf_counter() - context.connect_mark) * 1000
+            # aiohttp resolves the host inside connection creation: keep DNS out of connect
+            if timing.dns is not None and context.dns_mark is not None and context.dns_mark >= context.connect_mark:
+                elapsed -= timing.dns
+            timing.connect = max(elapsed, 0.0)
+
+    async def on_headers_sent(session, context, params):
+        if context.timing:
+            context.timing.sent = time.perf_counter()
+
+    async def on_request_end(session, context, params):
+        timing = context.timing
+        if timing and timing.start is not None:
+            now = time.perf_counter()
+            timing.total = (now - timing.start) * 1000
+            setup = (timing.dns or 0) + (timing.connect or 0)
+            sent = timing.sent if timing.sent is not None else timing.start + setup / 1000
+            timing.ttfb = (now - sent) * 1000
+
+    trace_config.on_request_start.append(on_request_start)
+    trace_config.on_dns_resolvehost_start.append(on_dns_start)
+    trace_config.on_dns_resolvehost_end.append(on_dns_end)
+    trace_config.on_connection_create_start.append(on_connect_start)
+    trace_config.on_connection_create_end.append(on_connect_end)
+    if hasattr(trace_config, 'on_request_headers_sent'):
+        trace_config.on_request_headers_sent.append(on_headers_sent)
+    trace_config.on_request_end.append(on_request_end)
+    return trace_config
+
+class WindowedSketch:
+    """
+    Sliding-window quantile sketch with fixed memory
+
+    Values land in logarithmic buckets (each within LATENCY_RELATIVE_ERROR
+    of its bucket's value), counted per time slice. Old slices are zeroed
+    as the window moves, so memory never grows with the number of samples.
+    """
+
+    def __init__(self, window=LATENCY_WINDOW, slices=LATENCY_SLICES, relative_error=LATENCY_RELATIVE_ERROR,
+                 min_value=LATENCY_MIN_MS, max_value=LATENCY_MAX_MS):
+        self.gamma = (1 + relative_error) / (1 - relative_error)
+        self.log_gamma = math.log(self.gamma)
+        self.min_value = min_value
+        self.offset = math.ceil(math.log(min_value) / self.log_gamma)
+        self.size = math.ceil(math.log(max_value) / self.log_gamma) - self.offset + 1
+        self.slice_length = window / slices
+        self.slices = [array('H', bytes(2 * self.size)) for _ in range(slices)]
+        self.slice_ids = [None] * slices
+        # Running sum of the live slices, so queries don't re-merge them
+        self.totals = array('I', bytes(4 * self.size))
+        self.count = 0
+
+    def _bucket(self, value):
+        if value <= self.min_value:
+            return 0
+        return min(math.ceil(math.log(value) / self.log_gamma) - self.offset, self.size - 1)
+
+    def _value(self, bucket):
+        # Midpoint of the bucket, within the relative error of any value in it
+        return 2 * self.gamma ** (bucket + self.offset) / (self.gamma + 1)
+
+    def _expire(self, current):
+        """Drop slices that fell out of the window"""
+        for i, slice_id in enumerate(self.slice_ids):
+            if slice_id is not None and current - slice_id >= len(self.slices):
+                counts = self.slices[i]
+                for b in range(self.size):
+                    if counts[b]:
+                        self.totals[b] -= counts[b]
+                        self.count -= counts[b]
+                        counts[b] = 0
+                self.slice_ids[i] = None
+
+    def add(self, value, now=None):
+        slice_id = int((now or time.monotonic()) // self.slice_length)
+        self._expire(slice_id)
+
+        i = slice_id % len(self.slices)
+        counts = self.slices[i]
+        self.slice_ids[i] = slice_id
+
+        b = self._bucket(value)
+        if counts[b] < 0xFFFF:
+            counts[b] += 1
+            self.totals[b] += 1
+            self.count += 1
+
+    def quantiles(self, qs, now=None):
+        """
+        Values at several quantiles over the current window
+
+        Returns:
+            tuple: (list of values or None, sample count)
+        """
+        self._expire(int((now or time.monotonic()) // self.slice_length))
+        total = self.count
+        if not total:
+            return [None] * len(qs), 0
+
+        targets = sorted((q * (total - 1), k) for k, q in enumerate(qs))
+        values = [None] * len(qs)
+        seen = 0
+        t = 0
+        for bucket, count in enumerate(self.totals):
+            seen += count
+            while t < len(targets) and targets[t][0] < seen:
+                values[targets[t][1]] = self._value(bucket)
+                t += 1
+            if t == len(targets):
+                break
+        return values, total
+
+class LatencySummary:
+    """
+    Windowed percentiles of one node's request latency (ms)
+    """
+
+    __slots__ = ('p50', 'p95', 'p99', 'count', 'phases')
+
+    def __init__(self, p50, p95, p99, count, phases):
+        self.p50 = p50
+        self.p95 = p95
+        self.p99 = p99
+        self.count = count
+        self.phases = phases  # phase -> (p50, p95, p99)
+
+    @property
+    def effective(self):
+        """p95 once the window has enough samples, the median before that"""
+        return self.p95 if self.count >= LATENCY_MIN_SAMPLES else self.p50
+
+class LatencyTracker:
+    """
+    Per-node latency sketches for every request phase
+    """
+
+    def __init__(self):
+        self.nodes = {}
+
+    def observe(self, name, timing, now=None):
+        """
+        Record one timed request
+
+        Args:
+            name: Node name
+            timing: RequestTiming filled in by the trace hooks
+        """
+        if timing.total is None:
+            return
+        sketches = self.nodes.get(name)
+        if sketches is None:
+            sketches = self.nodes[name] = {phase: WindowedSketch() for phase in PHASES}
+        for phase in PHASES:
+            value = getattr(timing, phase)
+            if value is not None:
+                sketches[phase].add(value, now)
+
+    def summary(self, name, now=None):
+        """
+        Current percentiles for one node
+
+        Returns:
+            LatencySummary: Percentiles of time-to-first-byte plus every phase, or None
+        """
+        sketches = self.nodes.get(name)
+        if sketches is None:
+            return None
+
+        phases = {}
+        count = 0
+        for phase in PHASES:
+            values, total = sketches[phase].quantiles((0.5, 0.95, 0.99), now)
+            phases[phase] = tuple(values)
+            if phase == 'ttfb':
+                count = total
+        if not count:
+            return None
+
+        p50, p95, p99 = phases['ttfb']
+        return LatencySummary(p50, p95, p99, count, phases)
+
+    def forget(self, name):
+        self.nodes.pop(name, None)
+
+latency_tracker = LatencyTracker()
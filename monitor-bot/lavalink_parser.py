@@ -2,10 +2,14 @@ import configparser
 import os
 from config import LAVALINK_CONFIG_FILE, REGION_EMOJIS
 
-def parse_lavalink_config(config_file=LAVALINK_CONFIG_FILE):
+def parse_lavalink_config(config_file=LAVALINK_CONFIG_FILE, verbose=True):
     """
     Parse lavalink.ini file to extract node configurations
     
+    Args:
+        config_file: Path to the ini file
+        verbose: Print a line per loaded node
+    
     Returns:
         list: List of dictionaries containing node configurations
     """
@@ -47,7 +51,8 @@ def parse_lavalink_config(config_file=LAVALINK_CONFIG_FILE):
                         break
                 
                 nodes.append(node)
-                print(f"✅ Loaded Lavalink node: {node['name']} ({node['url']})")
+                if verbose:
+                    print(f"✅ Loaded Lavalink node: {node['name']} ({node['url']})")
         
         if not nodes:
             print("⚠️  No Lavalink nodes found in config file!")
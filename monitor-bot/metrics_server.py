@@ -0,0 +1,199 @@
+import time
+from aiohttp import web
+from config import METRICS_HOST, METRICS_PORT, PING_BUCKETS_MS
+from instrumentation import instrumentation
+
+def _escape(value):
+    """Escape a Prometheus label value"""
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _labels(**labels):
+    return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + '}'
+
+# (metric name, help text, NodeStats attribute) for per-node gauges
+NODE_GAUGES = (
+    ('lavalink_node_players', 'Connected players', 'players'),
+    ('lavalink_node_playing_players', 'Players currently playing', 'playing_players'),
+    ('lavalink_node_uptime_seconds', 'Node uptime', 'uptime_seconds'),
+    ('lavalink_node_cpu_cores', 'CPU cores available to the node', 'cores'),
+    ('lavalink_node_cpu_system_load', 'System CPU load (0-1)', 'system_load'),
+    ('lavalink_node_cpu_lavalink_load', 'Lavalink process CPU load (0-1)', 'lavalink_load'),
+    ('lavalink_node_memory_used_bytes', 'JVM memory used', 'memory_used'),
+    ('lavalink_node_memory_free_bytes', 'JVM memory free', 'memory_free'),
+    ('lavalink_node_memory_allocated_bytes', 'JVM memory allocated', 'memory_allocated'),
+    ('lavalink_node_memory_reservable_bytes', 'JVM memory reservable', 'memory_reservable'),
+    ('lavalink_node_frames_sent', 'Audio frames sent per minute', 'frames_sent'),
+    ('lavalink_node_frames_nulled', 'Audio frames nulled per minute', 'frames_nulled'),
+    ('lavalink_node_frames_deficit', 'Audio frame deficit per minute', 'frames_deficit'),
+)
+
+# (metric name, help text, FrameQuality attribute)
+FRAME_GAUGES = (
+    ('lavalink_node_frame_loss_percent', 'Nulled + deficit frames over the rolling window', 'avg_loss_percent'),
+    ('lavalink_node_frame_deficit_percent', 'Deficit frames over the rolling window', 'avg_deficit_percent'),
+    ('lavalink_node_frame_deficit_trend', 'Change of the deficit percentage per minute', 'deficit_trend'),
+)
+
+# (metric name, help text, system stats key)
+HOST_GAUGES = (
+    ('lavalink_monitor_host_cpu_percent', 'Monitor host CPU usage', 'cpu_percent'),
+    ('lavalink_monitor_host_memory_percent', 'Monitor host RAM usage', 'memory_percent'),
+    ('lavalink_monitor_host_disk_percent', 'Monitor host disk usage', 'disk_percent'),
+)
+
+class PingHistogram:
+    """
+    Cumulative Prometheus histogram of one node's ping
+
+    Only new measurements are counted: a ping re-used between polls (same
+    ping_at) was already observed. Stats sockets re-time the ping between
+    stats frames, so this is not the snapshot's fetched_at.
+    """
+
+    def __init__(self, buckets=PING_BUCKETS_MS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+        self.last_measured = None
+
+    def observe(self, value_ms):
+        self.count += 1
+        self.sum += value_ms
+        for i, bound in enumerate(self.buckets):
+            if value_ms <= bound:
+                self.counts[i] += 1
+
+class MetricsServer:
+    """
+    Embedded /metrics endpoint serving the latest polled values
+
+    Scrapes never trigger fetches: `update` renders the exposition text once
+    per poll cycle and the handler returns that cached body.
+    """
+
+    def __init__(self, host=METRICS_HOST, port=METRICS_PORT):
+        self.host = host
+        self.port = port
+        self.app = web.Application()
+        self.app.router.add_get('/metrics', self.handle_metrics)
+        self.runner = None
+        self.histograms = {}
+        self.body = b''
+
+    async def start(self):
+        """Start serving (safe to call more than once)"""
+        if self.runner is not None:
+            return
+
+        runner = web.AppRunner(self.app, access_log=None)
+        await runner.setup()
+        try:
+            await web.TCPSite(runner, self.host, self.port).start()
+        except OSError as e:
+            print(f"❌ Metrics server failed to bind {self.host}:{self.port}: {e}")
+            await runner.cleanup()
+            return
+
+        self.runner = runner
+        print(f"📈 Metrics available at http://{self.host}:{self.port}/metrics")
+        if any(resource.canonical == '/nodes/best' for resource in self.app.router.resources()):
+            print(f"🎯 Node selection at http://{self.host}:{self.port}/nodes/best?region=<region>")
+
+    async def stop(self):
+        if self.runner is not None:
+            await self.runner.cleanup()
+            self.runner = None
+
+    def forget(self, name):
+        """Drop a removed node's ping histogram"""
+        self.histograms.pop(name, None)
+
+    async def handle_metrics(self, request):
+        return web.Response(body=self.body, headers={'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'})
+
+    def update(self, lavalink_data, system_data=None):
+        """
+        Render a new snapshot from one poll cycle
+
+        Args:
+            lavalink_data: List of NodeSnapshot
+            system_data: Host system statistics
+        """
+        lines = []
+
+        # Node availability
+        lines.append('# HELP lavalink_node_up Whether the node answered the last poll')
+        lines.append('# TYPE lavalink_node_up gauge')
+        labels = {node.name: _labels(node=node.name, region=node.region) for node in lavalink_data}
+        for node in lavalink_data:
+            lines.append(f"lavalink_node_up{labels[node.name]} {1 if node.online else 0}")
+
+        # Node stats
+        online = [n for n in lavalink_data if n.online]
+        for metric, help_text, attribute in NODE_GAUGES:
+            lines.append(f'# HELP {metric} {help_text}')
+            lines.append(f'# TYPE {metric} gauge')
+            for node in online:
+                value = getattr(node.stats, attribute)
+                if value is not None:
+                    lines.append(f"{metric}{labels[node.name]} {value}")
+
+        # Ping histogram
+        for node in online:
+            if node.ping is not None:
+                histogram = self.histograms.get(node.name)
+                if histogram is None:
+                    histogram = self.histograms[node.name] = PingHistogram()
+                if node.ping_at != histogram.last_measured:
+                    histogram.last_measured = node.ping_at
+                    histogram.observe(node.ping)
+
+        regions = {n.name: n.region for n in lavalink_data}
+        lines.append('# HELP lavalink_node_ping_milliseconds Stats request round-trip time')
+        lines.append('# TYPE lavalink_node_ping_milliseconds histogram')
+        for name, histogram in self.histograms.items():
+            base = {'node': name, 'region': regions.get(name, '')}
+            for bound, count in zip(histogram.buckets, histogram.counts):
+                lines.append(f"lavalink_node_ping_milliseconds_bucket{_labels(**base, le=bound)} {count}")
+            lines.append(f"lavalink_node_ping_milliseconds_bucket{_labels(**base, le='+Inf')} {histogram.count}")
+            lines.append(f"lavalink_node_ping_milliseconds_sum{_labels(**base)} {histogram.sum}")
+            lines.append(f"lavalink_node_ping_milliseconds_count{_labels(**base)} {histogram.count}")
+
+        # Windowed latency percentiles per request phase
+        lines.append('# HELP lavalink_node_latency_milliseconds Request latency percentiles over the sliding window')
+        lines.append('# TYPE lavalink_node_latency_milliseconds gauge')
+        for node in online:
+            if node.latency is None:
+                continue
+            for phase, values in node.latency.phases.items():
+                for quantile, value in zip(('0.5', '0.95', '0.99'), values):
+                    if value is not None:
+                        phase_labels = _labels(node=node.name, region=node.region, phase=phase, quantile=quantile)
+                        lines.append(f"lavalink_node_latency_milliseconds{phase_labels} {value:.3f}")
+
+        # Frame loss over the rolling window
+        for metric, help_text, attribute in FRAME_GAUGES:
+            lines.append(f'# HELP {metric} {help_text}')
+            lines.append(f'# TYPE {metric} gauge')
+            for node in online:
+                if node.frames is not None:
+                    value = getattr(node.frames, attribute)
+                    if value is not None:
+                        lines.append(f"{metric}{labels[node.name]} {value:.3f}")
+
+        # Host system
+        if system_data:
+            for metric, help_text, key in HOST_GAUGES:
+                lines.append(f'# HELP {metric} {help_text}')
+                lines.append(f'# TYPE {metric} gauge')
+                lines.append(f"{metric} {system_data[key]}")
+
+        # Monitor's own loop lag, stage timings and Discord call counters
+        lines.extend(instrumentation.metrics_lines(_labels))
+
+        lines.append('# HELP lavalink_monitor_last_update_timestamp_seconds Time of the last poll cycle')
+        lines.append('# TYPE lavalink_monitor_last_update_timestamp_seconds gauge')
+        lines.append(f"lavalink_monitor_last_update_timestamp_seconds {time.time():.3f}")
+
+        self.body = ('\n'.join(lines) + '\n').encode('utf-8')
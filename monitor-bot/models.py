@@ -0,0 +1,178 @@
+import json
+import time
+
+try:
+    import orjson
+except ImportError:  # optional speedup
+    orjson = None
+
+def loads(data):
+    """
+    Decode a JSON payload, using orjson when it is installed
+
+    Args:
+        data: bytes or str
+
+    Returns:
+        Decoded value
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+class NodeStats:
+    """
+    One `/v4/stats` payload, flattened once at ingestion
+
+    Derived values the dashboard and alerts need (RAM percent, effective
+    CPU load) are computed here so renders only read attributes.
+    """
+
+    __slots__ = (
+        'players', 'playing_players', 'uptime_ms',
+        'memory_free', 'memory_used', 'memory_allocated', 'memory_reservable',
+        'cores', 'system_load', 'lavalink_load',
+        'frames_sent', 'frames_nulled', 'frames_deficit',
+        'ram_percent', 'cpu_load'
+    )
+
+    def __init__(self, players=0, playing_players=0, uptime_ms=0,
+                 memory_free=0, memory_used=0, memory_allocated=0, memory_reservable=0,
+                 cores=0, system_load=None, lavalink_load=0.0,
+                 frames_sent=None, frames_nulled=None, frames_deficit=None):
+        self.players = players
+        self.playing_players = playing_players
+        self.uptime_ms = uptime_ms
+        self.memory_free = memory_free
+        self.memory_used = memory_used
+        self.memory_allocated = memory_allocated
+        self.memory_reservable = memory_reservable
+        self.cores = cores
+        self.system_load = system_load
+        self.lavalink_load = lavalink_load
+        self.frames_sent = frames_sent
+        self.frames_nulled = frames_nulled
+        self.frames_deficit = frames_deficit
+
+        # Derived
+        self.ram_percent = memory_used / memory_allocated * 100 if memory_allocated else 0.0
+        # Some hosts report no system load (None), fall back to the Lavalink process
+        self.cpu_load = system_load if system_load is not None else lavalink_load
+
+    @classmethod
+    def from_json(cls, data):
+        """
+        Build stats from a decoded `/v4/stats` payload (or websocket stats frame)
+
+        Args:
+            data: Decoded JSON object
+
+        Returns:
+            NodeStats: Parsed stats
+        """
+        memory = data.get('memory') or {}
+        cpu = data.get('cpu') or {}
+        frames = data.get('frameStats') or {}
+
+        return cls(
+            data.get('players', 0),
+            data.get('playingPlayers', 0),
+            data.get('uptime', 0),
+            memory.get('free', 0),
+            memory.get('used', 0),
+            memory.get('allocated', 0),
+            memory.get('reservable', 0),
+            cpu.get('cores', 0),
+            cpu.get('systemLoad'),
+            cpu.get('lavalinkLoad', 0.0),
+            frames.get('sent'),
+            frames.get('nulled'),
+            frames.get('deficit')
+        )
+
+    def to_json(self):
+        """Inverse of `from_json`, in the `/v4/stats` shape"""
+        data = {
+            'players': self.players,
+            'playingPlayers': self.playing_players,
+            'uptime': self.uptime_ms,
+            'memory': {'free': self.memory_free, 'used': self.memory_used,
+                       'allocated': self.memory_allocated, 'reservable': self.memory_reservable},
+            'cpu': {'cores': self.cores, 'systemLoad': self.system_load, 'lavalinkLoad': self.lavalink_load}
+        }
+        if self.frames_sent is not None:
+            data['frameStats'] = {'sent': self.frames_sent, 'nulled': self.frames_nulled,
+                                  'deficit': self.frames_deficit}
+        return data
+
+    @property
+    def uptime_seconds(self):
+        return self.uptime_ms / 1000
+
+    @property
+    def cpu_percent(self):
+        return self.cpu_load * 100
+
+class NodeSnapshot:
+    """
+    Result of one poll of one node
+    """
+
+    __slots__ = ('name', 'region', 'url', 'online', 'ping', 'stats', 'error', 'fetched_at', 'ip', 'alias_of',
+                 'latency', 'frames', 'ping_at')
+
+    def __init__(self, name, region, url, online, ping=None, stats=None, error=None,
+                 fetched_at=None, ip=None, alias_of=None, latency=None, ping_at=None):
+        self.name = name
+        self.region = region
+        self.url = url
+        self.online = online
+        self.ping = ping
+        self.stats = stats
+        self.error = error
+        self.fetched_at = fetched_at
+        self.ip = ip
+        self.alias_of = alias_of
+        self.latency = latency  # latency.LatencySummary, when polled over HTTP
+        self.frames = None      # frame_quality.FrameQuality, set by the frame tracker
+        # When the ping was measured: a stats socket re-times it between stats frames
+        self.ping_at = ping_at if ping_at is not None else fetched_at
+
+    @classmethod
+    def up(cls, node, stats, ping, fetched_at, ip=None, ping_at=None):
+        """Snapshot of a node that answered (ping_at defaults to fetched_at)"""
+        return cls(node['name'], node['region'], node['url'], True, ping, stats,
+                   fetched_at=fetched_at, ip=ip, ping_at=ping_at)
+
+    @classmethod
+    def down(cls, node, error, ip=None):
+        """Snapshot of a node that didn't answer (fetched_at is when it failed)"""
+        return cls(node['name'], node['region'], node['url'], False, error=error, fetched_at=time.time(), ip=ip)
+
+    def to_dict(self):
+        """Plain data for persisting (latency and frame windows are rebuilt live)"""
+        return {
+            'name': self.name, 'region': self.region, 'url': self.url, 'online': self.online,
+            'ping': self.ping, 'stats': self.stats.to_json() if self.stats is not None else None,
+            'error': self.error, 'fetched_at': self.fetched_at, 'ip': self.ip, 'alias_of': self.alias_of
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        stats = data.get('stats')
+        return cls(data['name'], data.get('region'), data.get('url'), data.get('online', False),
+                   data.get('ping'), NodeStats.from_json(stats) if stats is not None else None,
+                   data.get('error'), data.get('fetched_at'), data.get('ip'), data.get('alias_of'))
+
+    @property
+    def steady_ping(self):
+        """Ping to judge health by: the windowed p95 once there are enough samples, else the latest ping"""
+        if self.latency is not None:
+            return self.latency.effective
+        return self.ping
+
+    def as_alias(self, node):
+        """Copy of this snapshot under another config entry's identity"""
+        return NodeSnapshot(node['name'], node['region'], node['url'], self.online, self.ping, self.stats,
+                            self.error, self.fetched_at, node['host'] if self.ip is not None else None,
+                            self.name, self.latency, self.ping_at)
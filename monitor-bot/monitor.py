@@ -1,58 +1,201 @@
 import aiohttp
 import asyncio
+import socket
+import threading
 import time
 import psutil
 import platform
-import cpuinfo
-from config import TIMEOUT
+from urllib.parse import urlsplit
+from http_client import get_session
+from models import NodeStats, NodeSnapshot, loads
+from latency import RequestTiming, latency_tracker
+from instrumentation import instrumentation
+from config import (
+    HOST_SAMPLE_INTERVAL,
+    FETCH_CONCURRENCY,
+    FETCH_CONCURRENCY_PER_HOST,
+    FETCH_CONNECT_TIMEOUT,
+    FETCH_READ_TIMEOUT,
+    FETCH_CYCLE_DEADLINE
+)
 
-async def get_lavalink_stats(nodes):
+def offline_result(node, error):
     """
-    Fetch stats from all Lavalink nodes
+    Build the result for a node that didn't answer
     
     Args:
-        nodes: List of node configurations
+        node: Node configuration
+        error: Short error description
         
     Returns:
-        list: List of node stats
+        NodeSnapshot: Offline node info
+    """
+    return NodeSnapshot.down(node, error)
+
+def describe_error(error):
+    """
+    Turn a fetch exception into a short, stable error label
+    
+    Args:
+        error: Exception raised while fetching
+        
+    Returns:
+        str: Error description
     """
-    results = []
+    if isinstance(error, getattr(aiohttp, 'ConnectionTimeoutError', ())):
+        return "Connect timeout"
+    if isinstance(error, getattr(aiohttp, 'SocketTimeoutError', ())):
+        return "Read timeout"
+    if isinstance(error, asyncio.TimeoutError):
+        return "Timeout"
+    if isinstance(error, aiohttp.ClientConnectorCertificateError):
+        return "TLS certificate error"
+    if isinstance(error, aiohttp.ClientConnectorSSLError):
+        return "TLS error"
+    if isinstance(error, aiohttp.ClientConnectorError):
+        if isinstance(error.os_error, socket.gaierror):
+            return "DNS lookup failed"
+        if isinstance(error.os_error, ConnectionRefusedError):
+            return "Connection refused"
+        return "Connection failed"
+    if isinstance(error, aiohttp.ServerDisconnectedError):
+        return "Server disconnected"
+    if isinstance(error, (aiohttp.ContentTypeError, ValueError)):
+        return "Invalid response"
+    if isinstance(error, aiohttp.ClientError):
+        return type(error).__name__
+    return str(error) or type(error).__name__
+
+class FetchEngine:
+    """
+    Fetches many nodes with bounded concurrency and a per-cycle deadline
+    
+    A global cap and a per-host cap bound open sockets, connect and read
+    have their own timeouts, and whatever hasn't finished by the cycle
+    deadline is cancelled and reported as offline.
+    """
+    
+    def __init__(self, concurrency=FETCH_CONCURRENCY, per_host=FETCH_CONCURRENCY_PER_HOST,
+                 connect_timeout=FETCH_CONNECT_TIMEOUT, read_timeout=FETCH_READ_TIMEOUT,
+                 deadline=FETCH_CYCLE_DEADLINE):
+        self.concurrency = concurrency
+        self.per_host = per_host
+        self.deadline = deadline
+        self.timeout = aiohttp.ClientTimeout(
+            total=None,
+            sock_connect=connect_timeout,
+            sock_read=read_timeout
+        )
+        self._global_limit = None
+        self._host_limits = {}
+    
+    def _host_limit(self, node):
+        host = urlsplit(node['url']).hostname or node['url']
+        limit = self._host_limits.get(host)
+        if limit is None:
+            limit = self._host_limits[host] = asyncio.Semaphore(self.per_host)
+        return limit
     
-    async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=TIMEOUT)) as session:
-        tasks = []
+    async def _fetch_one(self, fetch, session, node):
+        if self._global_limit is None:
+            self._global_limit = asyncio.Semaphore(self.concurrency)
         
-        for node in nodes:
-            task = asyncio.create_task(fetch_node_stats(session, node))
-            tasks.append(task)
+        # Host first: a slow host's queued nodes must not hold global slots while they wait
+        async with self._host_limit(node), self._global_limit:
+            return await fetch(session, node, timeout=self.timeout)
+    
+    async def iter_results(self, nodes, fetch=None, session=None):
+        """
+        Yield results as each node answers
         
-        # Wait for all tasks to complete
-        node_results = await asyncio.gather(*tasks, return_exceptions=True)
+        Args:
+            nodes: List of node configurations
+            fetch: Coroutine fetching one node (defaults to fetch_node_stats)
+            session: Optional aiohttp session (defaults to the shared pooled session)
+            
+        Yields:
+            tuple: (node index, node stats)
+        """
+        fetch = fetch or fetch_node_stats
+        session = session or get_session()
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.deadline
         
-        for i, result in enumerate(node_results):
-            if isinstance(result, Exception):
-                # Node failed to respond
-                results.append({
-                    'name': nodes[i]['name'],
-                    'region': nodes[i]['region'],
-                    'url': nodes[i]['url'],
-                    'online': False,
-                    'error': str(result)
-                })
-            else:
-                results.append(result)
+        tasks = {asyncio.create_task(self._fetch_one(fetch, session, node)): i for i, node in enumerate(nodes)}
+        pending = set(tasks)
+        
+        try:
+            while pending:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                
+                done, pending = await asyncio.wait(pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    i = tasks[task]
+                    try:
+                        result = task.result()
+                    except Exception as e:
+                        result = offline_result(nodes[i], describe_error(e))
+                    yield i, result
+            
+            # Cancel stragglers at the cycle deadline
+            stragglers, pending = pending, set()
+            for task in stragglers:
+                task.cancel()
+            for task in stragglers:
+                yield tasks[task], offline_result(nodes[tasks[task]], "Deadline exceeded")
+        finally:
+            for task in pending:
+                task.cancel()
+    
+    async def fetch_all(self, nodes, fetch=None, session=None):
+        """
+        Fetch every node and return results in node order
+        
+        Returns:
+            list: List of node stats
+        """
+        results = [None] * len(nodes)
+        async for i, result in self.iter_results(nodes, fetch, session):
+            results[i] = result
+        return results
+
+fetch_engine = FetchEngine()
+
+async def get_lavalink_stats(nodes, session=None):
+    """
+    Fetch stats from all Lavalink nodes
+    
+    Args:
+        nodes: List of node configurations
+        session: Optional aiohttp session (defaults to the shared pooled session)
+        
+    Returns:
+        list: List of node stats
+    """
+    return await fetch_engine.fetch_all(nodes, session=session)
+
+def iter_lavalink_stats(nodes, session=None):
+    """
+    Fetch stats from all Lavalink nodes, yielding partial results as they arrive
     
-    return results
+    Returns:
+        async iterator: (node index, node stats) tuples
+    """
+    return fetch_engine.iter_results(nodes, session=session)
 
-async def fetch_node_stats(session, node):
+async def fetch_node_stats(session, node, timeout=None):
     """
     Fetch stats from a single Lavalink node
     
     Args:
         session: aiohttp session
         node: Node configuration
+        timeout: Optional aiohttp.ClientTimeout overriding the session default
         
     Returns:
-        dict: Node stats or error info
+        NodeSnapshot: Node stats or error info
     """
     try:
         # Prepare headers
@@ -61,71 +204,96 @@ async def fetch_node_stats(session, node):
             'Content-Type': 'application/json'
         }
         
-        # Measure ping time
-        start_time = time.time()
+        # Phase timings are filled in by the session's trace hooks
+        timing = RequestTiming()
         
         # Fetch stats from Lavalink v4 API
         stats_url = f"{node['url']}/v4/stats"
         
-        async with session.get(stats_url, headers=headers) as response:
-            ping_time = (time.time() - start_time) * 1000  # Convert to ms
+        async with session.get(stats_url, headers=headers, timeout=timeout, trace_request_ctx=timing) as response:
+            latency_tracker.observe(node['name'], timing)
             
             if response.status == 200:
-                stats_data = await response.json()
+                # Parse once into the typed model
+                body = await response.read()
+                with instrumentation.stage('parse'):
+                    stats = NodeStats.from_json(loads(body))
                 
-                return {
-                    'name': node['name'],
-                    'region': node['region'],
-                    'url': node['url'],
-                    'online': True,
-                    'ping': round(ping_time, 1),
-                    'stats': stats_data
-                }
+                # Ping is time to first byte, without DNS and connection setup
+                snapshot = NodeSnapshot.up(node, stats, round(timing.ttfb, 1), time.time())
+                snapshot.latency = latency_tracker.summary(node['name'])
+                return snapshot
             else:
-                return {
-                    'name': node['name'],
-                    'region': node['region'],
-                    'url': node['url'],
-                    'online': False,
-                    'error': f"HTTP {response.status}"
-                }
+                return offline_result(node, f"HTTP {response.status}")
                 
-    except asyncio.TimeoutError:
-        return {
-            'name': node['name'],
-            'region': node['region'],
-            'url': node['url'],
-            'online': False,
-            'error': "Timeout"
-        }
+    except asyncio.CancelledError:
+        raise
     except Exception as e:
-        return {
-            'name': node['name'],
-            'region': node['region'],
-            'url': node['url'],
-            'online': False,
-            'error': str(e)
-        }
+        return offline_result(node, describe_error(e))
 
-def get_system_stats():
+class HostProfile:
+    """
+    Host facts that never change for the life of the process
+    """
+    
+    def __init__(self):
+        # CPU Information (cpuinfo is slow, so it is only ever imported and run here)
+        try:
+            import cpuinfo
+            self.cpu_name = cpuinfo.get_cpu_info().get('brand_raw', 'Unknown CPU')
+        except Exception:
+            self.cpu_name = platform.processor() or 'Unknown CPU'
+        self.cpu_cores = psutil.cpu_count(logical=False)
+        self.cpu_threads = psutil.cpu_count(logical=True)
+        
+        # Format CPU info
+        self.cpu_label = self.cpu_name
+        if self.cpu_cores:
+            self.cpu_label += f" ({self.cpu_cores}C/{self.cpu_threads}T)"
+        
+        # System Information
+        self.os_info = f"{platform.system()} {platform.machine()}"
+        
+        # Capacity
+        self.memory_total = psutil.virtual_memory().total
+        self.memory_total_gb = self.memory_total / (1024**3)
+        self.disk_total = psutil.disk_usage('/').total
+        self.disk_total_gb = self.disk_total / (1024**3)
+
+_host_profile = None
+
+def get_host_profile():
     """
-    Get system statistics for the host machine
+    Get the static host profile, building it on first use
+    
+    Returns:
+        HostProfile: Cached host profile
+    """
+    global _host_profile
+    
+    if _host_profile is None:
+        _host_profile = HostProfile()
+    
+    return _host_profile
+
+def sample_system_stats():
+    """
+    Take one sample of system statistics for the host machine
+    
+    Static facts come from the cached host profile; only the dynamic
+    counters are read here. CPU usage is measured as the delta since the
+    previous call, so this never sleeps. It is meant to run on the sampler
+    thread, not the event loop.
     
     Returns:
         dict: System statistics
     """
     try:
+        profile = get_host_profile()
+        
         # CPU Information
-        cpu_info_obj = cpuinfo.get_cpu_info()
-        cpu_name = cpu_info_obj.get('brand_raw', 'Unknown CPU')
-        cpu_cores = psutil.cpu_count(logical=False)
-        cpu_threads = psutil.cpu_count(logical=True)
+        cpu_info_str = profile.cpu_label
         cpu_freq = psutil.cpu_freq()
-        
-        # Format CPU info
-        cpu_info_str = f"{cpu_name}"
-        if cpu_cores:
-            cpu_info_str += f" ({cpu_cores}C/{cpu_threads}T)"
         if cpu_freq:
             cpu_info_str += f" @ {cpu_freq.current/1000:.1f}GHz"
         
@@ -135,11 +303,6 @@ def get_system_stats():
         # Disk Information
         disk = psutil.disk_usage('/')
         
-        # System Information
-        system_info = platform.system()
-        architecture = platform.machine()
-        os_info = f"{system_info} {architecture}"
-        
         # Network Information (optional)
         try:
             network_stats = psutil.net_io_counters()
@@ -152,21 +315,21 @@ def get_system_stats():
         
         return {
             'cpu_info': cpu_info_str,
-            'cpu_percent': psutil.cpu_percent(interval=1),
-            'cpu_cores': cpu_cores,
-            'cpu_threads': cpu_threads,
-            'memory_total': memory.total,
+            'cpu_percent': psutil.cpu_percent(interval=None),
+            'cpu_cores': profile.cpu_cores,
+            'cpu_threads': profile.cpu_threads,
+            'memory_total': profile.memory_total,
             'memory_available': memory.available,
             'memory_percent': memory.percent,
-            'memory_used_gb': (memory.total - memory.available) / (1024**3),
-            'memory_total_gb': memory.total / (1024**3),
-            'disk_total': disk.total,
+            'memory_used_gb': (profile.memory_total - memory.available) / (1024**3),
+            'memory_total_gb': profile.memory_total_gb,
+            'disk_total': profile.disk_total,
             'disk_used': disk.used,
             'disk_free': disk.free,
             'disk_percent': disk.percent,
             'disk_used_gb': disk.used / (1024**3),
-            'disk_total_gb': disk.total / (1024**3),
-            'os_info': os_info,
+            'disk_total_gb': profile.disk_total_gb,
+            'os_info': profile.os_info,
             'network': network_info
         }
         
@@ -174,6 +337,56 @@ def get_system_stats():
         print(f"❌ Error getting system stats: {e}")
         return None
 
+class HostSampler:
+    """
+    Samples host metrics on a background thread and publishes the latest snapshot
+    """
+    
+    def __init__(self, interval=HOST_SAMPLE_INTERVAL):
+        self.interval = interval
+        self.latest = None
+        self._thread = None
+        self._stop_event = threading.Event()
+    
+    def start(self):
+        """Start the sampler thread if it isn't running"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self.run, name="host-sampler", daemon=True)
+        self._thread.start()
+    
+    def stop(self):
+        """Stop the sampler thread"""
+        self._stop_event.set()
+    
+    def run(self):
+        # Build the static profile once, then prime the CPU counter so the
+        # first published sample is a real delta
+        get_host_profile()
+        psutil.cpu_percent(interval=None)
+        
+        while not self._stop_event.wait(self.interval if self.latest else 0.5):
+            snapshot = sample_system_stats()
+            if snapshot:
+                # Single reference swap, readers never see a partial snapshot
+                self.latest = snapshot
+
+host_sampler = HostSampler()
+
+def get_system_stats():
+    """
+    Get the latest system statistics snapshot for the host machine
+    
+    Never blocks: returns whatever the background sampler published last.
+    
+    Returns:
+        dict: System statistics, or None before the first sample is ready
+    """
+    host_sampler.start()
+    return host_sampler.latest
+
 def get_process_stats():
     """
     Get statistics for the current Python process
@@ -199,7 +412,9 @@ def get_process_stats():
 
 if __name__ == "__main__":
     # Test system stats
-    stats = get_system_stats()
+    psutil.cpu_percent(interval=None)
+    time.sleep(1)
+    stats = sample_system_stats()
     if stats:
         print("System Statistics:")
         print(f"  CPU: {stats['cpu_info']}")
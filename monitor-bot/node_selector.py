@@ -0,0 +1,142 @@
+import re
+from aiohttp import web
+from config import SELECTOR_PING_WEIGHT
+
+def region_key(region):
+    """Normalise a region label ("🇩🇪 Germany" -> "germany") for lookups"""
+    return ' '.join(re.findall(r'[a-z0-9]+', (region or '').lower()))
+
+def node_penalty(snapshot):
+    """
+    Load penalty of an online node (lower is better)
+
+    Same shape as the penalties Lavalink clients use: one point per playing
+    player, exponential terms for CPU load and for deficit and nulled
+    frames (out of the 3000 a node sends per minute), plus ping.
+
+    Args:
+        snapshot: Online NodeSnapshot
+
+    Returns:
+        float: Penalty
+    """
+    stats = snapshot.stats
+    penalty = stats.playing_players
+    penalty += 1.05 ** (100 * stats.cpu_load) * 10 - 10
+
+    if stats.frames_deficit is not None:
+        penalty += 1.03 ** (500 * max(stats.frames_deficit, 0) / 3000) * 600 - 600
+    if stats.frames_nulled is not None:
+        penalty += (1.03 ** (500 * max(stats.frames_nulled, 0) / 3000) * 300 - 300) * 2
+
+    ping = snapshot.steady_ping
+    if ping is not None:
+        penalty += ping * SELECTOR_PING_WEIGHT
+
+    return penalty
+
+class NodeChoice:
+    """A ranked node, as handed to music bots"""
+
+    __slots__ = ('name', 'region', 'url', 'penalty')
+
+    def __init__(self, name, region, url, penalty):
+        self.name = name
+        self.region = region
+        self.url = url
+        self.penalty = penalty
+
+    def to_dict(self):
+        return {'name': self.name, 'region': self.region, 'url': self.url, 'penalty': round(self.penalty, 2)}
+
+class NodeSelector:
+    """
+    Picks the least-loaded node, optionally preferring a region
+
+    Rankings are rebuilt once per poll cycle in `update`, so `best` is a
+    dictionary lookup on the cached result.
+    """
+
+    def __init__(self):
+        self.ranking = []
+        self.by_region = {}
+        self._lookups = {}
+
+    def update(self, lavalink_data):
+        """
+        Re-rank nodes from the latest snapshots
+
+        Args:
+            lavalink_data: List of NodeSnapshot
+        """
+        ranking = sorted(
+            (NodeChoice(n.name, n.region, n.url, node_penalty(n)) for n in lavalink_data if n.online),
+            key=lambda choice: choice.penalty
+        )
+
+        by_region = {}
+        for choice in ranking:
+            by_region.setdefault(region_key(choice.region), []).append(choice)
+
+        # Swap in whole structures so readers never see a half-built ranking
+        self.ranking = ranking
+        self.by_region = by_region
+        self._lookups = {}
+
+    def _region_ranking(self, region):
+        # Cached per raw query string until the next update
+        ranking = self._lookups.get(region)
+        if ranking is None:
+            key = region_key(region)
+            ranking = self.by_region.get(key)
+            if ranking is None:
+                # Partial match ("germany" for "germany 2"), merged and re-sorted once per update
+                matches = [c for k, choices in self.by_region.items() if key and key in k for c in choices]
+                ranking = sorted(matches, key=lambda choice: choice.penalty)
+            self._lookups[region] = ranking
+        return ranking
+
+    def best(self, region=None):
+        """
+        Least-loaded online node
+
+        Args:
+            region: Preferred region; falls back to any region if none of its nodes are online
+
+        Returns:
+            NodeChoice: Best node, or None if every node is offline
+        """
+        if region:
+            ranking = self._region_ranking(region)
+            if ranking:
+                return ranking[0]
+        return self.ranking[0] if self.ranking else None
+
+    def ranked(self, region=None):
+        """All online nodes, best first (preferred region first when given)"""
+        if not region:
+            return list(self.ranking)
+        preferred = self._region_ranking(region)
+        names = {choice.name for choice in preferred}
+        return preferred + [choice for choice in self.ranking if choice.name not in names]
+
+    def attach(self, app):
+        """
+        Serve the selector over HTTP on an aiohttp app (before it starts)
+
+        GET /nodes/best?region=X -> best node
+        GET /nodes?region=X      -> full ranking
+        """
+        app.router.add_get('/nodes/best', self.handle_best)
+        app.router.add_get('/nodes', self.handle_ranked)
+
+    async def handle_best(self, request):
+        choice = self.best(request.query.get('region'))
+        if choice is None:
+            return web.json_response({'error': 'no node online'}, status=503)
+        return web.json_response(choice.to_dict())
+
+    async def handle_ranked(self, request):
+        return web.json_response([choice.to_dict() for choice in self.ranked(request.query.get('region'))])
+
+node_selector = NodeSelector()
@@ -17,16 +17,33 @@ import discord
 from discord.ext import commands, tasks
 from discord import app_commands
 import aiohttp
-import json
 import os
 import socket
-import platform
-import psutil
 import time
 import configparser
-from datetime import datetime
+from datetime import datetime, timedelta
 from typing import Optional, Dict
 from dotenv import load_dotenv
+from http_client import get_session, close_session
+from stats_stream import StatsStreamManager
+from config import WS_STATS_ENABLED, METRICS_ENABLED, PING_DISPLAY_STEP, PERCENT_DISPLAY_STEP, MEMORY_DISPLAY_STEP, POLL_TICK, CONFIG_WATCH_ENABLED, IP_HISTORY_KEEP, LATENCY_WINDOW
+from monitor import get_system_stats as read_host_snapshot, host_sampler, fetch_engine, describe_error
+from ip_resolver import IPResolver
+from history import HistoryStore
+from metrics_server import MetricsServer
+from node_selector import node_selector
+from frame_quality import frame_tracker
+from guild_registry import DashboardRegistry
+from scheduler import AdaptivePollScheduler
+from endpoint_groups import EndpointGrouper
+from models import NodeStats, NodeSnapshot, loads
+from alerts import AlertEngine, format_alert_embed
+from webhook_dispatcher import WebhookDispatcher
+from latency import RequestTiming, latency_tracker
+from utils import format_ping, format_frames, quantize
+from config_watcher import ConfigWatcher
+from state_store import StateStore, save_snapshots, restore_snapshots
+from instrumentation import instrumentation, format_debug_report
 
 load_dotenv()
 
@@ -36,6 +53,8 @@ UPDATE_INTERVAL = int(os.getenv('UPDATE_INTERVAL', 30))
 # ============================================================================
 # AUTO IP DETECTION - Works on Pterodactyl!
 # ============================================================================
+ip_resolver = IPResolver()
+
 class IPManager:
     def __init__(self):
         self.current_ip = None
@@ -46,25 +65,14 @@ class IPManager:
         self.youtube_status = "Checking..."
         self.rate_limit_count = 0
         
-    def get_public_ip(self) -> str:
-        """Auto-detect public IP"""
-        try:
-            import urllib.request
-            services = ['https://api.ipify.org', 'https://ifconfig.me/ip', 'https://icanhazip.com']
-            for service in services:
-                try:
-                    with urllib.request.urlopen(service, timeout=5) as r:
-                        ip = r.read().decode('utf-8').strip()
-                        if ip: return ip
-                except: continue
-            # Fallback
-            s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-            s.connect(("8.8.8.8", 80))
-            ip = s.getsockname()[0]
-            s.close()
-            return ip
-        except:
-            return "Unknown"
+    async def get_public_ip(self) -> str:
+        """Auto-detect public IP (cached, see ip_resolver)"""
+        return await ip_resolver.resolve()
+    
+    @property
+    def public_ip(self) -> str:
+        """Last detected public IP, without a lookup"""
+        return ip_resolver.ip or "Unknown"
     
     def get_hostname(self) -> str:
         try: return socket.gethostname()
@@ -76,7 +84,7 @@ class IPManager:
             'is_pterodactyl': False,
             'server_id': None,
             'node': None,
-            'ip': self.get_public_ip(),
+            'ip': self.public_ip,
             'port': '2333'
         }
         
@@ -89,6 +97,26 @@ class IPManager:
         
         return info
     
+    def to_state(self) -> dict:
+        """IP tracking that survives restarts"""
+        return {
+            'current_ip': self.current_ip,
+            'ip_history': list(self.ip_history[-IP_HISTORY_KEEP:]),
+            'blocked_ips': list(self.blocked_ips),
+            'ip_rotation_count': self.ip_rotation_count,
+            'last_rotation': self.last_rotation.isoformat() if self.last_rotation else None,
+            'rate_limit_count': self.rate_limit_count
+        }
+    
+    def restore(self, data: dict):
+        self.current_ip = data.get('current_ip', self.current_ip)
+        self.ip_history = data.get('ip_history', self.ip_history)
+        self.blocked_ips = data.get('blocked_ips', self.blocked_ips)
+        self.ip_rotation_count = data.get('ip_rotation_count', self.ip_rotation_count)
+        self.rate_limit_count = data.get('rate_limit_count', self.rate_limit_count)
+        if data.get('last_rotation'):
+            self.last_rotation = datetime.fromisoformat(data['last_rotation'])
+    
     def track_ip_change(self, new_ip: str):
         if self.current_ip and self.current_ip != new_ip:
             self.ip_history.append({'ip': self.current_ip, 'changed_at': datetime.now().isoformat()})
@@ -105,11 +133,14 @@ class LavalinkManager:
     def __init__(self):
         self.nodes = []
         self.peak_players = 0
+        self.scheduler = AdaptivePollScheduler()
+        self.poll_due = self.scheduler.wrap(self.poll)
+        self.grouper = EndpointGrouper(on_regroup=lambda names: stats_stream.exclude(names))
+        self.collect = self.grouper.wrap(lambda nodes: stats_stream.collect(nodes, poll=self.poll_due), verify=self.poll)
+        self.youtube_checked_at = 0
         
     def load_nodes(self, config_file='lavalink.ini'):
         """Load or auto-create lavalink config"""
-        nodes = []
-        
         if not os.path.exists(config_file):
             ptero = ip_manager.get_pterodactyl_info()
             with open(config_file, 'w') as f:
@@ -123,6 +154,13 @@ region = Auto
 """)
             print(f"✅ Auto-created {config_file}")
         
+        self.nodes = self.parse_nodes(config_file)
+        return self.nodes
+    
+    @staticmethod
+    def parse_nodes(config_file='lavalink.ini', verbose=True):
+        """Parse the [node-*] sections of the lavalink config"""
+        nodes = []
         try:
             config = configparser.ConfigParser()
             config.read(config_file)
@@ -141,64 +179,101 @@ region = Auto
                     protocol = 'https' if node['secure'] else 'http'
                     node['url'] = f"{protocol}://{node['host']}:{node['port']}"
                     nodes.append(node)
-                    print(f"✅ Loaded: {node['name']} ({node['url']})")
+                    if verbose:
+                        print(f"✅ Loaded: {node['name']} ({node['url']})")
         except Exception as e:
             print(f"❌ Config error: {e}")
+        return nodes
+    
+    async def apply_changes(self, nodes: list, diff):
+        """Swap in a reloaded node list, resetting state only for nodes that changed"""
+        for node in diff.removed:
+            self.scheduler.forget(node)
+            latency_tracker.forget(node['name'])
+            metrics.forget(node['name'])
+            await stats_stream.discard(node['name'])
+        if diff.changed:
+            self.grouper.invalidate()
         
         self.nodes = nodes
-        return nodes
+        if WS_STATS_ENABLED and bot.user:
+            stats_stream.start(self.nodes, user_id=bot.user.id)
     
-    async def fetch_stats(self, session, node) -> dict:
+    async def fetch_stats(self, session, node, timeout=None) -> NodeSnapshot:
         """Fetch node stats"""
         try:
             headers = {'Authorization': node['password']}
-            start = time.time()
+            timing = RequestTiming()
             
-            async with session.get(f"{node['url']}/v4/stats", headers=headers, timeout=aiohttp.ClientTimeout(total=5)) as r:
-                ping = (time.time() - start) * 1000
+            async with session.get(f"{node['url']}/v4/stats", headers=headers, timeout=timeout or aiohttp.ClientTimeout(total=5),
+                                   trace_request_ctx=timing) as r:
+                latency_tracker.observe(node['name'], timing)
                 if r.status == 200:
-                    data = await r.json()
-                    if data.get('players', 0) > self.peak_players:
-                        self.peak_players = data['players']
-                    return {'name': node['name'], 'region': node['region'], 'url': node['url'], 
-                            'online': True, 'ping': round(ping, 1), 'stats': data, 'ip': node['host']}
-                return {'name': node['name'], 'region': node['region'], 'online': False, 'error': f"HTTP {r.status}", 'ip': node['host']}
-        except asyncio.TimeoutError:
-            return {'name': node['name'], 'region': node['region'], 'online': False, 'error': 'Timeout', 'ip': node['host']}
+                    body = await r.read()
+                    with instrumentation.stage('parse'):
+                        stats = NodeStats.from_json(loads(body))
+                    snapshot = NodeSnapshot.up(node, stats, round(timing.ttfb, 1), time.time(), ip=node['host'])
+                    snapshot.latency = latency_tracker.summary(node['name'])
+                    return snapshot
+                return NodeSnapshot.down(node, f"HTTP {r.status}", ip=node['host'])
+        except asyncio.CancelledError:
+            raise
         except Exception as e:
-            return {'name': node['name'], 'region': node['region'], 'online': False, 'error': str(e)[:30], 'ip': node['host']}
+            return NodeSnapshot.down(node, describe_error(e)[:30], ip=node['host'])
+    
+    async def poll(self, nodes: list) -> list:
+        """Fetch stats over HTTP for the given nodes (bounded, with a cycle deadline)"""
+        results = await fetch_engine.fetch_all(nodes, fetch=self.fetch_stats)
+        for node, r in zip(nodes, results):
+            if r.ip is None: r.ip = node['host']
+        return results
     
     async def fetch_all(self) -> list:
-        async with aiohttp.ClientSession() as session:
-            return await asyncio.gather(*[self.fetch_stats(session, n) for n in self.nodes])
+        """Latest stats for every node (websocket push, HTTP fallback)"""
+        results = await self.collect(self.nodes)
+        for r in results:
+            if r.online and r.stats.players > self.peak_players:
+                self.peak_players = r.stats.players
+        return results
     
     async def check_youtube(self):
-        """Check YouTube access"""
+        """Check YouTube access (at most once per UPDATE_INTERVAL)"""
+        if time.monotonic() - self.youtube_checked_at < UPDATE_INTERVAL:
+            return
+        self.youtube_checked_at = time.monotonic()
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get('https://www.youtube.com', timeout=aiohttp.ClientTimeout(total=5)) as r:
-                    if r.status == 200: ip_manager.youtube_status = "✅ Working"
-                    elif r.status == 429: ip_manager.youtube_status = "⚠️ Rate Limited"; ip_manager.rate_limit_count += 1
-                    elif r.status == 403: ip_manager.youtube_status = "🚫 Blocked"
-                    else: ip_manager.youtube_status = f"❓ {r.status}"
+            async with get_session().get('https://www.youtube.com', timeout=aiohttp.ClientTimeout(total=5)) as r:
+                if r.status == 200: ip_manager.youtube_status = "✅ Working"
+                elif r.status == 429: ip_manager.youtube_status = "⚠️ Rate Limited"; ip_manager.rate_limit_count += 1
+                elif r.status == 403: ip_manager.youtube_status = "🚫 Blocked"
+                else: ip_manager.youtube_status = f"❓ {r.status}"
         except Exception as e:
             ip_manager.youtube_status = f"❌ Error"
 
 lavalink = LavalinkManager()
+state = StateStore()
+config_watcher = ConfigWatcher(lambda path: LavalinkManager.parse_nodes(path, verbose=False))
+stats_stream = StatsStreamManager()
+history = HistoryStore()
+metrics = MetricsServer()
+node_selector.attach(metrics.app)
+alert_engine = AlertEngine()
+webhooks = WebhookDispatcher()
 
 # ============================================================================
 # HELPERS
 # ============================================================================
 def get_health_emoji(value: float, metric: str) -> str:
-    thresholds = {'cpu': (50, 80), 'ram': (60, 85), 'ping': (100, 200)}
+    thresholds = {'cpu': (50, 80), 'ram': (60, 85), 'ping': (100, 200), 'frames': (1, 5)}
     t = thresholds.get(metric, (50, 80))
     if value < t[0]: return '🟢'
     elif value < t[1]: return '🟠'
     else: return '🔴'
 
-def format_uptime(seconds: float) -> str:
-    if seconds < 60: return f"{int(seconds)}s"
-    elif seconds < 3600: return f"{int(seconds // 60)}m {int(seconds % 60)}s"
+def format_uptime(seconds: float, coarse: bool = False) -> str:
+    """Human-readable uptime; coarse drops seconds so it changes at most once a minute"""
+    if seconds < 60: return "<1m" if coarse else f"{int(seconds)}s"
+    elif seconds < 3600: return f"{int(seconds // 60)}m" if coarse else f"{int(seconds // 60)}m {int(seconds % 60)}s"
     elif seconds < 86400: return f"{int(seconds // 3600)}h {int((seconds % 3600) // 60)}m"
     else: return f"{int(seconds // 86400)}d {int((seconds % 86400) // 3600)}h"
 
@@ -209,34 +284,18 @@ def format_bytes(b: int) -> str:
     return f"{b:.1f}TB"
 
 def get_system_stats() -> dict:
-    try:
-        import cpuinfo
-        cpu_name = cpuinfo.get_cpu_info().get('brand_raw', 'Unknown')[:40]
-    except:
-        cpu_name = platform.processor()[:40] or 'Unknown'
-    
-    mem = psutil.virtual_memory()
-    disk = psutil.disk_usage('/')
-    
-    return {
-        'cpu_info': cpu_name,
-        'cpu_percent': psutil.cpu_percent(interval=0.5),
-        'memory_percent': mem.percent,
-        'memory_used_gb': (mem.total - mem.available) / (1024**3),
-        'memory_total_gb': mem.total / (1024**3),
-        'disk_percent': disk.percent,
-        'disk_used_gb': disk.used / (1024**3),
-        'disk_total_gb': disk.total / (1024**3),
-        'os_info': f"{platform.system()} {platform.machine()}"
-    }
+    """Latest host snapshot published by the background sampler"""
+    stats = read_host_snapshot()
+    if not stats: return None
+    return {**stats, 'cpu_info': stats['cpu_info'][:40]}
 
 # ============================================================================
 # EMBED CREATOR
 # ============================================================================
 def create_embed(lavalink_data: list, system_data: dict) -> discord.Embed:
-    online = [n for n in lavalink_data if n.get('online')]
-    total_players = sum(n['stats'].get('players', 0) for n in online) if online else 0
-    total_playing = sum(n['stats'].get('playingPlayers', 0) for n in online) if online else 0
+    online = [n for n in lavalink_data if n.online]
+    total_players = sum(n.stats.players for n in online)
+    total_playing = sum(n.stats.playing_players for n in online)
     
     color = 0x00ff00 if len(online) == len(lavalink_data) else (0xff8800 if online else 0xff0000)
     
@@ -263,7 +322,7 @@ def create_embed(lavalink_data: list, system_data: dict) -> discord.Embed:
 📺 **YouTube:** {ip_manager.youtube_status}"""
     if ip_manager.last_rotation:
         ago = (datetime.now() - ip_manager.last_rotation).total_seconds()
-        ip_info += f"\n⏱️ **Last Rotation:** `{format_uptime(ago)} ago`"
+        ip_info += f"\n⏱️ **Last Rotation:** `{format_uptime(ago, coarse=True)} ago`"
     embed.add_field(name="🔒 IP Tracking", value=ip_info, inline=True)
     
     # Quick Stats
@@ -274,33 +333,30 @@ def create_embed(lavalink_data: list, system_data: dict) -> discord.Embed:
     
     # Nodes
     for node in lavalink_data:
-        if node.get('online'):
-            s = node['stats']
-            cpu = s.get('cpu', {}).get('systemLoad', 0) * 100
-            if cpu == 0: cpu = s.get('cpu', {}).get('lavalinkLoad', 0) * 100
-            mem = s.get('memory', {})
-            ram_pct = (mem.get('used', 0) / mem.get('allocated', 1)) * 100 if mem.get('allocated', 0) > 0 else 0
-            
-            val = f"""{get_health_emoji(cpu, 'cpu')} **CPU:** `{cpu:.1f}%`
-{get_health_emoji(ram_pct, 'ram')} **RAM:** `{format_bytes(mem.get('used', 0))}` / `{format_bytes(mem.get('allocated', 0))}`
-{get_health_emoji(node.get('ping', 999), 'ping')} **Ping:** `{node.get('ping', 'N/A')}ms`
-🎵 **Players:** `{s.get('players', 0)}` | 🎶 `{s.get('playingPlayers', 0)}`
-⏰ **Uptime:** `{format_uptime(s.get('uptime', 0) / 1000)}`"""
+        if node.online:
+            s = node.stats
+            ping = node.steady_ping
+            val = f"""{get_health_emoji(s.cpu_percent, 'cpu')} **CPU:** `{quantize(s.cpu_percent, PERCENT_DISPLAY_STEP):.0f}%`
+{get_health_emoji(s.ram_percent, 'ram')} **RAM:** `{format_bytes(quantize(s.memory_used, MEMORY_DISPLAY_STEP))}` / `{format_bytes(s.memory_allocated)}`
+{get_health_emoji(ping if ping is not None else 999, 'ping')} **Ping:** `{format_ping(node, PING_DISPLAY_STEP)}`
+🎵 **Players:** `{s.players}` | 🎶 `{s.playing_players}`
+{get_health_emoji(node.frames.avg_loss_percent if node.frames else 0, 'frames')} **Frames:** `{format_frames(node.frames)}`
+⏰ **Uptime:** `{format_uptime(s.uptime_seconds, coarse=True)}`"""
         else:
-            val = f"🔴 **Offline**\n❌ `{node.get('error', 'Unknown')}`"
+            val = f"🔴 **Offline**\n❌ `{node.error or 'Unknown'}`"
         
-        icon = "🟢" if node.get('online') else "🔴"
-        embed.add_field(name=f"{icon} {node.get('name', 'Unknown')} Node", value=val, inline=True)
+        icon = "🟢" if node.online else "🔴"
+        embed.add_field(name=f"{icon} {node.name} Node", value=val, inline=True)
     
     # System
     if system_data:
         embed.add_field(name="🖥️ Host System", value=f"""💻 **CPU:** `{system_data['cpu_info']}`
-{get_health_emoji(system_data['cpu_percent'], 'cpu')} **Usage:** `{system_data['cpu_percent']:.1f}%`
-{get_health_emoji(system_data['memory_percent'], 'ram')} **RAM:** `{system_data['memory_percent']:.1f}%` ({system_data['memory_used_gb']:.1f}GB)
-💾 **Disk:** `{system_data['disk_percent']:.1f}%` ({system_data['disk_used_gb']:.1f}GB)
+{get_health_emoji(system_data['cpu_percent'], 'cpu')} **Usage:** `{quantize(system_data['cpu_percent'], PERCENT_DISPLAY_STEP):.0f}%`
+{get_health_emoji(system_data['memory_percent'], 'ram')} **RAM:** `{quantize(system_data['memory_percent'], PERCENT_DISPLAY_STEP):.0f}%` ({system_data['memory_used_gb']:.1f}GB)
+💾 **Disk:** `{quantize(system_data['disk_percent'], PERCENT_DISPLAY_STEP):.0f}%` ({system_data['disk_used_gb']:.1f}GB)
 🖥️ **OS:** `{system_data['os_info']}`""", inline=False)
     
-    embed.set_footer(text=f"🤖 Bot Uptime: {format_uptime((datetime.now() - bot.start_time).total_seconds())} • Updates every {UPDATE_INTERVAL}s")
+    embed.set_footer(text=f"🤖 Bot Uptime: {format_uptime((datetime.now() - bot.start_time).total_seconds(), coarse=True)} • Updates every {UPDATE_INTERVAL}s")
     return embed
 
 # ============================================================================
@@ -313,14 +369,22 @@ class PremiumBot(commands.Bot):
         intents.guilds = True
         super().__init__(command_prefix='!', intents=intents)
         
-        self.monitor_channel_id = None
-        self.alerts_channel_id = None
-        self.webhook_url = None
+        self.registry = DashboardRegistry(self, store=state)
         self.start_time = datetime.now()
         
     async def setup_hook(self):
         await self.tree.sync()
         print("✅ Commands synced!")
+    
+    async def close(self):
+        await config_watcher.stop()
+        await stats_stream.stop()
+        await metrics.stop()
+        await instrumentation.stop()
+        await webhooks.stop()
+        await close_session()
+        await asyncio.get_running_loop().run_in_executor(None, state.close)
+        await super().close()
 
 bot = PremiumBot()
 
@@ -347,20 +411,8 @@ async def setup_cmd(interaction: discord.Interaction, category_name: str = "🎧
         # Create webhook
         webhook = await alerts.create_webhook(name="Lavalink Alerts")
         
-        # Save config
-        bot.monitor_channel_id = monitor.id
-        bot.alerts_channel_id = alerts.id
-        bot.webhook_url = webhook.url
-        
-        config = {
-            'guild_id': guild.id,
-            'monitor_channel_id': monitor.id,
-            'alerts_channel_id': alerts.id,
-            'webhook_url': webhook.url,
-            'setup_at': datetime.now().isoformat()
-        }
-        with open('monitor_config.json', 'w') as f:
-            json.dump(config, f, indent=2)
+        # Save config (replaces any previous dashboard for this guild)
+        bot.registry.register(guild.id, monitor.id, alerts.id, webhook.url)
         
         embed = discord.Embed(
             title="✅ Setup Complete!",
@@ -370,7 +422,7 @@ async def setup_cmd(interaction: discord.Interaction, category_name: str = "🎧
 📝 {logs.mention} - Logs
 
 **Auto-Detected:**
-🌐 IP: `{ip_manager.get_public_ip()}`
+🌐 IP: `{await ip_manager.get_public_ip()}`
 🖥️ Host: `{ip_manager.get_hostname()}`
 
 Monitoring started! ✨""",
@@ -389,6 +441,7 @@ Monitoring started! ✨""",
 async def status_cmd(interaction: discord.Interaction):
     await interaction.response.defer()
     data = await lavalink.fetch_all()
+    frame_tracker.observe(data)
     sys = get_system_stats()
     await interaction.followup.send(embed=create_embed(data, sys))
 
@@ -424,36 +477,84 @@ async def nodes_cmd(interaction: discord.Interaction):
 🔒 {'HTTPS' if n['secure'] else 'HTTP'}""", inline=True)
     await interaction.response.send_message(embed=embed)
 
+@bot.tree.command(name="history", description="📈 Show what a node looked like at a given time")
+@app_commands.describe(node="Node name", at="Time as HH:MM (latest past occurrence)")
+async def history_cmd(interaction: discord.Interaction, node: str, at: str):
+    try:
+        hour, minute = (int(x) for x in at.split(':'))
+        when = datetime.now().replace(hour=hour, minute=minute, second=0, microsecond=0)
+    except ValueError:
+        await interaction.response.send_message("❌ Use HH:MM, e.g. `03:00`", ephemeral=True)
+        return
+    if when > datetime.now():
+        when -= timedelta(days=1)
+    
+    name = next((n for n in history.nodes if n.lower() == node.lower()), node)
+    point = history.at(name, when.timestamp())
+    if not point:
+        await interaction.response.send_message(f"❌ No history for `{node}` at `{at}`", ephemeral=True)
+        return
+    
+    avg, peak = point['avg'], point['max']
+    def show(v, fmt="{:.1f}"): return "N/A" if v != v else fmt.format(v)
+    embed = discord.Embed(title=f"📈 {name} @ {datetime.fromtimestamp(point['timestamp']).strftime('%Y-%m-%d %H:%M')}",
+                          color=0x00aaff)
+    embed.add_field(name="📊 Stats", value=f"""✅ **Online:** `{show(avg['online'] * 100)}%`
+🎵 **Players:** `{show(avg['players'])}` (max `{show(peak['players'], '{:.0f}')}`)
+🎶 **Playing:** `{show(avg['playing_players'])}`
+💻 **CPU:** `{show(avg['cpu_system'] * 100)}%` (max `{show(peak['cpu_system'] * 100)}%`)
+🧠 **RAM:** `{format_bytes(avg['memory_used']) if avg['memory_used'] == avg['memory_used'] else 'N/A'}`
+📡 **Ping:** `{show(avg['ping'])}ms` (max `{show(peak['ping'])}ms`)""", inline=False)
+    embed.set_footer(text=f"Resolution: {point['resolution']}")
+    await interaction.response.send_message(embed=embed)
+
+@bot.tree.command(name="debug", description="🩺 Loop lag, stage timings and Discord API counters")
+@app_commands.describe(profiler="Start or stop the sampling profiler")
+@app_commands.choices(profiler=[
+    app_commands.Choice(name="on", value="on"),
+    app_commands.Choice(name="off", value="off")
+])
+async def debug_cmd(interaction: discord.Interaction, profiler: Optional[app_commands.Choice[str]] = None):
+    if not interaction.user.guild_permissions.administrator:
+        await interaction.response.send_message("❌ Need Admin permission!", ephemeral=True)
+        return
+    
+    if profiler and profiler.value == "on":
+        instrumentation.profiler.start()
+    elif profiler and profiler.value == "off":
+        instrumentation.profiler.stop()
+    
+    profile = instrumentation.profiler.report() if instrumentation.profiler.started_at is not None else None
+    embed = discord.Embed(title="🩺 Monitor Debug", color=0x00aaff, timestamp=datetime.now())
+    for name, value in format_debug_report(instrumentation.snapshot(), profile).items():
+        embed.add_field(name=name, value=value[:1024], inline=False)
+    embed.set_footer(text=f"Profiler {'running' if instrumentation.profiler.running else 'off'} • Stage timings cover the last {LATENCY_WINDOW // 60} min")
+    await interaction.response.send_message(embed=embed, ephemeral=True)
+
 # ============================================================================
 # MONITORING
 # ============================================================================
 async def update_monitor():
-    if not bot.monitor_channel_id:
+    """One shared poll, fanned out to every guild's dashboard"""
+    if not bot.registry.guilds:
         return
     
     try:
-        channel = bot.get_channel(bot.monitor_channel_id)
-        if not channel: return
-        
-        data = await lavalink.fetch_all()
+        with instrumentation.stage('fetch'):
+            data = await lavalink.fetch_all()
+        frame_tracker.observe(data)
         sys = get_system_stats()
+        history.record(data)
+        metrics.update(data, sys)
+        node_selector.update(data)
+        save_state(data)
+        await asyncio.get_running_loop().run_in_executor(None, persist)
         await lavalink.check_youtube()
-        ip_manager.track_ip_change(ip_manager.get_public_ip())
+        ip_manager.track_ip_change(await ip_manager.get_public_ip())
         
-        embed = create_embed(data, sys)
-        
-        try:
-            if os.path.exists('message_id.txt'):
-                with open('message_id.txt', 'r') as f:
-                    msg_id = int(f.read().strip())
-                msg = await channel.fetch_message(msg_id)
-                await msg.edit(embed=embed)
-            else:
-                raise FileNotFoundError
-        except:
-            msg = await channel.send(embed=embed)
-            with open('message_id.txt', 'w') as f:
-                f.write(str(msg.id))
+        with instrumentation.stage('render'):
+            embed = create_embed(data, sys)
+        await bot.registry.fan_out(embed)
         
         # Send alerts
         await send_alerts(data)
@@ -461,28 +562,38 @@ async def update_monitor():
     except Exception as e:
         print(f"❌ Update error: {e}")
 
+def save_state(data: list):
+    """Queue warm-restart state; written with the history by persist()"""
+    save_snapshots(state, data)
+    state.set('peak_players', lavalink.peak_players)
+    state.set('ip_manager', ip_manager.to_state())
+
+def persist():
+    """Write pending history and state in one trip off the event loop"""
+    history.flush()
+    state.flush()
+
+alerted_rate_limits = 0
+
 async def send_alerts(data: list):
-    if not bot.webhook_url: return
-    
-    alerts = []
-    for n in data:
-        if not n.get('online'):
-            alerts.append(f"🔴 **{n['name']}** offline: {n.get('error', 'Unknown')}")
-        elif n.get('ping', 0) > 200:
-            alerts.append(f"🟠 **{n['name']}** high ping: {n['ping']}ms")
-    
-    if ip_manager.rate_limit_count > 0 and ip_manager.rate_limit_count % 3 == 0:
-        alerts.append(f"⚠️ Rate limit count: {ip_manager.rate_limit_count}")
-    
-    if alerts:
-        try:
-            async with aiohttp.ClientSession() as session:
-                await session.post(bot.webhook_url, json={
-                    "embeds": [{"title": "🚨 Alert", "description": "\n".join(alerts), "color": 0xff0000}]
-                })
-        except: pass
+    """Evaluate alert rules every cycle; post only new and resolved alerts, grouped"""
+    global alerted_rate_limits
+    with instrumentation.stage('alerts'):
+        events = alert_engine.evaluate(data)
+        
+        extra = []
+        count = ip_manager.rate_limit_count
+        if count > alerted_rate_limits and count % 3 == 0:
+            alerted_rate_limits = count
+            extra.append(f"⚠️ Rate limit count: {count}")
+        
+        webhook_urls = bot.registry.webhook_urls()
+        embed = format_alert_embed(events, extra)
+        if embed and webhook_urls:
+            # Delivered in the background, batched and rate-limit aware
+            webhooks.enqueue(webhook_urls, embed)
 
-@tasks.loop(seconds=UPDATE_INTERVAL)
+@tasks.loop(seconds=POLL_TICK)
 async def monitor_loop():
     await update_monitor()
 
@@ -495,6 +606,8 @@ async def before_monitor():
 # ============================================================================
 @bot.event
 async def on_ready():
+    instrumentation.start()
+    public_ip = await ip_manager.get_public_ip()
     print(f"""
 ╔════════════════════════════════════════════════════════╗
 ║     👑 PREMIUM LAVALINK MONITOR - AUTO DEVOPS          ║
@@ -503,30 +616,43 @@ async def on_ready():
 ║  ID: {bot.user.id:<49} ║
 ║  Servers: {len(bot.guilds):<44} ║
 ╠════════════════════════════════════════════════════════╣
-║  🌐 IP: {ip_manager.get_public_ip():<47} ║
+║  🌐 IP: {public_ip:<47} ║
 ║  🖥️  Host: {ip_manager.get_hostname():<44} ║
 ╠════════════════════════════════════════════════════════╣
-║  Commands: /setup /status /ip /nodes                   ║
+║  Commands: /setup /status /ip /nodes /history /debug   ║
 ╚════════════════════════════════════════════════════════╝
 """)
     
+    # on_ready fires again after reconnects; the watcher keeps the node list current
+    if not lavalink.nodes:
+        lavalink.load_nodes()
+    
     # Load config
-    if os.path.exists('monitor_config.json'):
-        try:
-            with open('monitor_config.json', 'r') as f:
-                c = json.load(f)
-            bot.monitor_channel_id = c.get('monitor_channel_id')
-            bot.alerts_channel_id = c.get('alerts_channel_id')
-            bot.webhook_url = c.get('webhook_url')
-            print(f"✅ Config loaded - Channel: {bot.monitor_channel_id}")
-            if not monitor_loop.is_running():
-                monitor_loop.start()
-        except Exception as e:
-            print(f"⚠️ Config error: {e}")
+    if not bot.registry.guilds:
+        bot.registry.load()
+    if bot.registry.guilds:
+        print(f"✅ Config loaded - {len(bot.registry.guilds)} dashboard(s)")
+        if not monitor_loop.is_running():
+            # Show the last known results right away instead of waiting for the first poll
+            restored = restore_snapshots(state, lavalink.nodes)
+            if restored:
+                node_selector.update(restored)
+                await bot.registry.fan_out(create_embed(restored, get_system_stats()))
+            monitor_loop.start()
     else:
         print("ℹ️ Use /setup to configure!")
     
-    lavalink.load_nodes()
+    if CONFIG_WATCH_ENABLED:
+        config_watcher.start(lavalink.nodes, lavalink.apply_changes)
+    if WS_STATS_ENABLED:
+        stats_stream.start(lavalink.nodes, user_id=bot.user.id)
+    if METRICS_ENABLED:
+        await metrics.start()
+    webhooks.restore()
+
+@bot.event
+async def on_guild_remove(guild: discord.Guild):
+    bot.registry.remove(guild.id)
 
 # ============================================================================
 # MAIN
@@ -536,5 +662,10 @@ if __name__ == "__main__":
         print("❌ Set BOT_TOKEN in .env!")
         exit(1)
     
+    host_sampler.start()
+    history.load()
+    ip_manager.restore(state.get('ip_manager') or {})
+    lavalink.peak_players = state.get('peak_players', 0)
+    alerted_rate_limits = ip_manager.rate_limit_count
     print("🚀 Starting Premium Monitor Bot...")
     bot.run(BOT_TOKEN)
@@ -0,0 +1,142 @@
+import asyncio
+import random
+import time
+from config import (
+    POLL_MIN_INTERVAL,
+    POLL_BASE_INTERVAL,
+    POLL_MAX_INTERVAL,
+    POLL_OFFLINE_MAX_INTERVAL,
+    POLL_JITTER,
+    POLL_SPREAD
+)
+
+def _signature(result):
+    """Values the scheduler watches for change: (cpu load, ping, players)"""
+    return (result.stats.cpu_load, result.ping or 0, result.stats.players)
+
+def is_volatile(previous, current):
+    """
+    Whether a node's load or latency moved enough to watch it closely
+
+    Args:
+        previous: Previous (cpu, ping, players) signature
+        current: Current (cpu, ping, players) signature
+
+    Returns:
+        bool: True if the node is changing
+    """
+    cpu_before, ping_before, players_before = previous
+    cpu_now, ping_now, players_now = current
+
+    if abs(cpu_now - cpu_before) >= 0.1:
+        return True
+    if abs(ping_now - ping_before) >= max(50, 0.5 * ping_before):
+        return True
+    if abs(players_now - players_before) >= max(2, 0.2 * players_before):
+        return True
+    return False
+
+class NodeSchedule:
+    """Polling state for one node"""
+
+    def __init__(self):
+        self.interval = POLL_BASE_INTERVAL
+        self.next_due = 0
+        self.failures = 0
+        self.signature = None
+        self.result = None
+
+class AdaptivePollScheduler:
+    """
+    Gives each node its own polling interval
+
+    Nodes whose load or ping is moving, or that just went down or came back,
+    are polled at the minimum interval. Stable nodes back off towards the
+    maximum, nodes that stay offline back off exponentially, and every due
+    time is jittered so polls don't all fire together.
+    """
+
+    def __init__(self):
+        self.schedules = {}
+
+    def _schedule(self, node):
+        schedule = self.schedules.get(node['name'])
+        if schedule is None:
+            schedule = self.schedules[node['name']] = NodeSchedule()
+        return schedule
+
+    def is_due(self, node, now=None):
+        now = now or time.monotonic()
+        schedule = self._schedule(node)
+        return schedule.result is None or now >= schedule.next_due
+
+    def record(self, node, result, now=None):
+        """
+        Store a fresh result and pick the node's next interval
+
+        Args:
+            node: Node configuration
+            result: Node stats from the poll
+            now: Poll time (monotonic)
+        """
+        now = now or time.monotonic()
+        schedule = self._schedule(node)
+        was_online = schedule.result is not None and schedule.result.online
+
+        if result.online:
+            signature = _signature(result)
+            if not was_online or schedule.signature is None:
+                # First answer or just recovered
+                interval = POLL_MIN_INTERVAL
+            elif is_volatile(schedule.signature, signature):
+                interval = POLL_MIN_INTERVAL
+            else:
+                interval = min(max(schedule.interval, POLL_BASE_INTERVAL) * 1.5, POLL_MAX_INTERVAL)
+            schedule.failures = 0
+            schedule.signature = signature
+        else:
+            schedule.failures += 1
+            if schedule.failures == 1:
+                # Just failed, confirm quickly
+                interval = POLL_MIN_INTERVAL
+            else:
+                interval = min(POLL_BASE_INTERVAL * 2 ** (schedule.failures - 2), POLL_OFFLINE_MAX_INTERVAL)
+
+        schedule.interval = interval
+        schedule.next_due = now + interval * random.uniform(1 - POLL_JITTER, 1 + POLL_JITTER)
+        schedule.result = result
+
+    def forget(self, node):
+        self.schedules.pop(node['name'], None)
+
+    def wrap(self, poll):
+        """
+        Make a poll coroutine skip nodes that aren't due
+
+        Args:
+            poll: Coroutine that fetches a list of nodes
+
+        Returns:
+            Coroutine function with the same signature returning fresh results
+            for due nodes and the last known result for the rest
+        """
+        async def scheduled_poll(nodes):
+            now = time.monotonic()
+            due = [node for node in nodes if self.is_due(node, now)]
+
+            if due:
+                # Spread due polls over a short window instead of one burst
+                polled = await asyncio.gather(*[self._poll_later(poll, node) for node in due])
+                finished = time.monotonic()
+                for node, result in zip(due, polled):
+                    self.record(node, result, finished)
+
+            return [self._schedule(node).result for node in nodes]
+
+        return scheduled_poll
+
+    @staticmethod
+    async def _poll_later(poll, node):
+        await asyncio.sleep(random.uniform(0, POLL_SPREAD))
+        results = await poll([node])
+        return results[0]
@@ -0,0 +1,154 @@
+import json
+import sqlite3
+import threading
+import time
+from config import STATE_DB_FILE, RESTORE_MAX_AGE
+from models import NodeSnapshot
+
+class StateStore:
+    """
+    Small key-value store for state that should survive restarts
+
+    Values are JSON, kept in a SQLite database in WAL mode. Reads come from
+    an in-memory copy loaded on first access; `set` only marks keys dirty
+    and `flush` writes every dirty key in one transaction, so a crash leaves
+    either the previous or the new batch on disk, never half of it.
+    """
+
+    def __init__(self, path=STATE_DB_FILE):
+        self.path = path
+        self.values = None
+        self._dirty = {}
+        self._db = None
+        self._lock = threading.Lock()        # guards the dirty keys, only held briefly on the event loop
+        self._db_lock = threading.Lock()     # guards the connection during writes
+
+    def _connect(self):
+        if self._db is None:
+            db = sqlite3.connect(self.path, check_same_thread=False)
+            db.execute('PRAGMA journal_mode=WAL')
+            db.execute('PRAGMA synchronous=NORMAL')
+            db.execute('CREATE TABLE IF NOT EXISTS state (key TEXT PRIMARY KEY, value TEXT NOT NULL, updated_at REAL)')
+            self._db = db
+        return self._db
+
+    def _load(self):
+        values = {}
+        try:
+            with self._db_lock:
+                rows = self._connect().execute('SELECT key, value FROM state').fetchall()
+            for key, value in rows:
+                try:
+                    values[key] = json.loads(value)
+                except ValueError:
+                    continue
+        except sqlite3.Error as e:
+            print(f"❌ Error loading state from {self.path}: {e}")
+        self.values = values
+
+    def get(self, key, default=None):
+        """
+        Saved value of a key (the store is read from disk on first use)
+
+        Args:
+            key: State key
+            default: Value when the key was never saved
+
+        Returns:
+            Decoded value
+        """
+        if self.values is None:
+            self._load()
+        return self.values.get(key, default)
+
+    def set(self, key, value):
+        """
+        Update a key in memory; written by the next `flush`
+
+        Args:
+            key: State key
+            value: JSON-serializable value (None deletes the key), not mutated afterwards
+        """
+        if self.values is None:
+            self._load()
+        self.values[key] = value
+        with self._lock:
+            self._dirty[key] = value
+
+    def flush(self):
+        """
+        Write dirty keys in one transaction
+
+        Does blocking I/O, run it in an executor from the event loop.
+        """
+        # Flushes are serialized, so batches reach the disk in the order they were taken
+        with self._db_lock:
+            with self._lock:
+                if not self._dirty:
+                    return
+                dirty, self._dirty = self._dirty, {}
+
+            now = time.time()
+            upserts = []
+            deletes = []
+            for key, value in dirty.items():
+                if value is None:
+                    deletes.append((key,))
+                    continue
+                try:
+                    upserts.append((key, json.dumps(value), now))
+                except (TypeError, ValueError) as e:
+                    print(f"❌ Not saving state key {key}: {e}")
+
+            try:
+                db = self._connect()
+                with db:
+                    db.executemany('INSERT OR REPLACE INTO state (key, value, updated_at) VALUES (?, ?, ?)', upserts)
+                    db.executemany('DELETE FROM state WHERE key = ?', deletes)
+            except sqlite3.Error as e:
+                # Keep the batch for the next flush unless newer values replaced it
+                with self._lock:
+                    for key, value in dirty.items():
+                        self._dirty.setdefault(key, value)
+                print(f"❌ Error saving state to {self.path}: {e}")
+
+    def close(self):
+        """Flush and close the database"""
+        self.flush()
+        with self._db_lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+def save_snapshots(store, lavalink_data):
+    """Keep the latest node results for the first render after a restart"""
+    store.set('last_results', [snapshot.to_dict() for snapshot in lavalink_data])
+
+def restore_snapshots(store, nodes, max_age=RESTORE_MAX_AGE):
+    """
+    Saved results for the configured nodes, in config order
+
+    After longer downtime the saved results say nothing about the nodes
+    now, so they are only used if every one was fetched within `max_age`.
+
+    Args:
+        store: StateStore
+        nodes: Node configurations
+        max_age: Oldest acceptable result, in seconds
+
+    Returns:
+        list: NodeSnapshot per node, or None unless every node has a recent saved result for its current URL
+    """
+    oldest = time.time() - max_age
+    saved = {}
+    for data in store.get('last_results') or ():
+        if isinstance(data, dict) and 'name' in data:
+            saved[data['name']] = data
+
+    snapshots = []
+    for node in nodes:
+        data = saved.get(node['name'])
+        if data is None or data.get('url') != node['url'] or (data.get('fetched_at') or 0) < oldest:
+            return None
+        snapshots.append(NodeSnapshot.from_dict(data))
+    return snapshots or None
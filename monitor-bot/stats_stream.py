@@ -0,0 +1,287 @@
+import asyncio
+import random
+import time
+import aiohttp
+from config import (
+    WS_CLIENT_NAME,
+    WS_USER_ID,
+    WS_RECONNECT_MIN,
+    WS_RECONNECT_MAX,
+    WS_RESUME_TIMEOUT,
+    WS_STATS_STALE_AFTER,
+    WS_PING_INTERVAL
+)
+from http_client import get_session, get_stream_session
+from monitor import get_lavalink_stats
+from models import NodeStats, NodeSnapshot, loads
+from latency import RequestTiming, latency_tracker
+from instrumentation import instrumentation
+
+class NodeStatsStream:
+    """
+    Single Lavalink v4 websocket connection that ingests pushed `stats` frames
+
+    Stats frames carry no timing, so while the socket is up a small HTTP
+    request (`/version`) is timed every WS_PING_INTERVAL, the same way
+    polls are, to keep the node's ping and latency percentiles current.
+    """
+
+    def __init__(self, node, user_id=WS_USER_ID):
+        self.node = node
+        self.user_id = str(user_id)
+        self.session_id = None
+        self.connected = False
+        self.ping = None
+        self.ping_at = None
+        self.latest = None
+        self.latest_at = 0
+        self.failures = 0
+        self.task = None
+
+    @property
+    def ws_url(self):
+        """Websocket endpoint derived from the node's HTTP URL"""
+        url = self.node['url']
+        if url.startswith('https://'):
+            url = 'wss://' + url[len('https://'):]
+        elif url.startswith('http://'):
+            url = 'ws://' + url[len('http://'):]
+        return f"{url}/v4/websocket"
+
+    def is_live(self):
+        """Whether the socket is up and has delivered a recent stats frame"""
+        return (
+            self.connected
+            and self.latest is not None
+            and time.time() - self.latest_at < WS_STATS_STALE_AFTER
+        )
+
+    def start(self):
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        if self.task and not self.task.done():
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+        self.task = None
+        self.connected = False
+
+    async def run(self):
+        """Keep the connection open, reconnecting with backoff"""
+        delay = WS_RECONNECT_MIN
+
+        while True:
+            try:
+                if await self.connect():
+                    delay = WS_RECONNECT_MIN
+                    self.failures = 0
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.failures += 1
+                # Only report the first failure of an outage
+                if self.failures == 1:
+                    print(f"⚠️ Stats socket down for {self.node['name']}: {e}")
+            finally:
+                self.connected = False
+
+            # Exponential backoff with jitter
+            await asyncio.sleep(delay * random.uniform(0.5, 1.0))
+            delay = min(delay * 2, WS_RECONNECT_MAX)
+
+    async def connect(self):
+        """
+        Open one websocket session and consume frames until it closes
+
+        Returns:
+            bool: True if the node sent a ready frame before disconnecting
+        """
+        headers = {
+            'Authorization': self.node['password'],
+            'User-Id': self.user_id,
+            'Client-Name': WS_CLIENT_NAME
+        }
+        if self.session_id:
+            headers['Session-Id'] = self.session_id
+
+        session = get_stream_session()
+        ready = False
+        start_time = time.time()
+
+        async with session.ws_connect(self.ws_url, headers=headers, heartbeat=30) as ws:
+            # Handshake time stands in until the first timed request answers
+            self.ping = round((time.time() - start_time) * 1000, 1)
+            self.ping_at = time.time()
+            probe = asyncio.create_task(self.measure_ping())
+            try:
+                ready = await self.consume(ws)
+            finally:
+                probe.cancel()
+
+        return ready
+
+    async def consume(self, ws):
+        """
+        Handle frames until the socket closes
+
+        Returns:
+            bool: True if the node sent a ready frame
+        """
+        ready = False
+        async for msg in ws:
+            if msg.type != aiohttp.WSMsgType.TEXT:
+                break
+
+            parse_start = time.perf_counter()
+            payload = loads(msg.data)
+            op = payload.get('op')
+
+            if op == 'ready':
+                ready = True
+                self.connected = True
+                if not payload.get('resumed') or payload.get('sessionId') != self.session_id:
+                    self.session_id = payload.get('sessionId')
+                    await self.enable_resuming(get_session())
+            elif op == 'stats':
+                self.latest = NodeStats.from_json(payload)
+                self.latest_at = time.time()
+                instrumentation.record('parse', time.perf_counter() - parse_start)
+
+        return ready
+
+    async def measure_ping(self):
+        """Time a request to the node every WS_PING_INTERVAL while the socket is open"""
+        url = f"{self.node['url']}/version"
+        headers = {'Authorization': self.node['password']}
+        while True:
+            timing = RequestTiming()
+            try:
+                async with get_session().get(url, headers=headers, trace_request_ctx=timing) as response:
+                    await response.read()
+                    latency_tracker.observe(self.node['name'], timing)
+                    self.ping = round(timing.ttfb, 1) if response.status == 200 else None
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                # Unknown rather than the last good value
+                self.ping = None
+            self.ping_at = time.time()
+            await asyncio.sleep(WS_PING_INTERVAL)
+
+    async def enable_resuming(self, session):
+        """Ask the node to keep our session alive across reconnects"""
+        if not self.session_id:
+            return
+
+        url = f"{self.node['url']}/v4/sessions/{self.session_id}"
+        headers = {'Authorization': self.node['password']}
+        try:
+            async with session.patch(url, headers=headers, json={'resuming': True, 'timeout': WS_RESUME_TIMEOUT}):
+                pass
+        except Exception as e:
+            print(f"⚠️ Could not enable resuming for {self.node['name']}: {e}")
+
+    def result(self):
+        """
+        Latest pushed stats in the same shape as `monitor.fetch_node_stats`
+
+        Returns:
+            NodeSnapshot: Node stats, or None if the socket is not live
+        """
+        if not self.is_live():
+            return None
+
+        snapshot = NodeSnapshot.up(self.node, self.latest, self.ping, self.latest_at, ping_at=self.ping_at)
+        snapshot.latency = latency_tracker.summary(self.node['name'])
+        return snapshot
+
+class StatsStreamManager:
+    """
+    Keeps one stats socket per backend and falls back to HTTP while a socket is down
+
+    Config entries found to be aliases of another entry's backend (see
+    endpoint_groups) are excluded, so each Lavalink process gets one socket.
+    """
+
+    def __init__(self):
+        self.streams = {}
+        self.nodes = []
+        self.user_id = WS_USER_ID
+        self.excluded = set()
+
+    def start(self, nodes, user_id=WS_USER_ID):
+        """
+        Open a stats socket for every node that doesn't already have one
+
+        Args:
+            nodes: List of node configurations
+            user_id: Discord user ID sent in the websocket handshake
+        """
+        self.nodes = list(nodes)
+        self.user_id = user_id
+        for node in nodes:
+            if node['name'] in self.excluded:
+                continue
+            stream = self.streams.get(node['name'])
+            if stream is None:
+                stream = NodeStatsStream(node, user_id)
+                self.streams[node['name']] = stream
+            stream.start()
+
+    def exclude(self, names):
+        """
+        Keep sockets closed for these entries and open them for the others again
+
+        Args:
+            names: Names of entries that share another entry's backend
+        """
+        self.excluded = set(names)
+        for name in self.excluded:
+            stream = self.streams.pop(name, None)
+            if stream is not None:
+                asyncio.create_task(stream.stop())
+        if self.nodes:
+            self.start(self.nodes, self.user_id)
+
+    async def discard(self, name):
+        """Close and forget one node's socket"""
+        stream = self.streams.pop(name, None)
+        if stream is not None:
+            await stream.stop()
+
+    async def stop(self):
+        """Close every stats socket"""
+        await asyncio.gather(*[stream.stop() for stream in self.streams.values()])
+        self.streams.clear()
+
+    async def collect(self, nodes, poll=get_lavalink_stats):
+        """
+        Get stats for all nodes, polling over HTTP only where the socket is down
+
+        Args:
+            nodes: List of node configurations
+            poll: Coroutine that fetches a list of nodes over HTTP
+
+        Returns:
+            list: List of node stats in node order
+        """
+        results = []
+        pending = []
+
+        for i, node in enumerate(nodes):
+            stream = self.streams.get(node['name'])
+            result = stream.result() if stream else None
+            if result is None:
+                pending.append(i)
+            results.append(result)
+
+        if pending:
+            polled = await poll([nodes[i] for i in pending])
+            for i, result in zip(pending, polled):
+                results[i] = result
+
+        return results
@@ -1,5 +1,11 @@
+import json
+import os
 from config import HEALTH_THRESHOLDS, EMOJIS
 from datetime import datetime, timedelta
+from health import FleetHealth, evaluate_fleet
+
+# Column buffers are reused across calls
+_fleet_health = FleetHealth()
 
 def get_health_emoji(value, metric_type):
     """
@@ -28,102 +34,34 @@ def get_health_emoji(value, metric_type):
 
 def get_overall_health(lavalink_data, system_data):
     """
-    Calculate overall health status
+    Calculate overall health status (see health.FleetHealth for per-node detail)
     
     Args:
-        lavalink_data: List of Lavalink node data
+        lavalink_data: List of NodeSnapshot
         system_data: System statistics
         
     Returns:
         str: Overall health status (good, moderate, critical)
     """
-    critical_count = 0
-    moderate_count = 0
-    total_metrics = 0
-    
-    # Check Lavalink nodes
-    for node in lavalink_data:
-        if node.get('online', False):
-            stats = node['stats']
-            
-            # CPU check
-            cpu_emoji = get_health_emoji(stats['cpu'] * 100, 'cpu')
-            if cpu_emoji == EMOJIS['critical']:
-                critical_count += 1
-            elif cpu_emoji == EMOJIS['moderate']:
-                moderate_count += 1
-            total_metrics += 1
-            
-            # RAM check
-            ram_percent = stats['memory']['used'] / stats['memory']['allocated'] * 100
-            ram_emoji = get_health_emoji(ram_percent, 'ram')
-            if ram_emoji == EMOJIS['critical']:
-                critical_count += 1
-            elif ram_emoji == EMOJIS['moderate']:
-                moderate_count += 1
-            total_metrics += 1
-            
-            # Ping check
-            ping_emoji = get_health_emoji(node.get('ping', 999), 'ping')
-            if ping_emoji == EMOJIS['critical']:
-                critical_count += 1
-            elif ping_emoji == EMOJIS['moderate']:
-                moderate_count += 1
-            total_metrics += 1
-    
-    # Check system stats
-    if system_data:
-        system_cpu_emoji = get_health_emoji(system_data['cpu_percent'], 'cpu')
-        if system_cpu_emoji == EMOJIS['critical']:
-            critical_count += 1
-        elif system_cpu_emoji == EMOJIS['moderate']:
-            moderate_count += 1
-        total_metrics += 1
-        
-        system_ram_emoji = get_health_emoji(system_data['memory_percent'], 'ram')
-        if system_ram_emoji == EMOJIS['critical']:
-            critical_count += 1
-        elif system_ram_emoji == EMOJIS['moderate']:
-            moderate_count += 1
-        total_metrics += 1
-        
-        system_disk_emoji = get_health_emoji(system_data['disk_percent'], 'disk')
-        if system_disk_emoji == EMOJIS['critical']:
-            critical_count += 1
-        elif system_disk_emoji == EMOJIS['moderate']:
-            moderate_count += 1
-        total_metrics += 1
-    
-    # Determine overall health
-    if total_metrics == 0:
-        return 'critical'
-    
-    critical_ratio = critical_count / total_metrics
-    moderate_ratio = moderate_count / total_metrics
-    
-    if critical_ratio > 0.3:  # More than 30% critical
-        return 'critical'
-    elif critical_ratio > 0.1 or moderate_ratio > 0.5:  # More than 10% critical or 50% moderate
-        return 'moderate'
-    else:
-        return 'good'
+    return evaluate_fleet(lavalink_data, system_data, _fleet_health).status
 
-def format_uptime(seconds):
+def format_uptime(seconds, coarse=False):
     """
     Format uptime in seconds to human-readable format
     
     Args:
         seconds: Uptime in seconds
+        coarse: Drop the seconds so the text only changes once a minute
         
     Returns:
         str: Formatted uptime string
     """
     if seconds < 60:
-        return f"{int(seconds)}s"
+        return "<1m" if coarse else f"{int(seconds)}s"
     elif seconds < 3600:
         minutes = int(seconds // 60)
         secs = int(seconds % 60)
-        return f"{minutes}m {secs}s"
+        return f"{minutes}m" if coarse else f"{minutes}m {secs}s"
     elif seconds < 86400:
         hours = int(seconds // 3600)
         minutes = int((seconds % 3600) // 60)
@@ -133,6 +71,57 @@ def format_uptime(seconds):
         hours = int((seconds % 86400) // 3600)
         return f"{days}d {hours}h"
 
+def quantize(value, step):
+    """
+    Round a noisy value to the nearest step
+    
+    Args:
+        value: Value to round
+        step: Rounding step
+        
+    Returns:
+        float: Quantized value (None stays None)
+    """
+    if value is None:
+        return None
+    return round(value / step) * step
+
+def format_ping(node_data, step=1):
+    """
+    Format a node's ping with its windowed p95 when there is one
+    
+    Args:
+        node_data: NodeSnapshot
+        step: Rounding step in ms (coarser steps keep the text stable)
+        
+    Returns:
+        str: e.g. "42ms · p95 60ms"
+    """
+    ping = quantize(node_data.ping, step)
+    if ping is None:
+        return "N/A"
+    text = f"{ping:.0f}ms"
+    if node_data.latency is not None and node_data.latency.p95 is not None:
+        text += f" · p95 {quantize(node_data.latency.p95, step):.0f}ms"
+    return text
+
+def format_frames(frames):
+    """
+    Format a node's audio frame loss with its trend
+    
+    Args:
+        frames: FrameQuality (None when nothing is playing)
+        
+    Returns:
+        str: e.g. "0.4% lost (avg 0.2%) ↑"
+    """
+    if frames is None:
+        return "N/A"
+    text = f"{frames.loss_percent:.1f}% lost (avg {frames.avg_loss_percent:.1f}%)"
+    if frames.deficit_trend is not None and abs(frames.deficit_trend) >= 0.1:
+        text += " ↑" if frames.deficit_trend > 0 else " ↓"
+    return text
+
 def format_bytes(bytes_value):
     """
     Format bytes to human-readable format
@@ -275,6 +264,31 @@ def validate_config(config):
     
     return True, "Configuration is valid"
 
+def write_text_atomic(path, text):
+    """
+    Write a file so readers only ever see the old or the new content
+    
+    Args:
+        path: Destination file
+        text: File content
+    """
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+def write_json_atomic(path, data):
+    """
+    Write JSON so readers only ever see the old or the new file
+    
+    Args:
+        path: Destination file
+        data: JSON-serializable data
+    """
+    write_text_atomic(path, json.dumps(data, indent=2))
+
 def sanitize_node_name(name):
     """
     Sanitize node name for display
@@ -371,22 +385,20 @@ def format_node_stats_summary(node_data):
     Format node statistics for summary display
     
     Args:
-        node_data: Node statistics data
+        node_data: NodeSnapshot
         
     Returns:
         str: Formatted summary
     """
-    if not node_data.get('online', False):
-        return f"❌ **Offline** - {node_data.get('error', 'Unknown error')}"
+    if not node_data.online:
+        return f"❌ **Offline** - {node_data.error or 'Unknown error'}"
     
-    stats = node_data['stats']
-    cpu_pct = stats['cpu'] * 100
-    ram_pct = stats['memory']['used'] / stats['memory']['allocated'] * 100
+    stats = node_data.stats
     
     return f"""
-{get_health_emoji(cpu_pct, 'cpu')} CPU: {cpu_pct:.1f}% | {get_health_emoji(ram_pct, 'ram')} RAM: {ram_pct:.1f}%
-🎵 Players: {stats['players']} | 🎶 Playing: {stats['playingPlayers']}
-📍 {node_data['region']} | 🏓 {node_data.get('ping', 'N/A')}ms
+{get_health_emoji(stats.cpu_percent, 'cpu')} CPU: {stats.cpu_percent:.1f}% | {get_health_emoji(stats.ram_percent, 'ram')} RAM: {stats.ram_percent:.1f}%
+🎵 Players: {stats.players} | 🎶 Playing: {stats.playing_players}
+📍 {node_data.region} | 🏓 {format_ping(node_data)}
 """.strip()
 
 if __name__ == "__main__":
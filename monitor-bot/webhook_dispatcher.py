@@ -0,0 +1,246 @@
+import asyncio
+import json
+import os
+import random
+import time
+from collections import deque
+import aiohttp
+from http_client import get_session
+from config import (
+    WEBHOOK_QUEUE_LIMIT,
+    WEBHOOK_SPILL_FILE,
+    WEBHOOK_MAX_RETRIES,
+    WEBHOOK_BACKOFF_MIN,
+    WEBHOOK_BACKOFF_MAX
+)
+
+# Discord limits per webhook message
+MAX_EMBEDS = 10
+MAX_EMBED_CHARS = 6000
+
+def embed_size(embed):
+    """Characters Discord counts towards the per-message embed limit"""
+    size = len(embed.get('title', '')) + len(embed.get('description', ''))
+    size += len((embed.get('footer') or {}).get('text', ''))
+    for field in embed.get('fields', ()):
+        size += len(field.get('name', '')) + len(field.get('value', ''))
+    return size
+
+class WebhookQueue:
+    """Pending embeds and rate-limit state for one webhook URL"""
+
+    def __init__(self, url):
+        self.url = url
+        self.embeds = deque()
+        self.blocked_until = 0
+        self.failures = 0
+        self.wakeup = asyncio.Event()
+        self.task = None
+
+class WebhookDispatcher:
+    """
+    Background delivery of alert embeds to Discord webhooks
+
+    `enqueue` only appends to an in-memory queue, so the monitor loop never
+    waits on Discord. One worker per webhook packs up to 10 embeds into each
+    message, honours the X-RateLimit headers and 429 retry_after, retries
+    server and network errors with backoff, and moves overflow to a spill
+    file that is replayed once the queue drains.
+    """
+
+    def __init__(self, limit=WEBHOOK_QUEUE_LIMIT, spill_file=WEBHOOK_SPILL_FILE):
+        self.limit = limit
+        self.spill_file = spill_file
+        self.queues = {}
+        self._spill_lock = None
+        self._stopping = False
+
+    def enqueue(self, urls, embed):
+        """
+        Queue one embed for every webhook (never blocks)
+
+        Args:
+            urls: Webhook URL or list of URLs
+            embed: Embed payload dict
+        """
+        if isinstance(urls, str):
+            urls = [urls]
+
+        for url in urls:
+            queue = self.queues.get(url)
+            if queue is None:
+                queue = self.queues[url] = WebhookQueue(url)
+            queue.embeds.append(embed)
+            queue.wakeup.set()
+            if queue.task is None or queue.task.done():
+                queue.task = asyncio.create_task(self._worker(queue))
+
+    def pending(self):
+        """Embeds waiting in memory, over all webhooks"""
+        return sum(len(queue.embeds) for queue in self.queues.values())
+
+    async def stop(self):
+        """Stop the workers and spill whatever is still queued"""
+        self._stopping = True
+        tasks = [queue.task for queue in self.queues.values() if queue.task]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+        leftovers = [(queue.url, embed) for queue in self.queues.values() for embed in queue.embeds]
+        if leftovers:
+            await self._spill(leftovers)
+            print(f"💾 Saved {len(leftovers)} undelivered alerts to {self.spill_file}")
+
+    def restore(self):
+        """Re-queue alerts spilled by a previous run (call from the event loop)"""
+        if os.path.exists(self.spill_file):
+            asyncio.create_task(self._replay())
+
+    @staticmethod
+    def _take_batch(queue):
+        batch = []
+        size = 0
+        while queue.embeds and len(batch) < MAX_EMBEDS:
+            embed = queue.embeds[0]
+            size += embed_size(embed)
+            if batch and size > MAX_EMBED_CHARS:
+                break
+            batch.append(queue.embeds.popleft())
+        return batch
+
+    async def _worker(self, queue):
+        while not self._stopping:
+            if len(queue.embeds) > self.limit:
+                # Keep the newest alerts in memory, the overflow goes to disk
+                overflow = [queue.embeds.popleft() for _ in range(len(queue.embeds) - self.limit)]
+                await self._spill([(queue.url, embed) for embed in overflow])
+
+            if not queue.embeds:
+                if await self._replay():
+                    continue
+                queue.wakeup.clear()
+                await queue.wakeup.wait()
+                continue
+
+            wait = queue.blocked_until - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+
+            batch = self._take_batch(queue)
+            outcome = await self._post(queue, batch)
+
+            if outcome == 'retry':
+                queue.embeds.extendleft(reversed(batch))
+            elif outcome == 'gone':
+                print(f"❌ Webhook removed, dropping {len(queue.embeds) + len(batch)} alerts")
+                queue.embeds.clear()
+                del self.queues[queue.url]
+                return
+
+    async def _post(self, queue, batch):
+        """
+        Send one message and update the queue's rate-limit state
+
+        Returns:
+            str: 'sent', 'retry', 'dropped' or 'gone'
+        """
+        try:
+            async with get_session().post(queue.url, params={'wait': 'true'}, json={'embeds': batch}) as response:
+                headers = response.headers
+
+                if response.status == 429:
+                    try:
+                        retry_after = float((await response.json()).get('retry_after', 0))
+                    except (aiohttp.ContentTypeError, ValueError):
+                        retry_after = 0
+                    retry_after = retry_after or float(headers.get('Retry-After', 1))
+                    queue.blocked_until = time.monotonic() + retry_after
+                    return 'retry'
+
+                if response.status >= 500:
+                    return self._backoff(queue, f"HTTP {response.status}")
+
+                # Bucket exhausted: wait for the reset before the next message
+                if headers.get('X-RateLimit-Remaining') == '0':
+                    queue.blocked_until = time.monotonic() + float(headers.get('X-RateLimit-Reset-After', 1))
+
+                if response.status in (401, 404):
+                    return 'gone'
+                if response.status >= 400:
+                    print(f"❌ Webhook rejected alert batch: HTTP {response.status} {(await response.text())[:200]}")
+                    queue.failures = 0
+                    return 'dropped'
+
+                queue.failures = 0
+                return 'sent'
+        except asyncio.CancelledError:
+            queue.embeds.extendleft(reversed(batch))
+            raise
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            return self._backoff(queue, str(e) or type(e).__name__)
+
+    @staticmethod
+    def _backoff(queue, reason):
+        queue.failures += 1
+        if queue.failures > WEBHOOK_MAX_RETRIES:
+            print(f"❌ Giving up on alert batch after {WEBHOOK_MAX_RETRIES} retries: {reason}")
+            queue.failures = 0
+            return 'dropped'
+
+        delay = min(WEBHOOK_BACKOFF_MIN * 2 ** (queue.failures - 1), WEBHOOK_BACKOFF_MAX)
+        queue.blocked_until = time.monotonic() + delay * random.uniform(0.5, 1.0)
+        if queue.failures == 1:
+            print(f"⚠️ Alert webhook failed ({reason}), retrying")
+        return 'retry'
+
+    def _lock(self):
+        # Created on first use so it binds to the running loop
+        if self._spill_lock is None:
+            self._spill_lock = asyncio.Lock()
+        return self._spill_lock
+
+    async def _spill(self, items):
+        lines = ''.join(json.dumps({'url': url, 'embed': embed}) + '\n' for url, embed in items)
+
+        def write():
+            with open(self.spill_file, 'a') as f:
+                f.write(lines)
+
+        async with self._lock():
+            try:
+                await asyncio.get_running_loop().run_in_executor(None, write)
+            except Exception as e:
+                print(f"❌ Could not spill alerts to {self.spill_file}: {e}")
+
+    async def _replay(self):
+        """
+        Move spilled alerts back into the queues
+
+        Returns:
+            bool: True if anything was re-queued
+        """
+        def read():
+            if not os.path.exists(self.spill_file):
+                return []
+            with open(self.spill_file, 'r') as f:
+                lines = f.readlines()
+            os.remove(self.spill_file)
+            return lines
+
+        async with self._lock():
+            try:
+                lines = await asyncio.get_running_loop().run_in_executor(None, read)
+            except Exception as e:
+                print(f"❌ Could not read {self.spill_file}: {e}")
+                return False
+
+        restored = 0
+        for line in lines:
+            try:
+                item = json.loads(line)
+                self.enqueue(item['url'], item['embed'])
+                restored += 1
+            except (ValueError, KeyError):
+                continue
+        return restored > 0